@@ -0,0 +1,50 @@
+"""
+Serve the Pro API over a Unix socket, for clients querying it often.
+
+Usage: python3 api_server.py [--socket PATH]
+"""
+
+import argparse
+import logging
+
+from uaclient import defaults, subp_trace
+from uaclient.api import server
+from uaclient.config import UAConfig
+from uaclient.daemon import setup_logging
+
+LOG = logging.getLogger("uaclient.api.server")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--socket", default=server.API_SOCKET_PATH)
+    args = parser.parse_args()
+
+    setup_logging(
+        logging.INFO,
+        logging.DEBUG,
+        defaults.CONFIG_DEFAULTS["daemon_log_file"],
+        logger=LOG,
+    )
+    cfg = UAConfig()
+    setup_logging(
+        logging.INFO, logging.DEBUG, log_file=cfg.daemon_log_file, logger=LOG
+    )
+    # Make sure the server logger does not generate double logging
+    # by propagating to the root logger
+    LOG.propagate = False
+    # Endpoint errors are part of their responses, the root logger only
+    # needs to record what went wrong in the server itself
+    setup_logging(
+        logging.CRITICAL,
+        logging.ERROR,
+        log_file=cfg.daemon_log_file,
+        logger=logging.getLogger(),
+    )
+    subp_trace.configure(cfg)
+
+    server.serve(args.socket)
+
+
+if __name__ == "__main__":
+    main()
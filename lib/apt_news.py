@@ -3,7 +3,7 @@
 import logging
 from datetime import datetime, timedelta, timezone
 
-from uaclient import apt, defaults
+from uaclient import apt, defaults, subp_trace
 from uaclient.apt_news import update_apt_news
 from uaclient.config import UAConfig
 from uaclient.daemon import setup_logging
@@ -35,4 +35,5 @@ if __name__ == "__main__":
         log_file=cfg.log_file,
         logger=logging.getLogger(),
     )
+    subp_trace.configure(cfg)
     main(cfg)
@@ -13,7 +13,7 @@ their side.
 import logging
 import sys
 
-from uaclient import defaults, messages, system
+from uaclient import defaults, messages, subp_trace, system
 from uaclient.api.exceptions import (
     AlreadyAttachedError,
     AutoAttachDisabledError,
@@ -116,4 +116,5 @@ if __name__ == "__main__":
         log_file=cfg.log_file,
         logger=logging.getLogger(),
     )
+    subp_trace.configure(cfg)
     sys.exit(main(cfg))
@@ -4,7 +4,7 @@ import sys
 
 from systemd.daemon import notify  # type: ignore
 
-from uaclient import defaults
+from uaclient import defaults, subp_trace
 from uaclient.config import UAConfig
 from uaclient.daemon import (
     poll_for_pro_license,
@@ -37,6 +37,7 @@ def main() -> int:
         log_file=cfg.daemon_log_file,
         logger=logging.getLogger(),
     )
+    subp_trace.configure(cfg)
 
     LOG.debug("daemon starting")
 
@@ -2,7 +2,7 @@
 
 import logging
 
-from uaclient import defaults
+from uaclient import defaults, subp_trace
 from uaclient.apt import update_esm_caches
 from uaclient.config import UAConfig
 from uaclient.daemon import setup_logging
@@ -32,4 +32,5 @@ if __name__ == "__main__":
         log_file=cfg.log_file,
         logger=logging.getLogger(),
     )
+    subp_trace.configure(cfg)
     main(cfg)
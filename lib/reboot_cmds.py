@@ -18,7 +18,15 @@ import logging
 import os
 import sys
 
-from uaclient import config, contract, defaults, exceptions, lock, messages
+from uaclient import (
+    config,
+    contract,
+    defaults,
+    exceptions,
+    lock,
+    messages,
+    subp_trace,
+)
 from uaclient.cli import setup_logging
 from uaclient.entitlements.fips import FIPSEntitlement
 from uaclient.files import notices
@@ -159,4 +167,5 @@ if __name__ == "__main__":
     )
     cfg = config.UAConfig()
     setup_logging(logging.INFO, logging.DEBUG, log_file=cfg.log_file)
+    subp_trace.configure(cfg)
     main(cfg=cfg)
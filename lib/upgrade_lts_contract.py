@@ -24,6 +24,7 @@ import logging
 import sys
 import time
 
+from uaclient import subp_trace
 from uaclient.cli import setup_logging
 from uaclient.config import UAConfig
 from uaclient.contract import process_entitlements_delta
@@ -56,6 +57,7 @@ current_codename_to_past_codename = {
 def process_contract_delta_after_apt_lock() -> None:
     logging.debug("Check whether to upgrade-lts-contract")
     cfg = UAConfig()
+    subp_trace.configure(cfg)
     if not cfg.is_attached:
         logging.debug("Skipping upgrade-lts-contract. Machine is unattached")
         return
@@ -0,0 +1,106 @@
+"""
+Compare the time a `pro status`-like run spends logging to the debug log
+with a plain FileHandler and with the background queue handler.
+
+Usage: python3 tools/benchmark-file-logging.py [--runs N] [--records N]
+    [--waits N] [--wait-ms MS]
+
+Each run logs --records debug records, a tenth of them large service
+responses, through a logger configured the way cli.setup_logging does it.
+Like `pro status`, which waits on apt-cache, systemctl and the contract
+server, the run also sleeps --waits times for --wait-ms, spread between the
+records. The run time is what the command takes up to its last record; the
+exit time also includes writing out what is still queued.
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, ".")
+
+from uaclient import log as pro_log  # noqa: E402
+
+MESSAGES = [
+    "Reading file: /var/lib/ubuntu-advantage/status.json",
+    "Running cmd: /usr/bin/apt-cache policy, returncode: 0",
+    "Executed with sys.argv: ['/usr/bin/pro', 'status']",
+    "Checking for new version of ubuntu-advantage-tools",
+]
+RESPONSE = (
+    "URL [GET] response: https://contracts.canonical.com/v1/resources,"
+    " headers: {'Content-Type': 'application/json'}, data: %s"
+)
+
+
+def log_run(logger, num_records, waits, wait):
+    data = repr({"resources": [{"name": "esm-infra"}] * 200})
+    wait_every = max(num_records // waits, 1) if waits else 0
+    for i in range(num_records):
+        if wait_every and i % wait_every == 0:
+            time.sleep(wait)
+        if i % 10 == 0:
+            logger.debug(RESPONSE, data)
+        else:
+            logger.debug(MESSAGES[i % len(MESSAGES)])
+
+
+def make_logger(log_file, queued):
+    logger = logging.Logger("benchmark")
+    logger.setLevel(logging.DEBUG)
+    logger.addFilter(pro_log.RedactionFilter())
+    if queued:
+        handler = pro_log.get_queue_file_handler(log_file)
+    else:
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(pro_log.JsonArrayFormatter())
+    handler.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger, handler
+
+
+def measure(directory, queued, args):
+    run_times = []
+    exit_times = []
+    for run in range(args.runs):
+        log_file = os.path.join(
+            directory, "{}-{}.log".format("queued" if queued else "sync", run)
+        )
+        logger, handler = make_logger(log_file, queued)
+        start = time.monotonic()
+        log_run(logger, args.records, args.waits, args.wait_ms / 1000)
+        run_times.append(time.monotonic() - start)
+        handler.close()
+        exit_times.append(time.monotonic() - start)
+        with open(log_file) as stream:
+            assert args.records == sum(1 for _ in stream)
+    return min(run_times), min(exit_times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--records", type=int, default=500)
+    parser.add_argument("--waits", type=int, default=20)
+    parser.add_argument("--wait-ms", type=float, default=5, metavar="MS")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, queued in (("FileHandler", False), ("queued", True)):
+            run_time, exit_time = measure(directory, queued, args)
+            print(
+                "{:11}: {:6.1f}ms run, {:6.1f}ms with exit, for {} records"
+                " and {:.0f}ms of waits".format(
+                    label,
+                    run_time * 1000,
+                    exit_time * 1000,
+                    args.records,
+                    args.waits * args.wait_ms,
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
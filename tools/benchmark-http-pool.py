@@ -0,0 +1,131 @@
+"""
+Compare sequential readurl calls over fresh urllib connections and over a
+pooled keep-alive connection, against a local TLS stub server.
+
+Usage: python3 tools/benchmark-http-pool.py [--requests N] [--latency MS]
+
+The stub server uses a throwaway self-signed certificate made with openssl
+and answers every request with a small JSON document after --latency
+milliseconds, to mimic the server side of a contract request.
+"""
+import argparse
+import functools
+import http.server
+import os
+import socketserver
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+from uaclient import util  # noqa: E402
+from uaclient.connection_pool import HTTPConnectionPool  # noqa: E402
+
+BODY = b'{"machineToken": "token", "resourceTokens": []}'
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body together, as real servers do, rather than
+    # waiting on delayed ACKs between two small writes
+    wbufsize = -1
+    latency = 0.0
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def make_certificate(directory):
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.check_call(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=localhost",
+            "-addext",
+            "subjectAltName=DNS:localhost,IP:127.0.0.1",
+            "-keyout",
+            key,
+            "-out",
+            cert,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+def time_requests(url, num_requests, urlopen):
+    start = time.monotonic()
+    for _ in range(num_requests):
+        util.readurl(url, urlopen=urlopen)
+    return time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0, metavar="MS")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cert, key = make_certificate(directory)
+        server_context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        server_context.load_cert_chain(cert, key)
+        client_context = ssl.create_default_context(cafile=cert)
+
+        StubHandler.latency = args.latency / 1000
+        server = StubServer(("127.0.0.1", 0), StubHandler)
+        server.socket = server_context.wrap_socket(
+            server.socket, server_side=True
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = "https://localhost:{}/v1/context".format(server.server_port)
+
+        util.get_web_proxies = lambda: {}
+        urllib_time = time_requests(
+            url,
+            args.requests,
+            functools.partial(util.request.urlopen, context=client_context),
+        )
+        pool = HTTPConnectionPool(context=client_context)
+        pool_time = time_requests(url, args.requests, pool.urlopen)
+        server.shutdown()
+
+    print(
+        "{} requests: {:.1f}ms each with urllib, {:.1f}ms pooled"
+        " ({:.1f}x)".format(
+            args.requests,
+            urllib_time / args.requests * 1000,
+            pool_time / args.requests * 1000,
+            urllib_time / pool_time,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
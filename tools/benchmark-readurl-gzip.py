@@ -0,0 +1,140 @@
+"""
+Compare readurl on a large JSON response sent plain and gzip-compressed,
+measuring bytes on the wire, time and peak Python memory.
+
+Usage: python3 tools/benchmark-readurl-gzip.py [--notices N] [--rate MBPS]
+
+A local stub server answers with a security notices document of --notices
+entries, compressing it only when the request accepts gzip. --rate limits
+the stub's sending speed in megabits per second, to mimic a real link;
+0 sends as fast as loopback allows.
+"""
+import argparse
+import gzip
+import http.server
+import json
+import socketserver
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, ".")
+
+from uaclient import util  # noqa: E402
+from uaclient.connection_pool import HTTPConnectionPool  # noqa: E402
+
+
+def make_notices(num_notices):
+    return json.dumps(
+        {
+            "notices": [
+                {
+                    "id": "USN-{}-1".format(i),
+                    "title": "Security update for package-{}".format(i),
+                    "published": "2022-05-{:02d}T12:00:00".format(i % 28 + 1),
+                    "cves_ids": [
+                        "CVE-2022-{}".format(i * 10 + cve) for cve in range(5)
+                    ],
+                    "release_packages": {
+                        "jammy": [
+                            {
+                                "name": "package-{}".format(i),
+                                "version": "1.{}-0ubuntu1".format(i),
+                                "is_source": True,
+                            }
+                        ]
+                    },
+                }
+                for i in range(num_notices)
+            ]
+        }
+    ).encode("utf-8")
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    body = b""
+    gzip_body = b""
+    rate = 0.0
+    sent = 0
+
+    def do_GET(self):
+        body = self.body
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = self.gzip_body
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        StubHandler.sent = len(body)
+        chunk_size = 64 * 1024
+        for offset in range(0, len(body), chunk_size):
+            chunk = body[offset : offset + chunk_size]
+            self.wfile.write(chunk)
+            if self.rate:
+                time.sleep(len(chunk) * 8 / self.rate)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def measure(url, headers, urlopen):
+    def read():
+        util.readurl(
+            url, headers=headers, log_response_body=False, urlopen=urlopen
+        )
+
+    # Tracing allocations slows everything down, so time separate calls
+    timings = []
+    for _ in range(3):
+        start = time.monotonic()
+        read()
+        timings.append(time.monotonic() - start)
+    tracemalloc.start()
+    read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return StubHandler.sent, min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--notices", type=int, default=20000)
+    parser.add_argument("--rate", type=float, default=100, metavar="MBPS")
+    args = parser.parse_args()
+
+    StubHandler.body = make_notices(args.notices)
+    StubHandler.gzip_body = gzip.compress(StubHandler.body)
+    StubHandler.rate = args.rate * 1000 * 1000
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = "http://127.0.0.1:{}/security/notices.json".format(
+        server.server_port
+    )
+
+    util.get_web_proxies = lambda: {}
+    pool = HTTPConnectionPool()
+    for label, urlopen in (
+        ("urllib", util.request.urlopen),
+        ("pooled", pool.urlopen),
+    ):
+        for encoding in ("identity", "gzip"):
+            sent, elapsed, peak = measure(
+                url, {"Accept-Encoding": encoding}, urlopen
+            )
+            print(
+                "{} {:8}: {:8.1f}KiB sent, {:7.1f}ms, peak {:8.1f}KiB".format(
+                    label, encoding, sent / 1024, elapsed * 1000, peak / 1024
+                )
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
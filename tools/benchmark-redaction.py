@@ -0,0 +1,107 @@
+"""
+Time log redaction over a synthetic Pro log, comparing one re.sub per
+pattern with util.redact_sensitive_logs and its line by line variant.
+
+Usage: python3 tools/benchmark-redaction.py [--size MB]
+
+The log mimics ubuntu-advantage.log: JSON array lines, a few of which
+carry tokens that need redacting.
+"""
+import argparse
+import io
+import json
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, ".")
+
+from uaclient import util  # noqa: E402
+
+MESSAGES = [
+    "Reading file: /var/lib/ubuntu-advantage/status.json",
+    "Executed with sys.argv: ['/usr/bin/pro', 'status']",
+    "Running cmd: /usr/bin/apt-cache policy, returncode: 0",
+    "Checking for new version of ubuntu-advantage-tools",
+    "URL [GET] response: https://contracts.canonical.com/v1/resources,"
+    " headers: {'Content-Type': 'application/json'}, data: {'resources': []}",
+]
+SECRET_MESSAGES = [
+    "URL [POST] response: https://contracts.canonical.com/v1/context/machines"
+    "/token, headers: {'Authorization': 'Bearer SEKRET'}, data:"
+    " {'machineToken': 'SEKRET', 'machineTokenInfo': {}}",
+    "Executed with sys.argv: ['/usr/bin/pro', 'attach', 'SEKRET']",
+]
+
+
+def make_log(size):
+    rng = random.Random(0)
+    lines = []
+    length = 0
+    while length < size:
+        messages = SECRET_MESSAGES if rng.random() < 0.01 else MESSAGES
+        line = json.dumps(
+            [
+                "2023-01-01T00:00:00",
+                "DEBUG",
+                "root",
+                "main",
+                42,
+                rng.choice(messages),
+                {},
+            ]
+        )
+        lines.append(line + "\n")
+        length += len(line) + 1
+    return "".join(lines)
+
+
+def redact_each_pattern(log):
+    for pattern in util.REDACT_SENSITIVE_LOGS:
+        log = re.sub(pattern, r"\g<1><REDACTED>", log)
+    return log
+
+
+def timed(function, *args):
+    start = time.monotonic()
+    result = function(*args)
+    return result, time.monotonic() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=float, default=50, metavar="MB")
+    args = parser.parse_args()
+
+    log = make_log(int(args.size * 1024 * 1024))
+    expected, each_time = timed(redact_each_pattern, log)
+    redacted, redactor_time = timed(util.redact_sensitive_logs, log)
+    lines, lines_time = timed(
+        lambda: "".join(util.redact_sensitive_lines(io.StringIO(log)))
+    )
+    assert expected == redacted == lines
+    print(
+        "{:.0f}MB log: {:.2f}s re.sub per pattern, {:.2f}s redactor,"
+        " {:.2f}s redactor line by line".format(
+            len(log) / 1024 / 1024, each_time, redactor_time, lines_time
+        )
+    )
+    message = MESSAGES[0]
+    count = 100000
+    _, each_time = timed(
+        lambda: [redact_each_pattern(message) for _ in range(count)]
+    )
+    _, redactor_time = timed(
+        lambda: [util.redact_sensitive_logs(message) for _ in range(count)]
+    )
+    print(
+        "log record without secrets: {:.1f}us re.sub per pattern,"
+        " {:.1f}us redactor".format(
+            each_time / count * 1e6, redactor_time / count * 1e6
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Time get_related_usns sequentially and with a few worker counts, against a
+local stub Security API server.
+
+Usage: python3 tools/benchmark-related-usns.py [--notices N] [--latency MS]
+
+The stub server answers every notice request after --latency milliseconds,
+to mimic the round trip to the Security API. The USN being resolved has
+one CVE shared with --notices other USNs, all of which must be fetched.
+"""
+import argparse
+import http.server
+import json
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, ".")
+
+from uaclient import security, util  # noqa: E402
+from uaclient.config import UAConfig  # noqa: E402
+
+USN_ID = "USN-1000-1"
+CVE_ID = "CVE-2020-1000"
+WORKER_COUNTS = (1, 4, 8)
+
+
+def make_notice(notice_id, related_ids):
+    return {
+        "id": notice_id,
+        "title": "Stub notice",
+        "cves_ids": [CVE_ID],
+        "cves": [{"id": CVE_ID, "notices_ids": related_ids}],
+        "release_packages": {},
+    }
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    wbufsize = -1
+    latency = 0.0
+    notices = {}  # type: dict
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        notice_id = self.path.split("?")[0].rsplit("/", 1)[-1]
+        notice = self.notices.get(notice_id[: -len(".json")])
+        if notice is None:
+            self.send_error(404)
+            return
+        body = json.dumps(notice).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def time_related_usns(client, workers):
+    start = time.monotonic()
+    usn = client.get_notice(notice_id=USN_ID)
+    related_usns = security.get_related_usns(usn, client, max_workers=workers)
+    return time.monotonic() - start, len(related_usns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--notices", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=200, metavar="MS")
+    args = parser.parse_args()
+
+    related_ids = [USN_ID] + [
+        "USN-{}-1".format(2000 + i) for i in range(args.notices)
+    ]
+    StubHandler.latency = args.latency / 1000
+    StubHandler.notices = {
+        notice_id: make_notice(notice_id, related_ids)
+        for notice_id in related_ids
+    }
+    server = StubServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    util.get_web_proxies = lambda: {}
+    with tempfile.TemporaryDirectory() as directory:
+        cfg = UAConfig(
+            cfg={
+                "data_dir": directory,
+                "security_url": "http://127.0.0.1:{}".format(
+                    server.server_port
+                ),
+            }
+        )
+        client = security.UASecurityClient(cfg=cfg, use_cache=False)
+        for workers in WORKER_COUNTS:
+            elapsed, num_usns = time_related_usns(client, workers)
+            print(
+                "{} workers: {} related USNs in {:.2f}s".format(
+                    workers, num_usns, elapsed
+                )
+            )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Time filter_security_updates over a synthetic apt cache.
+
+Usage: python3 tools/benchmark-security-updates.py [--packages N] [--runs N]
+
+The cache mimics a typical system: every package has an installed version
+and a couple of older archive versions, one in ten has an update available
+from the security or updates pockets and one in ten is also in the ESM
+cache, where some of them have a newer ESM version.
+"""
+import argparse
+import sys
+import timeit
+
+import mock
+
+sys.path.insert(0, ".")
+
+from uaclient import security_status  # noqa: E402
+from uaclient.apt import version_compare  # noqa: E402
+
+SERIES = "jammy"
+
+
+class Origin:
+    def __init__(self, origin, archive, component="main", site=""):
+        self.origin = origin
+        self.archive = archive
+        self.component = component
+        self.site = site
+
+
+class Version:
+    def __init__(self, version, origins):
+        self.version = version
+        self.origins = origins
+        self.package = None
+        self.size = 1
+
+    def __gt__(self, other):
+        return version_compare(self.version, other.version) > 0
+
+
+class Package:
+    def __init__(self, name, installed, versions):
+        self.name = name
+        self.installed = installed
+        self.is_installed = installed is not None
+        self.versions = sorted(
+            versions,
+            key=lambda version: version.version,
+            reverse=True,
+        )
+        self.candidate = self.versions[0] if self.versions else None
+        for version in versions:
+            version.package = self
+
+
+NOW = Origin("", "now", "now")
+RELEASE = Origin("Ubuntu", SERIES, site="archive.ubuntu.com")
+UPDATES = Origin("Ubuntu", SERIES + "-updates", site="archive.ubuntu.com")
+SECURITY = Origin("Ubuntu", SERIES + "-security", site="security.ubuntu.com")
+ESM_INFRA = Origin(
+    "UbuntuESM", SERIES + "-infra-security", site="esm.ubuntu.com"
+)
+
+
+def build_caches(num_packages):
+    packages = []
+    esm_cache = {}
+    for i in range(num_packages):
+        name = "package-{}".format(i)
+        installed = Version("1.0-1", [NOW, UPDATES])
+        versions = [
+            installed,
+            Version("0.9-1", [RELEASE]),
+            Version("0.9-2", [SECURITY]),
+        ]
+        if i % 10 == 0:
+            versions.append(
+                Version("1.0-2", [SECURITY if i % 20 == 0 else UPDATES])
+            )
+        packages.append(Package(name, installed, versions))
+        if i % 10 == 5:
+            esm_versions = [Version("0.9-1+esm1", [ESM_INFRA])]
+            if i % 20 == 5:
+                esm_versions.append(Version("1.0-1+esm1", [ESM_INFRA]))
+            esm_cache[name] = Package(name, None, esm_versions)
+    return packages, esm_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--packages", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    packages, esm_cache = build_caches(args.packages)
+    with mock.patch.object(
+        security_status, "get_esm_cache", return_value=esm_cache
+    ), mock.patch.object(
+        security_status,
+        "get_platform_info",
+        return_value={"series": SERIES},
+    ):
+        security_status.get_origin_information_to_service_map.cache_clear()
+        updates = security_status.filter_security_updates(packages)
+        elapsed = timeit.timeit(
+            lambda: security_status.filter_security_updates(packages),
+            number=args.runs,
+        )
+
+    print(
+        "{} packages: {:.2f}ms per call ({})".format(
+            args.packages,
+            elapsed / args.runs * 1000,
+            ", ".join(
+                "{} {}".format(len(versions), service)
+                for service, versions in sorted(updates.items())
+            ),
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
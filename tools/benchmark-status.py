@@ -0,0 +1,94 @@
+"""
+Compare the wall-clock time of evaluating service statuses serially and
+concurrently.
+
+Usage:
+  sudo python3 tools/benchmark-status.py [--runs N] [--workers N]
+  python3 tools/benchmark-status.py --synthetic N [--latency MS]
+
+By default the status of every service of the attached machine is
+computed, dropping the status caches before each run. With --synthetic,
+N fake services whose status takes --latency milliseconds, roughly what
+an apt-cache policy or canonical-livepatch call takes, are used instead.
+"""
+import argparse
+import sys
+import time
+
+import mock
+
+sys.path.insert(0, ".")
+
+from uaclient import apt, config, status, util  # noqa: E402
+
+
+def time_attached_status(cfg, workers, runs):
+    cfg.cfg.setdefault("features", {})["status_max_workers"] = workers
+    elapsed = []
+    for _ in range(runs):
+        cfg.delete_cache_key("status-services-cache")
+        apt.invalidate_apt_policy()
+        start = time.monotonic()
+        status.status(cfg=cfg, show_all=True)
+        elapsed.append(time.monotonic() - start)
+    return min(elapsed)
+
+
+def time_synthetic_status(num_services, latency, workers, runs):
+    cfg = config.UAConfig()
+    cfg.cfg.setdefault("features", {})["status_max_workers"] = workers
+    ents = [mock.MagicMock() for _ in range(num_services)]
+
+    def service_status(ent, _inapplicable_resources):
+        time.sleep(latency)
+        return {"name": ent.name}
+
+    elapsed = []
+    with mock.patch.object(
+        status, "_attached_service_status", side_effect=service_status
+    ):
+        for _ in range(runs):
+            start = time.monotonic()
+            status._get_attached_services_status(cfg, ents, {})
+            elapsed.append(time.monotonic() - start)
+    return min(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument(
+        "--workers", type=int, default=status.STATUS_MAX_WORKERS
+    )
+    parser.add_argument("--synthetic", type=int, metavar="N")
+    parser.add_argument("--latency", type=float, default=100, metavar="MS")
+    args = parser.parse_args()
+
+    if args.synthetic:
+        label = "{} synthetic services".format(args.synthetic)
+
+        def run(workers):
+            return time_synthetic_status(
+                args.synthetic, args.latency / 1000, workers, args.runs
+            )
+
+    else:
+        cfg = config.UAConfig()
+        if not cfg.is_attached or not util.we_are_currently_root():
+            sys.exit("Run as root on an attached machine, or use --synthetic")
+        label = "{} services".format(len(status.status(cfg, True)["services"]))
+
+        def run(workers):
+            return time_attached_status(cfg, workers, args.runs)
+
+    serial = run(1)
+    concurrent = run(args.workers)
+    print(
+        "{}: {:.3f}s serially, {:.3f}s with {} threads ({:.1f}x)".format(
+            label, serial, concurrent, args.workers, serial / concurrent
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import glob
+import io
 import logging
 import os
-from typing import List, Optional  # noqa: F401
+import tarfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List, Optional, Set, Tuple  # noqa: F401
 
 from uaclient import (
     clouds,
@@ -25,6 +29,10 @@ from uaclient.files.state_files import timer_jobs_state_file
 
 LOG = logging.getLogger("pro.actions")
 
+# Directory holding everything collect_logs adds to the tarball
+COLLECT_LOGS_DIR = "logs"
+# Maximum number of commands whose output collect_logs captures concurrently
+COLLECT_LOGS_MAX_WORKERS = 8
 
 UA_SERVICES = (
     "ua-timer.service",
@@ -140,16 +148,100 @@ def status(
     return status, ret
 
 
-def _write_command_output_to_file(
-    cmd, filename: str, return_codes: Optional[List[int]] = None
-) -> None:
-    """Helper which runs a command and writes output or error to filename."""
+def _get_command_output(
+    cmd: str, return_codes: Optional[List[int]] = None
+) -> Tuple[bool, str]:
+    """Run cmd, returning whether it failed and its output or error."""
     try:
         out, _ = system.subp(cmd.split(), rcs=return_codes)
     except exceptions.ProcessExecutionError as e:
-        system.write_file("{}-error".format(filename), str(e))
-    else:
-        system.write_file(filename, out)
+        return True, str(e)
+    return False, out
+
+
+def _new_tar_member(name: str, size: int) -> tarfile.TarInfo:
+    member = tarfile.TarInfo(name)
+    member.size = size
+    member.mode = 0o644
+    member.mtime = int(time.time())
+    return member
+
+
+def _iter_redacted_log(filename: str, size: int) -> Iterator[bytes]:
+    """Yield the first size bytes of filename redacted, in blocks of lines.
+
+    Logs are only ever appended to, so reading no further than a size taken
+    once gives the same content on every pass.
+    """
+    with open(filename, "rb") as stream:
+        remaining = size
+        pending = b""
+        while remaining > 0:
+            data = stream.read(min(util.REDACT_BLOCK_SIZE, remaining))
+            if not data:
+                break
+            remaining -= len(data)
+            block = pending + data
+            # Cut blocks after a newline, which never splits a character
+            end = block.rfind(b"\n") + 1
+            pending = block[end:]
+            if end:
+                yield util.redact_sensitive_logs(
+                    block[:end].decode("utf-8")
+                ).encode("utf-8")
+        if pending:
+            yield util.redact_sensitive_logs(pending.decode("utf-8")).encode(
+                "utf-8"
+            )
+
+
+class _ChunksReader:
+    """Read exactly size bytes from an iterator of chunks, for tarfile.
+
+    The member header is written first, so a source which shrank between
+    reads is padded with newlines, and one which grew is cut.
+    """
+
+    def __init__(self, chunks: Iterator[bytes], size: int) -> None:
+        self._chunks = chunks
+        self._remaining = size
+        self._buffer = b""
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self._remaining
+        while len(self._buffer) < size:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._buffer += b"\n" * (size - len(self._buffer))
+                break
+            self._buffer += chunk
+        data = self._buffer[: min(size, self._remaining)]
+        self._buffer = self._buffer[len(data) :]
+        self._remaining -= len(data)
+        return data
+
+
+def _add_redacted_log(tar: tarfile.TarFile, filename: str, name: str) -> None:
+    """Stream filename through the log redactor into the name member."""
+    if util.we_are_currently_root():
+        # if root, overwrite the original with redacted content
+        with open(filename, encoding="utf-8") as stream:
+            system.write_lines(filename, util.redact_sensitive_lines(stream))
+        with open(filename, "rb") as stream:
+            size = os.fstat(stream.fileno()).st_size
+            tar.addfile(_new_tar_member(name, size), stream)
+        return
+    size = os.stat(filename).st_size
+    # The first pass sizes the member and finds undecodable content before
+    # anything is written to the tarball
+    redacted_size = sum(
+        len(chunk) for chunk in _iter_redacted_log(filename, size)
+    )
+    tar.addfile(
+        _new_tar_member(name, redacted_size),
+        _ChunksReader(_iter_redacted_log(filename, size), redacted_size),
+    )
 
 
 def _get_state_files(cfg: config.UAConfig):
@@ -169,65 +261,87 @@ def _get_state_files(cfg: config.UAConfig):
     ]
 
 
-def collect_logs(cfg: config.UAConfig, output_dir: str):
+def collect_logs(cfg: config.UAConfig, output_file: str):
     """
-    Write all relevant Ubuntu Pro logs to the specified directory
+    Write all relevant Ubuntu Pro logs to a gzipped tarball at output_file
+
+    Log files are redacted into the tarball as they are read, and the
+    commands whose output is collected run concurrently.
     """
-    _write_command_output_to_file(
-        "cloud-id", "{}/cloud-id.txt".format(output_dir)
-    )
-    _write_command_output_to_file(
-        "pro status --format json", "{}/ua-status.json".format(output_dir)
-    )
-    _write_command_output_to_file(
-        "{} status".format(livepatch.LIVEPATCH_CMD),
-        "{}/livepatch-status.txt".format(output_dir),
-    )
-    _write_command_output_to_file(
-        "systemctl list-timers --all",
-        "{}/systemd-timers.txt".format(output_dir),
-    )
-    _write_command_output_to_file(
+    commands = [
+        ("cloud-id", "cloud-id.txt", None),
+        ("pro status --format json", "ua-status.json", None),
         (
-            "journalctl --boot=0 -o short-precise "
-            "{} "
-            "-u cloud-init-local.service "
-            "-u cloud-init-config.service -u cloud-config.service"
-        ).format(
-            " ".join(
-                ["-u {}".format(s) for s in UA_SERVICES if ".service" in s]
-            )
+            "{} status".format(livepatch.LIVEPATCH_CMD),
+            "livepatch-status.txt",
+            None,
         ),
-        "{}/journalctl.txt".format(output_dir),
-    )
-
+        ("systemctl list-timers --all", "systemd-timers.txt", None),
+        (
+            (
+                "journalctl --boot=0 -o short-precise "
+                "{} "
+                "-u cloud-init-local.service "
+                "-u cloud-init-config.service -u cloud-config.service"
+            ).format(
+                " ".join(
+                    ["-u {}".format(s) for s in UA_SERVICES if ".service" in s]
+                )
+            ),
+            "journalctl.txt",
+            None,
+        ),
+    ]  # type: List[Tuple[str, str, Optional[List[int]]]]
     for service in UA_SERVICES:
-        _write_command_output_to_file(
-            "systemctl status {}".format(service),
-            "{}/{}.txt".format(output_dir, service),
-            return_codes=[0, 3],
+        commands.append(
+            (
+                "systemctl status {}".format(service),
+                "{}.txt".format(service),
+                [0, 3],
+            )
         )
 
-    state_files = _get_state_files(cfg)
-
-    # also get default logrotated log files
-    for f in state_files + glob.glob(DEFAULT_LOG_PREFIX + "*"):
-        if os.path.isfile(f):
-            try:
-                content = system.load_file(f)
-            except Exception as e:
-                # If we fail to load that file for any reason we will
-                # not break the command, we will instead warn the user
-                # about the issue and try to process the other files
-                logging.warning("Failed to load file: %s\n%s", f, str(e))
-                continue
-            content = util.redact_sensitive_logs(content)
-            if util.we_are_currently_root():
-                # if root, overwrite the original with redacted content
-                system.write_file(f, content)
-            system.write_file(
-                os.path.join(output_dir, os.path.basename(f)), content
+    with tarfile.open(output_file, "w:gz") as tar:
+        logs_dir = tarfile.TarInfo(COLLECT_LOGS_DIR)
+        logs_dir.type = tarfile.DIRTYPE
+        logs_dir.mode = 0o755
+        logs_dir.mtime = int(time.time())
+        tar.addfile(logs_dir)
+
+        with ThreadPoolExecutor(
+            max_workers=COLLECT_LOGS_MAX_WORKERS
+        ) as executor:
+            outputs = executor.map(
+                lambda command: _get_command_output(command[0], command[2]),
+                commands,
             )
+            for (_, name, _), (failed, output) in zip(commands, outputs):
+                if failed:
+                    name = "{}-error".format(name)
+                content = output.encode("utf-8")
+                tar.addfile(
+                    _new_tar_member(
+                        "{}/{}".format(COLLECT_LOGS_DIR, name), len(content)
+                    ),
+                    io.BytesIO(content),
+                )
+
+        state_files = _get_state_files(cfg)
+        added = set()  # type: Set[str]
+
+        # also get default logrotated log files
+        for f in state_files + glob.glob(DEFAULT_LOG_PREFIX + "*"):
+            name = "{}/{}".format(COLLECT_LOGS_DIR, os.path.basename(f))
+            if os.path.isfile(f) and name not in added:
+                try:
+                    _add_redacted_log(tar, f, name)
+                except Exception as e:
+                    # If we fail to load that file for any reason we will
+                    # not break the command, we will instead warn the user
+                    # about the issue and try to process the other files
+                    logging.warning("Failed to load file: %s\n%s", f, str(e))
+                    continue
+                added.add(name)
 
 
 def get_cloud_instance(
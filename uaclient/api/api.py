@@ -1,5 +1,6 @@
+from functools import lru_cache
 from importlib import import_module
-from typing import Callable, List
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
 
 from uaclient.api.data_types import APIData, APIResponse, ErrorWarningObject
 from uaclient.api.errors import APIError, error_out
@@ -7,6 +8,7 @@ from uaclient.config import UAConfig
 from uaclient.data_types import IncorrectFieldTypeError
 from uaclient.messages import (
     API_BAD_ARGS_FORMAT,
+    API_BATCH_INVALID_REQUEST,
     API_INVALID_ENDPOINT,
     API_MISSING_ARG,
     API_NO_ARG_FOR_ENDPOINT,
@@ -33,10 +35,34 @@ VALID_ENDPOINTS = [
 
 
 def call_api(
-    endpoint_path: str, options: List[str], cfg: UAConfig
+    endpoint_path: str,
+    options: List[str],
+    cfg: UAConfig,
+    new_version_check: Optional[Callable[[], Optional[str]]] = None,
 ) -> APIResponse:
+    """Call the endpoint with options formatted as key=value.
+
+    :param new_version_check: what to call for the available client version
+        to warn about, check_for_new_version by default.
+    """
+    return _call_api(endpoint_path, options, cfg, new_version_check)
+
+
+def _call_api(
+    endpoint_path: str,
+    options: Union[List[str], Dict[str, Any]],
+    cfg: UAConfig,
+    new_version_check: Optional[Callable[[], Optional[str]]] = None,
+) -> APIResponse:
+    """Call the endpoint with key=value options, or a dict of options."""
+    if new_version_check is None:
+        new_version_check = check_for_new_version
+
+    def fail(exception: Exception) -> APIResponse:
+        return error_out(exception, new_version_check)
+
     if endpoint_path not in VALID_ENDPOINTS:
-        return error_out(
+        return fail(
             APIError(
                 msg=API_INVALID_ENDPOINT.format(endpoint=endpoint_path).msg,
                 msg_code=API_INVALID_ENDPOINT.name,
@@ -49,14 +75,17 @@ def call_api(
     option_warnings = []
 
     if endpoint.options_cls:
-        kwargs = {}
+        kwargs = {}  # type: Dict[str, Any]
         fields = [f.key for f in endpoint.options_cls.fields]
 
+        if isinstance(options, dict):
+            kwargs = options
+            options = []
         for option in options:
             try:
                 k, v = option.split("=")
             except ValueError:
-                return error_out(
+                return fail(
                     APIError(
                         msg=API_BAD_ARGS_FORMAT.format(arg=option).msg,
                         msg_code=API_BAD_ARGS_FORMAT.name,
@@ -64,13 +93,16 @@ def call_api(
                 )
 
             if not k or not v:
-                return error_out(
+                return fail(
                     APIError(
                         msg=API_BAD_ARGS_FORMAT.format(arg=option).msg,
                         msg_code=API_BAD_ARGS_FORMAT.name,
                     )
                 )
 
+            kwargs[k] = v
+
+        for k in kwargs:
             if k not in fields:
                 option_warnings.append(
                     ErrorWarningObject(
@@ -80,12 +112,10 @@ def call_api(
                     )
                 )
 
-            kwargs[k] = v
-
         try:
             options = endpoint.options_cls.from_dict(kwargs)
         except IncorrectFieldTypeError as e:
-            return error_out(
+            return fail(
                 APIError(
                     msg=API_MISSING_ARG.format(
                         arg=e.key, endpoint=endpoint_path
@@ -97,11 +127,11 @@ def call_api(
         try:
             result = endpoint.fn(options, cfg)
         except Exception as e:
-            return error_out(e)
+            return fail(e)
 
     else:
         if options:
-            return error_out(
+            return fail(
                 APIError(
                     msg=API_NO_ARG_FOR_ENDPOINT.format(
                         endpoint=endpoint_path
@@ -112,9 +142,9 @@ def call_api(
         try:
             result = endpoint.fn(cfg)
         except Exception as e:
-            return error_out(e)
+            return fail(e)
 
-    new_version = check_for_new_version()
+    new_version = new_version_check()
     if new_version:
         option_warnings.append(
             ErrorWarningObject(
@@ -137,6 +167,63 @@ def call_api(
     )
 
 
+def _get_batch_options(
+    request: Any,
+) -> Optional[Union[List[str], Dict[str, Any]]]:
+    """Return the options of a batch request, None if invalid.
+
+    Options given as an object are passed to the endpoint as they are,
+    keeping their JSON types, while a list holds key=value strings.
+    """
+    if not isinstance(request, dict) or not isinstance(
+        request.get("endpoint"), str
+    ):
+        return None
+    args = request.get("args", [])
+    if isinstance(args, dict):
+        return args
+    if isinstance(args, list) and all(isinstance(arg, str) for arg in args):
+        return args
+    return None
+
+
+def call_api_request(
+    request: Any,
+    index: int,
+    cfg: UAConfig,
+    new_version_check: Optional[Callable[[], Optional[str]]] = None,
+) -> APIResponse:
+    """Call the endpoint of a batch request.
+
+    The request is an object with an "endpoint" and optional "args", either
+    a list of key=value strings, as given to --args, or an object. index
+    identifies the request in the error for an invalid one.
+    """
+    options = _get_batch_options(request)
+    if options is None:
+        return error_out(
+            APIError(
+                msg=API_BATCH_INVALID_REQUEST.format(index=index).msg,
+                msg_code=API_BATCH_INVALID_REQUEST.name,
+            ),
+            new_version_check,
+        )
+    return _call_api(request["endpoint"], options, cfg, new_version_check)
+
+
+def call_api_batch(
+    requests: List[Any], cfg: UAConfig
+) -> Iterator[APIResponse]:
+    """Call the endpoint of each request in turn, yielding its response.
+
+    The calls share cfg and the caches of this process, and the check for a
+    new version of the client only runs once.
+    """
+    new_version_check = lru_cache(maxsize=None)(check_for_new_version)
+    for index, request in enumerate(requests):
+        yield call_api_request(request, index, cfg, new_version_check)
+
+
 class APIEndpoint:
     def __init__(
         self,
@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Callable, Dict, Optional
 
 from uaclient.api.data_types import APIResponse, ErrorWarningObject
 from uaclient.exceptions import UserFacingError
@@ -7,7 +7,10 @@ from uaclient.util import get_pro_environment
 from uaclient.version import check_for_new_version
 
 
-def error_out(exception: Exception) -> APIResponse:
+def error_out(
+    exception: Exception,
+    new_version_check: Optional[Callable[[], Optional[str]]] = None,
+) -> APIResponse:
     if isinstance(exception, (UserFacingError, APIError)):
         error = ErrorWarningObject(
             title=exception.msg,
@@ -23,7 +26,9 @@ def error_out(exception: Exception) -> APIResponse:
         )
 
     warnings = []
-    new_version = check_for_new_version()
+    if new_version_check is None:
+        new_version_check = check_for_new_version
+    new_version = new_version_check()
     if new_version:
         warnings.append(
             ErrorWarningObject(
@@ -0,0 +1,213 @@
+"""
+Serve the Pro API over a Unix socket from a long-running process.
+
+Every `pro api` call starts Python, imports the client and reads the
+machine token, the status caches and the apt caches again. APIServer
+answers the same requests from one process, which keeps all of those warm
+and drops each of them when the files it was read from change.
+
+Clients send one JSON request per line, an object with an "endpoint" and
+optional "args" as in `pro api --batch`, and get back one line with the
+`pro api` JSON response for each.
+"""
+import json
+import logging
+import os
+import socket
+import socketserver
+import stat
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from uaclient import apt, security_status, system
+from uaclient.api.api import call_api_request
+from uaclient.api.data_types import APIResponse
+from uaclient.api.errors import APIError, error_out
+from uaclient.config import UAConfig
+from uaclient.defaults import UAC_RUN_PATH
+from uaclient.messages import API_SERVER_INVALID_JSON
+from uaclient.version import check_for_new_version
+
+LOG = logging.getLogger(__name__)
+
+API_SOCKET_PATH = UAC_RUN_PATH + "api.sock"
+# Seconds a client may stay silent before the server drops its connection
+CONNECTION_TIMEOUT = 30.0
+
+
+class WarmCaches:
+    """The state the server keeps between requests.
+
+    Before each request, the files each cache was read from are
+    fingerprinted again, and the caches whose files changed are dropped.
+    """
+
+    def __init__(self, cfg_factory: Callable[[], UAConfig] = UAConfig):
+        self._cfg_factory = cfg_factory
+        self._cfg = None  # type: Optional[UAConfig]
+        self._fingerprints = {}  # type: Dict[str, Any]
+        self.new_version_check = lru_cache(maxsize=None)(check_for_new_version)
+
+    def _fingerprint(self, cfg: UAConfig) -> Dict[str, Any]:
+        token_file = cfg.machine_token_file
+        pro_paths = [
+            token_file.private_file.path,
+            token_file.public_file.path,
+        ]
+        if token_file.machine_token_overlay_path:
+            pro_paths.append(token_file.machine_token_overlay_path)
+        if cfg.cfg_path:
+            pro_paths.append(cfg.cfg_path)
+        return {
+            "apt": security_status.get_apt_cache_snapshot_fingerprint(),
+            "pro": system.get_paths_fingerprint(pro_paths),
+        }
+
+    def _invalidate_apt(self) -> None:
+        apt.invalidate_apt_policy()
+        security_status.invalidate_apt_cache_snapshot()
+        self.new_version_check.cache_clear()
+
+    def refresh(self) -> UAConfig:
+        """Drop the caches whose files changed, returning the config to use."""
+        if self._cfg is None:
+            self._cfg = self._cfg_factory()
+        fingerprints = self._fingerprint(self._cfg)
+        changed = [
+            name
+            for name, fingerprint in sorted(fingerprints.items())
+            if name in self._fingerprints
+            and self._fingerprints[name] != fingerprint
+        ]
+        if changed:
+            LOG.debug("Dropping caches of changed inputs: %s", changed)
+        if "apt" in changed:
+            self._invalidate_apt()
+        if "pro" in changed:
+            # The machine token and config are read again by a new config
+            self._cfg = self._cfg_factory()
+            fingerprints = self._fingerprint(self._cfg)
+        self._fingerprints = fingerprints
+        return self._cfg
+
+
+class APIRequestHandler(socketserver.StreamRequestHandler):
+    timeout = CONNECTION_TIMEOUT
+
+    def handle(self) -> None:
+        try:
+            for index, line in enumerate(self.rfile):
+                if not line.strip():
+                    continue
+                response = self.server.handle_line(line, index)  # type: ignore
+                self.wfile.write(response.to_json().encode("utf-8") + b"\n")
+        except OSError as e:
+            LOG.debug("API client connection ended: %r", e)
+
+
+class APIServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Answer API requests on socket_path, readable by its owner only.
+
+    Each connection is served by its own thread, but requests are answered
+    one at a time: the endpoints share the server's caches and the global
+    apt configuration.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        socket_path: str = API_SOCKET_PATH,
+        caches: Optional[WarmCaches] = None,
+    ) -> None:
+        self.caches = caches or WarmCaches()
+        self._request_lock = threading.Lock()
+        os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+        try:
+            if stat.S_ISSOCK(os.lstat(socket_path).st_mode):
+                # Left behind by a server that did not exit cleanly
+                os.unlink(socket_path)
+        except FileNotFoundError:
+            pass
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(socket_path, APIRequestHandler)
+        finally:
+            os.umask(old_umask)
+
+    def handle_line(self, line: bytes, index: int) -> APIResponse:
+        with self._request_lock:
+            return self._handle_line(line, index)
+
+    def _handle_line(self, line: bytes, index: int) -> APIResponse:
+        try:
+            request = json.loads(line.decode("utf-8"))
+        except ValueError as e:
+            return error_out(
+                APIError(
+                    msg=API_SERVER_INVALID_JSON.format(
+                        index=index, error=str(e)
+                    ).msg,
+                    msg_code=API_SERVER_INVALID_JSON.name,
+                ),
+                self.caches.new_version_check,
+            )
+        try:
+            cfg = self.caches.refresh()
+        except Exception as e:
+            # Such as an invalid uaclient.conf
+            return error_out(e, self.caches.new_version_check)
+        return call_api_request(
+            request, index, cfg, self.caches.new_version_check
+        )
+
+    def handle_error(self, request, client_address) -> None:
+        LOG.exception("Error while serving an API request")
+
+    def server_close(self) -> None:
+        super().server_close()
+        system.ensure_file_absent(self.server_address)  # type: ignore
+
+
+def serve(socket_path: str = API_SOCKET_PATH) -> None:
+    server = APIServer(socket_path)
+    LOG.info("Serving API requests on %s", socket_path)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def call_api_server(
+    requests: List[Any],
+    socket_path: str = API_SOCKET_PATH,
+    timeout: float = CONNECTION_TIMEOUT,
+) -> List[Dict[str, Any]]:
+    """Send requests to the server on socket_path, returning its responses.
+
+    Each request is an object with an "endpoint" and optional "args", and
+    each response the parsed JSON output `pro api` gives for it.
+
+    :raises OSError: when the server can't be reached or closes the
+        connection before answering.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        stream = sock.makefile("rwb")
+        responses = []
+        for request in requests:
+            stream.write(json.dumps(request).encode("utf-8") + b"\n")
+            stream.flush()
+            line = stream.readline()
+            if not line:
+                raise ConnectionResetError(
+                    "The API server closed the connection"
+                )
+            responses.append(json.loads(line.decode("utf-8")))
+        stream.close()
+        return responses
+    finally:
+        sock.close()
@@ -1,13 +1,14 @@
 import mock
 import pytest
 
-from uaclient.api.api import call_api
+from uaclient.api.api import call_api, call_api_batch
 from uaclient.api.data_types import APIResponse, ErrorWarningObject
 from uaclient.api.errors import APIError, error_out
 from uaclient.data_types import IncorrectFieldTypeError
 from uaclient.exceptions import UserFacingError
 from uaclient.messages import (
     API_BAD_ARGS_FORMAT,
+    API_BATCH_INVALID_REQUEST,
     API_INVALID_ENDPOINT,
     API_MISSING_ARG,
     API_NO_ARG_FOR_ENDPOINT,
@@ -308,3 +309,109 @@ class TestAPICall:
         )
         assert warning.code == WARN_NEW_VERSION_AVAILABLE.name
         assert warning.meta == {}
+
+
+@mock.patch("uaclient.api.errors.get_pro_environment", return_value={})
+@mock.patch("uaclient.api.api.check_for_new_version", return_value="1.2.3")
+@mock.patch("uaclient.api.api.import_module")
+class TestAPICallBatch:
+    def test_calls_each_endpoint(
+        self, m_import_module, m_new_version, _m_environment, FakeConfig
+    ):
+        mock_endpoint = mock.MagicMock()
+        mock_endpoint.fn.return_value.warnings = []
+        mock_endpoint.options_cls.fields = [mock.MagicMock(key="key")]
+        m_import_module.return_value.endpoint = mock_endpoint
+        cfg = FakeConfig()
+
+        with mock.patch(
+            "uaclient.api.api.VALID_ENDPOINTS", ["example_endpoint"]
+        ):
+            results = list(
+                call_api_batch(
+                    [
+                        {"endpoint": "example_endpoint"},
+                        {"endpoint": "example_endpoint", "args": {"key": 1}},
+                        {"endpoint": "example_endpoint", "args": ["key=2"]},
+                        {"endpoint": "invalid_endpoint"},
+                    ],
+                    cfg,
+                )
+            )
+
+        assert ["success"] * 3 + ["failure"] == [
+            result.result for result in results
+        ]
+        assert [
+            mock.call({}),
+            mock.call({"key": 1}),
+            mock.call({"key": "2"}),
+        ] == mock_endpoint.options_cls.from_dict.call_args_list
+        assert (
+            3
+            * [
+                mock.call(
+                    mock_endpoint.options_cls.from_dict.return_value, cfg
+                )
+            ]
+            == mock_endpoint.fn.call_args_list
+        )
+        for result in results:
+            assert [WARN_NEW_VERSION_AVAILABLE.name] == [
+                warning.code for warning in result.warnings
+            ]
+        # The calls share a single check for a new version
+        assert 1 == m_new_version.call_count
+
+    def test_object_args_are_passed_as_they_are(
+        self, m_import_module, _m_new_version, _m_environment, FakeConfig
+    ):
+        mock_endpoint = mock.MagicMock()
+        mock_endpoint.fn.return_value.warnings = []
+        mock_endpoint.options_cls.fields = [
+            mock.MagicMock(key="magic_token"),
+            mock.MagicMock(key="flag"),
+        ]
+        m_import_module.return_value.endpoint = mock_endpoint
+        args = {"magic_token": "abc==", "flag": True, "unknown": None}
+
+        with mock.patch(
+            "uaclient.api.api.VALID_ENDPOINTS", ["example_endpoint"]
+        ):
+            [result] = call_api_batch(
+                [{"endpoint": "example_endpoint", "args": args}], FakeConfig()
+            )
+
+        assert "success" == result.result
+        assert [
+            mock.call({"magic_token": "abc==", "flag": True, "unknown": None})
+        ] == mock_endpoint.options_cls.from_dict.call_args_list
+        assert [API_UNKNOWN_ARG.name, WARN_NEW_VERSION_AVAILABLE.name] == [
+            warning.code for warning in result.warnings
+        ]
+
+    @pytest.mark.parametrize(
+        "request_",
+        (
+            "u.pro.version.v1",
+            {"args": []},
+            {"endpoint": 1},
+            {"endpoint": "u.pro.version.v1", "args": "key=value"},
+            {"endpoint": "u.pro.version.v1", "args": [1]},
+        ),
+    )
+    def test_invalid_requests(
+        self,
+        m_import_module,
+        _m_new_version,
+        _m_environment,
+        request_,
+        FakeConfig,
+    ):
+        [result] = call_api_batch([request_], FakeConfig())
+
+        assert "failure" == result.result
+        [error] = result.errors
+        assert API_BATCH_INVALID_REQUEST.format(index=0).msg == error.title
+        assert API_BATCH_INVALID_REQUEST.name == error.code
+        assert 0 == m_import_module.call_count
@@ -0,0 +1,199 @@
+import os
+import socket
+import stat
+import threading
+
+import mock
+import pytest
+
+from uaclient import exceptions
+from uaclient.api.server import APIServer, WarmCaches, call_api_server
+from uaclient.messages import (
+    API_BATCH_INVALID_REQUEST,
+    API_INVALID_ENDPOINT,
+    API_SERVER_INVALID_JSON,
+    WARN_NEW_VERSION_AVAILABLE,
+)
+
+M_PATH = "uaclient.api.server."
+
+
+@pytest.fixture
+def m_new_version():
+    with mock.patch(
+        M_PATH + "check_for_new_version", return_value="29.0"
+    ) as m_new_version:
+        yield m_new_version
+
+
+@pytest.fixture
+def m_apt_fingerprint():
+    with mock.patch(
+        M_PATH + "security_status.get_apt_cache_snapshot_fingerprint",
+        return_value=[["/var/lib/dpkg/status", 1, 1]],
+    ) as m_apt_fingerprint:
+        yield m_apt_fingerprint
+
+
+@pytest.fixture
+def caches(FakeConfig, m_new_version, m_apt_fingerprint):
+    return WarmCaches(cfg_factory=FakeConfig)
+
+
+@pytest.fixture
+def api_server(tmpdir, caches):
+    server = APIServer(tmpdir.join("api.sock").strpath, caches=caches)
+    thread = threading.Thread(
+        target=server.serve_forever, args=(0.05,), daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestAPIServer:
+    @mock.patch(
+        "uaclient.api.u.pro.version.v1.get_version", return_value="28.0"
+    )
+    def test_answers_each_request(
+        self, _m_get_version, m_new_version, api_server
+    ):
+        responses = call_api_server(
+            [
+                {"endpoint": "u.pro.version.v1"},
+                {"endpoint": "invalid_endpoint"},
+                {"endpoint": "u.pro.version.v1", "args": []},
+            ],
+            socket_path=api_server.server_address,
+        )
+
+        assert ["success", "failure", "success"] == [
+            response["result"] for response in responses
+        ]
+        assert {"installed_version": "28.0"} == responses[0]["data"][
+            "attributes"
+        ]
+        assert [API_INVALID_ENDPOINT.name] == [
+            error["code"] for error in responses[1]["errors"]
+        ]
+        assert 3 * [[WARN_NEW_VERSION_AVAILABLE.name]] == [
+            [warning["code"] for warning in response["warnings"]]
+            for response in responses
+        ]
+        # The check for a new version is kept between requests
+        assert 1 == m_new_version.call_count
+
+    def test_invalid_requests(self, api_server):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(api_server.server_address)
+        with sock, sock.makefile("rwb") as stream:
+            stream.write(b"not json\n\n" + b'"not an object"\n')
+            stream.flush()
+            sock.shutdown(socket.SHUT_WR)
+            lines = stream.readlines()
+
+        assert 2 == len(lines)
+        assert b"Request 0 is not valid JSON" in lines[0]
+        assert API_SERVER_INVALID_JSON.name.encode("utf-8") in lines[0]
+        assert API_BATCH_INVALID_REQUEST.name.encode("utf-8") in lines[1]
+
+    @mock.patch(
+        "uaclient.api.u.pro.version.v1.get_version", return_value="28.0"
+    )
+    def test_open_connections_do_not_block_other_clients(
+        self, _m_get_version, api_server
+    ):
+        idle = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        with idle:
+            idle.connect(api_server.server_address)
+            idle.sendall(b'{"endpoint": "u.pro.version.v1"}\n')
+
+            [response] = call_api_server(
+                [{"endpoint": "u.pro.version.v1"}],
+                socket_path=api_server.server_address,
+                timeout=5,
+            )
+
+        assert "success" == response["result"]
+
+    def test_config_errors_are_api_failures(self, api_server):
+        with mock.patch.object(
+            api_server.caches,
+            "refresh",
+            side_effect=exceptions.UserFacingError(
+                "Invalid config", msg_code="invalid-config"
+            ),
+        ):
+            [response] = call_api_server(
+                [{"endpoint": "u.pro.version.v1"}],
+                socket_path=api_server.server_address,
+            )
+
+        assert "failure" == response["result"]
+        assert [("Invalid config", "invalid-config")] == [
+            (error["title"], error["code"]) for error in response["errors"]
+        ]
+
+    def test_socket_is_only_usable_by_its_owner(self, api_server):
+        mode = os.stat(api_server.server_address).st_mode
+
+        assert stat.S_ISSOCK(mode)
+        assert 0o600 == stat.S_IMODE(mode)
+
+    def test_replaces_stale_socket_and_removes_it_on_close(
+        self, tmpdir, caches
+    ):
+        socket_path = tmpdir.join("api.sock").strpath
+        APIServer(socket_path, caches=caches).socket.close()
+        assert os.path.exists(socket_path)
+
+        server = APIServer(socket_path, caches=caches)
+        server.server_close()
+
+        assert not os.path.exists(socket_path)
+
+
+@mock.patch(M_PATH + "security_status.invalidate_apt_cache_snapshot")
+@mock.patch(M_PATH + "apt.invalidate_apt_policy")
+class TestWarmCaches:
+    def test_keeps_caches_of_unchanged_files(
+        self, m_invalidate_policy, _m_invalidate_snapshot, caches
+    ):
+        cfg = caches.refresh()
+        caches.new_version_check()
+
+        assert cfg is caches.refresh()
+        assert "29.0" == caches.new_version_check()
+        assert 0 == m_invalidate_policy.call_count
+
+    def test_drops_apt_caches_when_apt_files_change(
+        self,
+        m_invalidate_policy,
+        m_invalidate_snapshot,
+        caches,
+        m_apt_fingerprint,
+        m_new_version,
+    ):
+        cfg = caches.refresh()
+        caches.new_version_check()
+        m_apt_fingerprint.return_value = [["/var/lib/dpkg/status", 2, 1]]
+
+        assert cfg is caches.refresh()
+        caches.new_version_check()
+        assert 2 == m_new_version.call_count
+        assert 1 == m_invalidate_policy.call_count
+        assert 1 == m_invalidate_snapshot.call_count
+
+    def test_reads_the_machine_token_again_when_it_changes(
+        self, m_invalidate_policy, _m_invalidate_snapshot, caches
+    ):
+        cfg = caches.refresh()
+        cfg.machine_token_file.write({"machineToken": "token"})
+
+        new_cfg = caches.refresh()
+
+        assert new_cfg is not cfg
+        assert {"machineToken": "token"} == new_cfg.machine_token
+        assert new_cfg is caches.refresh()
+        assert 0 == m_invalidate_policy.call_count
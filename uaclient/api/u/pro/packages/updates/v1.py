@@ -12,8 +12,7 @@ from uaclient.data_types import (
 )
 from uaclient.security_status import (
     create_updates_list,
-    filter_security_updates,
-    get_installed_packages_by_origin,
+    get_apt_cache_snapshot,
     get_ua_info,
 )
 
@@ -86,8 +85,7 @@ def updates() -> PackageUpdatesResult:
 
 def _updates(cfg: UAConfig) -> PackageUpdatesResult:
     ua_info = get_ua_info(cfg)
-    packages = get_installed_packages_by_origin()
-    upgradable_versions = filter_security_updates(packages["all"])
+    upgradable_versions = get_apt_cache_snapshot().security_updates()
     update_list = create_updates_list(upgradable_versions, ua_info)
 
     num_esm_apps_updates = len(upgradable_versions["esm-apps"])
@@ -1,15 +1,25 @@
-import copy
+import bisect
 import datetime
 import enum
 import glob
+import itertools
 import logging
 import os
 import re
 import subprocess
 import sys
 import tempfile
+import threading
 from functools import lru_cache
-from typing import Dict, Iterable, List, NamedTuple, Optional, Union
+from typing import (
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import apt  # type: ignore
 import apt_pkg  # type: ignore
@@ -37,6 +47,11 @@ CA_CERTIFICATES_FILE = "/usr/sbin/update-ca-certificates"
 APT_PROXY_CONF_FILE = "/etc/apt/apt.conf.d/90ubuntu-advantage-aptproxy"
 
 APT_UPDATE_SUCCESS_STAMP_PATH = "/var/lib/apt/periodic/update-success-stamp"
+DPKG_STATUS_FILE = "/var/lib/dpkg/status"
+APT_LISTS_DIR = "/var/lib/apt/lists"
+APT_SOURCES_LIST = "/etc/apt/sources.list"
+APT_SOURCES_LIST_DIR = "/etc/apt/sources.list.d"
+APT_PREFERENCES_DIR = "/etc/apt/preferences.d"
 
 
 ESM_REPO_FILE_CONTENT = """\
@@ -68,6 +83,26 @@ InstalledAptPackages = NamedTuple(
     "InstalledAptPackages", [("name", str), ("version", str), ("arch", str)]
 )
 
+DpkgPackage = NamedTuple(
+    "DpkgPackage",
+    [
+        ("name", str),
+        ("source", str),
+        ("version", str),
+        ("arch", str),
+        ("status", str),
+    ],
+)
+
+DpkgStatusIndex = NamedTuple(
+    "DpkgStatusIndex",
+    [
+        ("packages", List[DpkgPackage]),
+        # source package -> binary package -> installed version
+        ("source_packages", Dict[str, Dict[str, str]]),
+    ],
+)
+
 
 def assert_valid_apt_credentials(repo_url, username, password):
     """Validate apt credentials for a PPA.
@@ -205,14 +240,105 @@ def run_apt_command(
     return out
 
 
-@lru_cache(maxsize=None)
-def get_apt_cache_policy(
-    error_msg: Optional[str] = None,
-    env: Optional[Dict[str, str]] = {},
-) -> str:
-    return run_apt_command(
-        cmd=["apt-cache", "policy"], error_msg=error_msg, env=env
-    )
+AptPolicySource = NamedTuple(
+    "AptPolicySource",
+    [
+        ("priority", int),
+        ("url", str),
+        ("origin", str),
+        ("archive", str),
+    ],
+)
+
+_POLICY_SOURCE_RE = re.compile(r"^\s*(?P<priority>-?\d+)\s+(?P<url>\S+)")
+_POLICY_RELEASE_RE = re.compile(r"^\s+release\s+(?P<fields>\S+)")
+
+
+def _parse_apt_policy_sources(output: str) -> Iterable[AptPolicySource]:
+    priority = None  # type: Optional[int]
+    url = ""
+    release = {}  # type: Dict[str, str]
+    for line in output.splitlines():
+        if line.startswith("Pinned packages:"):
+            break
+        release_match = _POLICY_RELEASE_RE.match(line)
+        if release_match:
+            release = dict(
+                field.split("=", 1)
+                for field in release_match.group("fields").split(",")
+                if "=" in field
+            )
+            continue
+        source_match = _POLICY_SOURCE_RE.match(line)
+        if not source_match:
+            continue
+        if priority is not None:
+            yield AptPolicySource(
+                priority, url, release.get("o", ""), release.get("a", "")
+            )
+        priority = int(source_match.group("priority"))
+        url = source_match.group("url")
+        release = {}
+    if priority is not None:
+        yield AptPolicySource(
+            priority, url, release.get("o", ""), release.get("a", "")
+        )
+
+
+class AptPolicy:
+    """Package files listed by apt-cache policy, indexed by their URL."""
+
+    def __init__(self, sources: List[AptPolicySource]) -> None:
+        self.sources = sorted(sources, key=lambda source: source.url)
+        self._urls = [source.url for source in self.sources]
+
+    @classmethod
+    def from_output(cls, output: str) -> "AptPolicy":
+        return cls(list(_parse_apt_policy_sources(output)))
+
+    def sources_for_url(self, url_prefix: str) -> List[AptPolicySource]:
+        """Return the sources whose URL starts with url_prefix."""
+        sources = []
+        index = bisect.bisect_left(self._urls, url_prefix)
+        while index < len(self._urls) and self._urls[index].startswith(
+            url_prefix
+        ):
+            sources.append(self.sources[index])
+            index += 1
+        return sources
+
+    def has_origin_archive(self, origin: str, archive: str) -> bool:
+        return any(
+            source.origin == origin and source.archive == archive
+            for source in self.sources
+        )
+
+
+_apt_policy = None  # type: Optional[AptPolicy]
+_apt_policy_lock = threading.Lock()
+
+
+def get_apt_policy(error_msg: Optional[str] = None) -> AptPolicy:
+    """Return the parsed apt-cache policy, kept until the next apt update.
+
+    Service statuses are evaluated concurrently: callers wait for a running
+    apt-cache policy command instead of starting another one.
+    """
+    global _apt_policy
+    with _apt_policy_lock:
+        if _apt_policy is None:
+            _apt_policy = AptPolicy.from_output(
+                run_apt_command(
+                    cmd=["apt-cache", "policy"], error_msg=error_msg
+                )
+            )
+        return _apt_policy
+
+
+def invalidate_apt_policy() -> None:
+    global _apt_policy
+    with _apt_policy_lock:
+        _apt_policy = None
 
 
 class PreserveAptCfg:
@@ -222,9 +348,8 @@ class PreserveAptCfg:
 
     def __enter__(self):
         cfg = apt_pkg.config
-        self.current_apt_cfg = {
-            key: copy.deepcopy(cfg.get(key)) for key in cfg.keys()
-        }
+        # Config values are immutable strings, no need to deep copy them
+        self.current_apt_cfg = {key: cfg.get(key) for key in cfg.keys()}
 
         return self.apt_func()
 
@@ -325,9 +450,9 @@ def run_apt_update_command(env: Optional[Dict[str, str]] = {}) -> str:
         )
     finally:
         # Whenever we run an apt-get update command, we must invalidate
-        # the existing apt-cache policy cache. Otherwise, we could provide
+        # the parsed apt-cache policy. Otherwise, we could provide
         # users with incorrect values.
-        get_apt_cache_policy.cache_clear()
+        invalidate_apt_policy()
 
     return out
 
@@ -355,6 +480,9 @@ def run_apt_install_command(
         raise exceptions.APTInstallInvalidRepoError(
             repo_msg=e.msg, header_msg=error_msg
         )
+    finally:
+        # Installed packages may ship apt configuration or distro-info data
+        system.invalidate_probes("apt-config", "/usr/bin/ubuntu-distro-info")
 
     return out
 
@@ -382,19 +510,10 @@ def add_auth_apt_repo(
     assert_valid_apt_credentials(repo_url, username, password)
 
     # Does this system have updates suite enabled?
-    updates_enabled = False
-    policy = run_apt_command(
-        ["apt-cache", "policy"], messages.APT_POLICY_FAILED.msg
+    policy = get_apt_policy(error_msg=messages.APT_POLICY_FAILED.msg)
+    updates_enabled = policy.has_origin_archive(
+        "Ubuntu", "{}-updates".format(series)
     )
-    for line in policy.splitlines():
-        # We only care about $suite-updates lines
-        if "a={}-updates".format(series) not in line:
-            continue
-        # We only care about $suite-updates from the Ubuntu archive
-        if "o=Ubuntu," not in line:
-            continue
-        updates_enabled = True
-        break
 
     content = ""
     for suite in suites:
@@ -509,14 +628,16 @@ def add_ppa_pinning(apt_preference_file, repo_url, origin, priority):
 
 def get_apt_auth_file_from_apt_config():
     """Return to patch to the system configured APT auth file."""
-    out, _err = system.subp(
-        ["apt-config", "shell", "key", APT_CONFIG_AUTH_PARTS_DIR]
+    out, _err = system.probe(
+        ["apt-config", "shell", "key", APT_CONFIG_AUTH_PARTS_DIR],
+        system.PROBE_TTL_HOUR,
     )
     if out:  # then auth.conf.d parts is present
         return out.split("'")[1] + "90ubuntu-advantage"
     else:  # then use configured /etc/apt/auth.conf
-        out, _err = system.subp(
-            ["apt-config", "shell", "key", APT_CONFIG_AUTH_FILE]
+        out, _err = system.probe(
+            ["apt-config", "shell", "key", APT_CONFIG_AUTH_FILE],
+            system.PROBE_TTL_HOUR,
         )
         return out.split("'")[1].rstrip("/")
 
@@ -527,8 +648,9 @@ def find_apt_list_files(repo_url, series):
     if repo_path.endswith("/"):  # strip trailing slash
         repo_path = repo_path[:-1]
     lists_dir = "/var/lib/apt/lists"
-    out, _err = system.subp(
-        ["apt-config", "shell", "key", APT_CONFIG_LISTS_DIR]
+    out, _err = system.probe(
+        ["apt-config", "shell", "key", APT_CONFIG_LISTS_DIR],
+        system.PROBE_TTL_HOUR,
     )
     if out:  # then lists dir is present in config
         lists_dir = out.split("'")[1]
@@ -588,16 +710,92 @@ def is_installed(pkg: str) -> bool:
     return pkg in get_installed_packages_names()
 
 
+_DPKG_STATUS_FIELDS = (
+    "Package",
+    "Source",
+    "Version",
+    "Architecture",
+    "Status",
+)
+# dpkg states for which a package has no installed version
+_DPKG_NOT_INSTALLED_STATES = ("not-installed", "config-files")
+
+
+def _parse_dpkg_status(stream: Iterable[str]) -> Iterable[DpkgPackage]:
+    """Yield a DpkgPackage for each stanza of a dpkg status file.
+
+    Only the handful of fields we need are looked at, which lets us skip
+    multi-line fields such as Description and Conffiles without parsing
+    them.
+    """
+    fields = {}  # type: Dict[str, str]
+    for line in itertools.chain(stream, [""]):
+        line = line.rstrip("\n")
+        if not line:
+            if "Package" in fields:
+                name = fields["Package"]
+                # The Source field may carry a version: "src (1.0-1)"
+                source = fields.get("Source", "").split(" ")[0]
+                yield DpkgPackage(
+                    name=name,
+                    source=source or name,
+                    version=fields.get("Version", ""),
+                    arch=fields.get("Architecture", ""),
+                    status=fields.get("Status", "").rsplit(" ", 1)[-1],
+                )
+            fields = {}
+        elif line[0] not in " \t":
+            key, _, value = line.partition(":")
+            if key in _DPKG_STATUS_FIELDS:
+                fields[key] = value.strip()
+
+
+@lru_cache(maxsize=1)
+def _load_dpkg_status_index(
+    status_file: str, inode: int, mtime_ns: int, size: int
+) -> DpkgStatusIndex:
+    """Parse status_file, caching the result for its inode, mtime and size.
+
+    dpkg replaces the status file on every change, so the cached index is
+    reused for as long as the dpkg state is untouched.
+    """
+    with open(status_file, "r", encoding="utf-8", errors="replace") as stream:
+        packages = list(_parse_dpkg_status(stream))
+
+    source_packages = {}  # type: Dict[str, Dict[str, str]]
+    for package in packages:
+        if "installed" not in package.status:
+            continue
+        source_packages.setdefault(package.source, {})[
+            package.name
+        ] = package.version
+    return DpkgStatusIndex(packages=packages, source_packages=source_packages)
+
+
+def get_dpkg_status_index(
+    status_file: Optional[str] = None,
+) -> DpkgStatusIndex:
+    """Return the packages known by dpkg, indexed by source package.
+
+    The returned index is shared between callers and must not be modified.
+    """
+    status_file = status_file or DPKG_STATUS_FILE
+    stat = os.stat(status_file)
+    return _load_dpkg_status_index(
+        status_file, stat.st_ino, stat.st_mtime_ns, stat.st_size
+    )
+
+
 def get_installed_packages() -> List[InstalledAptPackages]:
-    out, _ = system.subp(["apt", "list", "--installed"])
-    package_list = out.splitlines()[1:]
     return [
         InstalledAptPackages(
-            name=entry.split("/")[0],
-            version=entry.split(" ")[1],
-            arch=entry.split(" ")[2],
+            name=package.name, version=package.version, arch=package.arch
         )
-        for entry in package_list
+        for package in sorted(
+            get_dpkg_status_index().packages,
+            key=lambda package: (package.name, package.arch),
+        )
+        if package.status not in _DPKG_NOT_INSTALLED_STATES
     ]
 
 
@@ -663,14 +861,140 @@ def setup_apt_proxy(
         system.write_file(APT_PROXY_CONF_FILE, apt_proxy_config)
 
 
+def _version_char_order(char: str) -> int:
+    """Return the dpkg sort weight of a single non-digit version character.
+
+    Letters sort before any other symbol, and "~" sorts before anything,
+    even the end of the string.
+    """
+    if char.isalpha():
+        return ord(char)
+    if char == "~":
+        return -1
+    return ord(char) + 256
+
+
+_VERSION_DIGITS_RE = re.compile(r"(\d+)")
+_VERSION_PAD = ((0,), 0)
+
+
+def _split_version_part(part: str) -> List[Tuple[Tuple[int, ...], int]]:
+    """Split an upstream version or revision into comparable chunks.
+
+    Each chunk is a (non-digit weights, numeric value) pair, following the
+    algorithm used by dpkg's verrevcmp. The non-digit weights are terminated
+    by 0 so that the end of a chunk sorts after "~" but before anything else.
+    """
+    pieces = _VERSION_DIGITS_RE.split(part)
+    chunks = []
+    for i in range(0, len(pieces), 2):
+        non_digits = pieces[i]
+        digits = pieces[i + 1] if i + 1 < len(pieces) else ""
+        chunks.append(
+            (
+                tuple(_version_char_order(c) for c in non_digits) + (0,),
+                int(digits) if digits else 0,
+            )
+        )
+    return chunks
+
+
+ParsedVersion = NamedTuple(
+    "ParsedVersion",
+    [
+        ("epoch", int),
+        ("upstream", List[Tuple[Tuple[int, ...], int]]),
+        ("revision", List[Tuple[Tuple[int, ...], int]]),
+    ],
+)
+
+
+@lru_cache(maxsize=None)
+def _parse_version(version: str) -> ParsedVersion:
+    """Parse a Debian version string into its comparable components.
+
+    :raises ValueError: if the version has an invalid epoch or no upstream
+        version.
+    """
+    version = version.strip()
+    epoch = 0
+    if ":" in version:
+        epoch_str, version = version.split(":", 1)
+        if not epoch_str.isdigit():
+            raise ValueError("Invalid epoch in version: {}".format(epoch_str))
+        epoch = int(epoch_str)
+    upstream, sep, revision = version.rpartition("-")
+    if not sep:
+        upstream, revision = revision, ""
+    if not upstream:
+        raise ValueError("Empty upstream version")
+    return ParsedVersion(
+        epoch=epoch,
+        upstream=_split_version_part(upstream),
+        revision=_split_version_part(revision),
+    )
+
+
+def _compare_version_parts(
+    part1: List[Tuple[Tuple[int, ...], int]],
+    part2: List[Tuple[Tuple[int, ...], int]],
+) -> int:
+    for chunk1, chunk2 in itertools.zip_longest(
+        part1, part2, fillvalue=_VERSION_PAD
+    ):
+        if chunk1 != chunk2:
+            return -1 if chunk1 < chunk2 else 1
+    return 0
+
+
+def version_compare(version1: str, version2: str) -> int:
+    """Compare two Debian package versions following the Debian policy.
+
+    This is an in-process equivalent of apt_pkg.version_compare, so it does
+    not need to fork dpkg for each comparison.
+
+    :return: a negative number if version1 is lower than version2, 0 if they
+        are equal, and a positive number if version1 is greater.
+    :raises ValueError: if any of the versions is not a valid Debian version.
+    """
+    if version1 == version2:
+        return 0
+    parsed1 = _parse_version(version1)
+    parsed2 = _parse_version(version2)
+    if parsed1.epoch != parsed2.epoch:
+        return -1 if parsed1.epoch < parsed2.epoch else 1
+    return _compare_version_parts(
+        parsed1.upstream, parsed2.upstream
+    ) or _compare_version_parts(parsed1.revision, parsed2.revision)
+
+
+_VERSION_RELATIONS = {
+    "lt": lambda result: result < 0,
+    "le": lambda result: result <= 0,
+    "eq": lambda result: result == 0,
+    "ne": lambda result: result != 0,
+    "ge": lambda result: result >= 0,
+    "gt": lambda result: result > 0,
+    "<<": lambda result: result < 0,
+    "<=": lambda result: result <= 0,
+    "=": lambda result: result == 0,
+    ">=": lambda result: result >= 0,
+    ">>": lambda result: result > 0,
+}
+
+
 def compare_versions(version1: str, version2: str, relation: str) -> bool:
-    """Return True comparing version1 to version2 with the given relation."""
+    """Return True comparing version1 to version2 with the given relation.
+
+    Accepts the same relations as dpkg --compare-versions. Invalid versions
+    or relations make the comparison False, as a failing dpkg call would.
+    """
+    check = _VERSION_RELATIONS.get(relation)
+    if check is None:
+        return False
     try:
-        system.subp(
-            ["dpkg", "--compare-versions", version1, relation, version2]
-        )
-        return True
-    except exceptions.ProcessExecutionError:
+        return check(version_compare(version1, version2))
+    except ValueError:
         return False
 
 
@@ -6,17 +6,14 @@ import logging
 import pathlib
 import re
 import sys
-import tarfile
-import tempfile
 import textwrap
 import time
 from functools import wraps
-from typing import List, Optional, Tuple  # noqa
+from typing import Any, List, Optional, Tuple  # noqa
 
 from uaclient import (
     actions,
     apt,
-    apt_news,
     config,
     contract,
     daemon,
@@ -27,28 +24,10 @@ from uaclient import (
     lock,
 )
 from uaclient import log as pro_log
-from uaclient import messages, security, security_status
+from uaclient import messages
 from uaclient import status as ua_status
-from uaclient import util, version
-from uaclient.api.api import call_api
-from uaclient.api.u.pro.attach.auto.full_auto_attach.v1 import (
-    FullAutoAttachOptions,
-    _full_auto_attach,
-)
-from uaclient.api.u.pro.attach.magic.initiate.v1 import _initiate
-from uaclient.api.u.pro.attach.magic.revoke.v1 import (
-    MagicAttachRevokeOptions,
-    _revoke,
-)
-from uaclient.api.u.pro.attach.magic.wait.v1 import (
-    MagicAttachWaitOptions,
-    _wait,
-)
-from uaclient.api.u.pro.security.status.reboot_required.v1 import (
-    _reboot_required,
-)
+from uaclient import subp_trace, system, util, version
 from uaclient.apt import AptProxyScope, setup_apt_proxy
-from uaclient.data_types import AttachActionsConfigFile, IncorrectTypeError
 from uaclient.defaults import PRINT_WRAP_WIDTH
 from uaclient.entitlements import (
     create_enable_entitlements_not_found_message,
@@ -63,10 +42,12 @@ from uaclient.entitlements.entitlement_status import (
 )
 from uaclient.files import notices, state_files
 from uaclient.files.notices import Notice
-from uaclient.jobs.update_messaging import refresh_motd, update_motd_messages
-from uaclient.log import JsonArrayFormatter
 from uaclient.yaml import safe_dump, safe_load
 
+# Modules only some commands need, like security_status which loads the
+# whole apt cache, are imported by their actions rather than here, so that
+# every other command starts faster. TestStartupImports keeps it that way.
+
 NAME = "pro"
 
 USAGE_TMPL = "{name} {command} [flags]"
@@ -282,7 +263,10 @@ def api_parser(parser):
     parser.prog = "api"
     parser.description = "Calls the Client API endpoints."
     parser.add_argument(
-        "endpoint_path", metavar="endpoint", help="API endpoint to call"
+        "endpoint_path",
+        metavar="endpoint",
+        nargs="?",
+        help="API endpoint to call",
     )
     parser.add_argument(
         "--args",
@@ -291,6 +275,18 @@ def api_parser(parser):
         nargs="*",
         help="Options to pass to the API endpoint, formatted as key=value",
     )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        nargs="?",
+        const="-",
+        help=(
+            "Call the endpoints of a JSON list of"
+            ' {"endpoint": ..., "args": {...}} requests read from FILE, or'
+            " from stdin when FILE is - or omitted, printing one response"
+            " per line"
+        ),
+    )
     return parser
 
 
@@ -462,7 +458,7 @@ def attach_parser(parser):
 def fix_parser(parser):
     """Build or extend an arg parser for fix subcommand."""
     parser.usage = USAGE_TMPL.format(
-        name=NAME, command="fix <CVE-yyyy-nnnn+>|<USN-nnnn-d+>"
+        name=NAME, command="fix <CVE-yyyy-nnnn+>|<USN-nnnn-d+> ..."
     )
     parser.prog = "fix"
     parser.description = (
@@ -472,9 +468,21 @@ def fix_parser(parser):
     parser._optionals.title = "Flags"
     parser.add_argument(
         "security_issue",
+        nargs="*",
         help=(
             "Security vulnerability ID to inspect and resolve on this system."
-            " Format: CVE-yyyy-nnnn, CVE-yyyy-nnnnnnn or USN-nnnn-dd"
+            " Format: CVE-yyyy-nnnn, CVE-yyyy-nnnnnnn or USN-nnnn-dd."
+            " When several IDs are provided, their fixes are installed"
+            " together in a single package upgrade."
+        ),
+    )
+    parser.add_argument(
+        "--from-file",
+        metavar="FILE",
+        help=(
+            "Read security vulnerability IDs to fix from FILE, one per line."
+            " Empty lines and lines starting with # are ignored. Use - to"
+            " read from standard input."
         ),
     )
     parser.add_argument(
@@ -486,6 +494,14 @@ def fix_parser(parser):
             " command."
         ),
     )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=(
+            "If used, fix will neither read from nor write to the local"
+            " cache of Ubuntu Security API responses."
+        ),
+    )
 
     return parser
 
@@ -521,6 +537,14 @@ def security_status_parser(parser):
         choices=("json", "yaml", "text"),
         default="text",
     )
+    parser.add_argument(
+        "--refresh",
+        help=(
+            "Ignore the cached json/yaml result and check every installed"
+            " package again"
+        ),
+        action="store_true",
+    )
 
     group = parser.add_mutually_exclusive_group()
 
@@ -583,6 +607,8 @@ def refresh_parser(parser):
 
 
 def action_security_status(args, *, cfg, **kwargs):
+    from uaclient import security_status
+
     if args.format == "text":
         if args.thirdparty:
             security_status.list_third_party_packages()
@@ -597,7 +623,9 @@ def action_security_status(args, *, cfg, **kwargs):
     elif args.format == "json":
         print(
             json.dumps(
-                security_status.security_status_dict(cfg),
+                security_status.security_status_dict(
+                    cfg, refresh=args.refresh
+                ),
                 sort_keys=True,
                 cls=util.DatetimeAwareJSONEncoder,
             )
@@ -605,26 +633,70 @@ def action_security_status(args, *, cfg, **kwargs):
     else:
         print(
             safe_dump(
-                security_status.security_status_dict(cfg),
+                security_status.security_status_dict(
+                    cfg, refresh=args.refresh
+                ),
                 default_flow_style=False,
             )
         )
     return 0
 
 
+def _read_security_issues_file(path: str) -> List[str]:
+    """Read security issue IDs from path, or from stdin if path is '-'."""
+    if path == "-":
+        lines = sys.stdin.readlines()
+    else:
+        try:
+            with open(path, "r") as stream:
+                lines = stream.readlines()
+        except OSError as e:
+            msg = messages.FIX_CANNOT_READ_ISSUES_FILE.format(
+                path=path, error=e.strerror
+            )
+            raise exceptions.UserFacingError(msg=msg.msg, msg_code=msg.name)
+    issues = []
+    for line in lines:
+        line = line.strip()
+        if line and not line.startswith("#"):
+            issues.append(line)
+    return issues
+
+
 def action_fix(args, *, cfg, **kwargs):
-    if not re.match(security.CVE_OR_USN_REGEX, args.security_issue):
-        msg = (
-            'Error: issue "{}" is not recognized.\n'
-            'Usage: "pro fix CVE-yyyy-nnnn" or "pro fix USN-nnnn"'
-        ).format(args.security_issue)
-        raise exceptions.UserFacingError(msg)
-
-    fix_status = security.fix_security_issue_id(
-        cfg=cfg,
-        issue_id=args.security_issue,
-        dry_run=args.dry_run,
-    )
+    from uaclient import security
+
+    issues = list(args.security_issue)
+    if args.from_file:
+        issues += _read_security_issues_file(args.from_file)
+    if not issues:
+        raise exceptions.UserFacingError(
+            'Error: no issue was provided.\nUsage: "pro fix CVE-yyyy-nnnn"'
+            ' or "pro fix USN-nnnn"'
+        )
+
+    for issue in issues:
+        if not re.match(security.CVE_OR_USN_REGEX, issue):
+            msg = (
+                'Error: issue "{}" is not recognized.\n'
+                'Usage: "pro fix CVE-yyyy-nnnn" or "pro fix USN-nnnn"'
+            ).format(issue)
+            raise exceptions.UserFacingError(msg)
+
+    if len(issues) == 1:
+        fix_status = security.fix_security_issue_id(
+            cfg=cfg,
+            issue_id=issues[0],
+            dry_run=args.dry_run,
+            use_cache=not args.no_cache,
+        )
+    else:
+        fix_status = security.fix_security_issue_ids(
+            cfg=cfg,
+            issue_ids=issues,
+            dry_run=args.dry_run,
+            use_cache=not args.no_cache,
+        )
     return fix_status.value
 
 
@@ -792,6 +864,114 @@ def system_parser(parser):
     return parser
 
 
+def debug_parser(parser):
+    """Build or extend an arg parser for debug subcommand."""
+    parser.usage = USAGE_TMPL.format(name=NAME, command="debug <command>")
+    parser.description = "Inspect internal Pro client state for debugging"
+    parser.prog = "debug"
+    parser._optionals.title = "Flags"
+    subparsers = parser.add_subparsers(
+        title="Available Commands", dest="command", metavar=""
+    )
+    parser_security_cache = subparsers.add_parser(
+        "security-cache", help="inspect the Security API response cache"
+    )
+    parser_security_cache.set_defaults(action=action_debug_security_cache)
+    debug_security_cache_parser(parser_security_cache)
+    parser_security_notices = subparsers.add_parser(
+        "security-notices", help="manage the local security notice database"
+    )
+    parser_security_notices.set_defaults(action=action_debug_security_notices)
+    debug_security_notices_parser(parser_security_notices)
+    parser_trace_summary = subparsers.add_parser(
+        "trace-summary", help="summarize the traced subprocess commands"
+    )
+    parser_trace_summary.set_defaults(action=action_debug_trace_summary)
+    debug_trace_summary_parser(parser_trace_summary)
+
+    return parser
+
+
+def debug_security_cache_parser(parser):
+    parser.usage = USAGE_TMPL.format(
+        name=NAME, command="debug security-cache [--clear]"
+    )
+    parser.prog = "security-cache"
+    parser.description = (
+        "List the Ubuntu Security API responses stored locally by"
+        " 'pro fix', with their size and freshness."
+    )
+    parser._optionals.title = "Flags"
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="remove every cached Security API response",
+    )
+    return parser
+
+
+def debug_security_notices_parser(parser):
+    parser.usage = USAGE_TMPL.format(
+        name=NAME, command="debug security-notices [--import FILE] [--clear]"
+    )
+    parser.prog = "security-notices"
+    parser.description = (
+        "Show the local database of CVEs and USNs used by 'pro fix' instead"
+        " of the Ubuntu Security API, or import an exported JSON dump of"
+        " the Security API into it."
+    )
+    parser._optionals.title = "Flags"
+    parser.add_argument(
+        "--import",
+        dest="import_files",
+        metavar="FILE",
+        action="append",
+        default=[],
+        help=(
+            "import CVEs and USNs from a JSON (or gzip compressed JSON) dump"
+            " of the Security API. Can be used multiple times"
+        ),
+    )
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="remove the local security notice database",
+    )
+    return parser
+
+
+def debug_trace_summary_parser(parser):
+    parser.usage = USAGE_TMPL.format(
+        name=NAME,
+        command="debug trace-summary [--file FILE] [--top N] [--clear]",
+    )
+    parser.prog = "trace-summary"
+    parser.description = (
+        "Show the commands run by the Pro client that took the most time,"
+        " from the trace written when the subp_trace feature is set. The"
+        " pro command, the timer, the daemons, the API server and the"
+        " scripts run by apt or at boot all write to it."
+    )
+    parser._optionals.title = "Flags"
+    parser.add_argument(
+        "--file",
+        help="trace file to read instead of the configured one",
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        metavar="N",
+        help="number of commands to show (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--clear",
+        action="store_true",
+        help="remove the trace file",
+    )
+    return parser
+
+
 def reboot_required_parser(parser):
     # This formatter_class ensures that our formatting below isn't lost
     parser.usage = USAGE_TMPL.format(
@@ -1113,6 +1293,8 @@ def action_config_set(args, *, cfg, **kwargs):
     elif set_key == "apt_news":
         set_value = set_value.lower() == "true"
         if set_value:
+            from uaclient import apt_news
+
             apt_news.update_apt_news(cfg)
         else:
             state_files.apt_news_contents_file.delete()
@@ -1368,6 +1550,8 @@ def _detach(cfg: config.UAConfig, assume_yes: bool) -> int:
     for ent in to_disable:
         _perform_disable(ent, cfg, assume_yes=assume_yes, update_status=False)
 
+    from uaclient.jobs.update_messaging import update_motd_messages
+
     cfg.delete_cache()
     cfg.machine_token_file.delete()
     update_motd_messages(cfg)
@@ -1401,14 +1585,62 @@ def _post_cli_attach(cfg: config.UAConfig) -> None:
     event.process_events()
 
 
+def _read_api_batch(path: str) -> List[Any]:
+    """Read the JSON list of batch requests from path, or stdin if '-'."""
+    source = "stdin" if path == "-" else path
+    try:
+        if path == "-":
+            content = sys.stdin.read()
+        else:
+            with open(path, "r") as stream:
+                content = stream.read()
+    except OSError as e:
+        msg = messages.API_BATCH_UNREADABLE_INPUT.format(
+            source=source, error=e.strerror
+        )
+        raise exceptions.UserFacingError(msg=msg.msg, msg_code=msg.name)
+    try:
+        requests = json.loads(content)
+    except ValueError as e:
+        error = str(e)
+    else:
+        if isinstance(requests, list):
+            return requests
+        error = "found {}".format(type(requests).__name__)
+    msg = messages.API_BATCH_INVALID_INPUT.format(source=source, error=error)
+    raise exceptions.UserFacingError(msg=msg.msg, msg_code=msg.name)
+
+
 def action_api(args, *, cfg):
-    result = call_api(args.endpoint_path, args.options, cfg)
-    print(result.to_json())
-    return 0 if result.result == "success" else 1
+    from uaclient.api.api import call_api, call_api_batch
+
+    if (args.batch is None) == (args.endpoint_path is None) or (
+        args.batch is not None and args.options
+    ):
+        msg = messages.API_ENDPOINT_XOR_BATCH
+        raise exceptions.UserFacingError(msg=msg.msg, msg_code=msg.name)
+
+    if args.batch is None:
+        result = call_api(args.endpoint_path, args.options, cfg)
+        print(result.to_json())
+        return 0 if result.result == "success" else 1
+
+    ret = 0
+    for result in call_api_batch(_read_api_batch(args.batch), cfg):
+        # Stream each response as soon as it is ready
+        print(result.to_json(), flush=True)
+        if result.result != "success":
+            ret = 1
+    return ret
 
 
 @assert_root
 def action_auto_attach(args, *, cfg: config.UAConfig) -> int:
+    from uaclient.api.u.pro.attach.auto.full_auto_attach.v1 import (
+        FullAutoAttachOptions,
+        _full_auto_attach,
+    )
+
     try:
         _full_auto_attach(
             FullAutoAttachOptions(),
@@ -1424,6 +1656,16 @@ def action_auto_attach(args, *, cfg: config.UAConfig) -> int:
 
 
 def _magic_attach(args, *, cfg, **kwargs):
+    from uaclient.api.u.pro.attach.magic.initiate.v1 import _initiate
+    from uaclient.api.u.pro.attach.magic.revoke.v1 import (
+        MagicAttachRevokeOptions,
+        _revoke,
+    )
+    from uaclient.api.u.pro.attach.magic.wait.v1 import (
+        MagicAttachWaitOptions,
+        _wait,
+    )
+
     if args.format == "json":
         raise exceptions.MagicAttachInvalidParam(
             param="--format",
@@ -1472,6 +1714,11 @@ def action_attach(args, *, cfg):
         token = args.token
         enable_services_override = None
     else:
+        from uaclient.data_types import (
+            AttachActionsConfigFile,
+            IncorrectTypeError,
+        )
+
         try:
             attach_config = AttachActionsConfigFile.from_dict(
                 safe_load(args.attach_config)
@@ -1529,14 +1776,11 @@ def action_attach(args, *, cfg):
 
 def action_collect_logs(args, *, cfg: config.UAConfig):
     output_file = args.output or UA_COLLECT_LOGS_FILE
-    with tempfile.TemporaryDirectory() as output_dir:
-        actions.collect_logs(cfg, output_dir)
-        try:
-            with tarfile.open(output_file, "w:gz") as results:
-                results.add(output_dir, arcname="logs/")
-        except PermissionError as e:
-            logging.error(e)
-            return 1
+    try:
+        actions.collect_logs(cfg, output_file)
+    except PermissionError as e:
+        logging.error(e)
+        return 1
     return 0
 
 
@@ -1662,6 +1906,12 @@ def get_parser(cfg: config.UAConfig):
     parser_system.set_defaults(action=action_system)
     system_parser(parser_system)
 
+    parser_debug = subparsers.add_parser(
+        "debug", help="inspect internal state for debugging purposes"
+    )
+    parser_debug.set_defaults(action=action_debug)
+    debug_parser(parser_debug)
+
     return parser
 
 
@@ -1705,7 +1955,137 @@ def action_system(args, *, cfg, **kwargs):
     return 0
 
 
+def action_debug(args, *, cfg, **kwargs):
+    """Perform the debug action.
+
+    :return: 0 on success, 1 otherwise
+    """
+    _print_help_for_subcommand(cfg, cmd_name="debug", subcmd_name=args.command)
+    return 0
+
+
+def action_debug_security_cache(args, *, cfg: config.UAConfig):
+    from uaclient.security_api_cache import SecurityAPICache
+
+    cache = SecurityAPICache.from_cfg(cfg)
+    if args.clear:
+        if not util.we_are_currently_root():
+            raise exceptions.NonRootUserError()
+        cache.clear()
+        print(messages.SECURITY_API_CACHE_CLEARED.format(path=cache.directory))
+        return 0
+
+    entries = cache.entries()
+    print(
+        messages.SECURITY_API_CACHE_SUMMARY.format(
+            path=cache.directory,
+            count=len(entries),
+            size=sum(entry.size for entry in entries),
+            max_size=cache.max_size,
+            ttl=cache.ttl,
+        )
+    )
+    now = time.time()
+    for entry in entries:
+        print(
+            messages.SECURITY_API_CACHE_ENTRY.format(
+                state="fresh" if entry.fresh else "stale",
+                age=int(now - entry.fetched_at),
+                size=entry.size,
+                url=entry.url,
+            )
+        )
+    return 0
+
+
+def action_debug_security_notices(args, *, cfg: config.UAConfig):
+    from uaclient.security_notice_db import SecurityNoticeDB
+
+    notice_db = SecurityNoticeDB.from_cfg(cfg)
+    if (args.clear or args.import_files) and not util.we_are_currently_root():
+        raise exceptions.NonRootUserError()
+
+    if args.clear:
+        notice_db.clear()
+        print(messages.SECURITY_NOTICE_DB_CLEARED.format(path=notice_db.path))
+
+    for import_file in args.import_files:
+        try:
+            imported = notice_db.import_file(import_file)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise exceptions.UserFacingError(
+                messages.SECURITY_NOTICE_DB_IMPORT_FAILED.format(
+                    path=import_file, error=str(e)
+                )
+            )
+        print(
+            messages.SECURITY_NOTICE_DB_IMPORTED.format(
+                path=import_file,
+                cves=imported.cves,
+                notices=imported.notices,
+                packages=imported.packages,
+            )
+        )
+
+    stats = notice_db.stats()
+    print(
+        messages.SECURITY_NOTICE_DB_SUMMARY.format(
+            path=notice_db.path,
+            cves=stats.cves,
+            notices=stats.notices,
+            packages=stats.packages,
+        )
+    )
+    return 0
+
+
+def action_debug_trace_summary(args, *, cfg: config.UAConfig):
+    path = args.file or subp_trace.get_trace_file(cfg)
+    if not path:
+        path = cfg.data_path("subp-trace")
+    try:
+        if args.clear:
+            system.ensure_file_absent(path)
+            print(messages.SUBP_TRACE_CLEARED.format(path=path))
+            return 0
+        summaries = subp_trace.summarize(subp_trace.load_records(path))
+    except FileNotFoundError:
+        print(messages.SUBP_TRACE_NOT_FOUND.format(path=path))
+        return 0
+    except PermissionError:
+        raise exceptions.NonRootUserError()
+
+    print(
+        messages.SUBP_TRACE_SUMMARY.format(
+            path=path,
+            commands=len(summaries),
+            calls=sum(summary.calls for summary in summaries),
+            total=sum(summary.total for summary in summaries),
+        )
+    )
+    if summaries:
+        print(messages.SUBP_TRACE_HEADER)
+    for summary in summaries[: args.top]:
+        print(
+            messages.SUBP_TRACE_ENTRY.format(
+                total=summary.total,
+                calls=summary.calls,
+                mean=summary.total / summary.calls,
+                max=summary.max,
+                failures=summary.failures,
+                retries=summary.retries,
+                cmd=summary.cmd,
+                callers=", ".join(summary.callers),
+            )
+        )
+    return 0
+
+
 def action_system_reboot_required(args, *, cfg: config.UAConfig):
+    from uaclient.api.u.pro.security.status.reboot_required.v1 import (
+        _reboot_required,
+    )
+
     result = _reboot_required(cfg)
     event.info(result.reboot_required)
     return 0
@@ -1737,6 +2117,12 @@ def _action_refresh_contract(_args, cfg: config.UAConfig):
 
 
 def _action_refresh_messages(_args, cfg: config.UAConfig):
+    from uaclient import apt_news
+    from uaclient.jobs.update_messaging import (
+        refresh_motd,
+        update_motd_messages,
+    )
+
     # Not performing any exception handling here since both of these
     # functions should raise UserFacingError exceptions, which are
     # covered by the main_error_handler decorator
@@ -1846,6 +2232,10 @@ def setup_logging(console_level, log_level, log_file=None, logger=None):
     logger.addFilter(pro_log.RedactionFilter())
 
     # Clear all handlers, so they are replaced for this logger
+    for handler in logger.handlers:
+        if isinstance(handler, pro_log.QueueLogHandler):
+            # Write out what it still holds
+            handler.close()
     logger.handlers = []
 
     # Setup console logging
@@ -1864,8 +2254,7 @@ def setup_logging(console_level, log_level, log_file=None, logger=None):
             log_file_path.touch()
             log_file_path.chmod(0o644)
 
-        file_handler = logging.FileHandler(log_file)
-        file_handler.setFormatter(JsonArrayFormatter())
+        file_handler = pro_log.get_queue_file_handler(log_file)
         file_handler.setLevel(log_level)
         file_handler.set_name("ua-file")
         logger.addHandler(file_handler)
@@ -1954,6 +2343,10 @@ def main_error_handler(func):
             _warn_about_new_version()
 
             sys.exit(1)
+        finally:
+            # File logging happens in the background, so make sure every
+            # record is written before the process exits
+            pro_log.flush_queue_handlers()
 
     return wrapper
 
@@ -1984,6 +2377,7 @@ def main(sys_argv=None):
     log_level = cfg.log_level
     console_level = logging.DEBUG if args.debug else logging.INFO
     setup_logging(console_level, log_level, cfg.log_file)
+    subp_trace.configure(cfg)
 
     logging.debug("Executed with sys.argv: %r" % sys_argv)
 
@@ -40,7 +40,7 @@ def get_cloud_type() -> Tuple[Optional[str], Optional[NoCloudTypeReason]]:
     if system.which("cloud-id"):
         # Present in cloud-init on >= Xenial
         try:
-            out, _err = system.subp(["cloud-id"])
+            out, _err = system.probe(["cloud-id"], system.PROBE_TTL_BOOT)
             return (out.strip(), None)
         except exceptions.ProcessExecutionError as exc:
             logging.debug("error running cloud-id: %s", str(exc))
@@ -92,6 +92,10 @@ class UAConfig:
         "machine-access-cis": DataPath("machine-access-cis.json", True),
         "lock": DataPath("lock", False),
         "status-cache": DataPath("status.json", False),
+        "status-services-cache": DataPath("status-services.json", True),
+        "security-status-cache": DataPath("security-status.json", False),
+        "help-data-index": DataPath("help-data.json", False),
+        "subp-trace": DataPath("subp-trace.jsonl", True),
         "marker-reboot-cmds": DataPath("marker-reboot-cmds-required", False),
     }  # type: Dict[str, DataPath]
 
@@ -132,6 +132,9 @@ def logging_sandbox():
                 logging.Logger, "manager", logging.Manager(root_logger)
             ):
                 yield
+    # Stop the background threads of file logging
+    for handler in root_logger.handlers:
+        handler.close()
 
 
 @pytest.fixture
@@ -264,6 +267,61 @@ def mock_notices_dir(tmpdir_factory):
             yield
 
 
+@pytest.yield_fixture(autouse=True)
+def apt_policy():
+    """Parse apt-cache policy again for every test."""
+    from uaclient.apt import invalidate_apt_policy
+
+    invalidate_apt_policy()
+    yield
+    invalidate_apt_policy()
+
+
+@pytest.yield_fixture(autouse=True)
+def apt_cache_snapshot():
+    """Walk the apt caches again for every test."""
+    from uaclient.security_status import invalidate_apt_cache_snapshot
+
+    invalidate_apt_cache_snapshot()
+    yield
+    invalidate_apt_cache_snapshot()
+
+
+@pytest.yield_fixture(scope="session", autouse=True)
+def _system_probes_file(tmpdir_factory):
+    probes_file = tmpdir_factory.mktemp("run").join("system-probes.json")
+    with mock.patch(
+        "uaclient.system.SYSTEM_PROBES_CACHE_FILE", probes_file.strpath
+    ):
+        yield probes_file
+
+
+@pytest.yield_fixture(autouse=True)
+def system_probes(_system_probes_file):
+    """Run every system probe again for each test."""
+    if _system_probes_file.check():
+        _system_probes_file.remove()
+    with mock.patch("uaclient.system._probe_results", {}):
+        yield
+
+
+@pytest.yield_fixture(scope="session", autouse=True)
+def _version_check_file(tmpdir_factory):
+    check_file = tmpdir_factory.mktemp("run").join("version-check.json")
+    with mock.patch(
+        "uaclient.version.VERSION_CHECK_CACHE_FILE", check_file.strpath
+    ):
+        yield check_file
+
+
+@pytest.yield_fixture(autouse=True)
+def version_check_file(_version_check_file):
+    """Check for a new version of the client again in each test."""
+    if _version_check_file.check():
+        _version_check_file.remove()
+    yield _version_check_file
+
+
 @pytest.fixture
 def apt_pkg():
     return m_apt_pkg
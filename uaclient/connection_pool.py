@@ -0,0 +1,318 @@
+"""
+Persistent HTTP(S) connections for the Pro service clients.
+
+urllib opens, and closes, a new connection for every request, so each call
+to the contract, security or livepatch servers pays a TCP and TLS handshake.
+HTTPConnectionPool keeps the connections it opened alive, one idle list per
+scheme, host and proxy, and offers the subset of urllib.request.urlopen that
+util.readurl relies on.
+
+Redirects are followed over the pool the way urllib follows them, and
+requests the pool does not handle, like https proxies, are passed to urllib.
+"""
+import base64
+import http.client
+import io
+import logging
+import ssl
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib import error, request
+from urllib.parse import unquote, urljoin, urlsplit
+
+from uaclient import util
+
+MAX_IDLE_CONNECTIONS_PER_HOST = 8
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# As urllib.request.HTTPRedirectHandler.max_redirections
+MAX_REDIRECTS = 10
+# Requests safe to send again when a reused connection turns out stale
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+# Errors meaning the server closed an idle connection we tried to reuse
+STALE_CONNECTION_ERRORS = (
+    BrokenPipeError,
+    ConnectionResetError,
+    http.client.RemoteDisconnected,
+)
+
+RequestTiming = NamedTuple(
+    "RequestTiming",
+    [
+        ("method", str),
+        ("url", str),
+        ("status", int),
+        ("reused", bool),
+        ("connect", float),
+        ("total", float),
+    ],
+)
+
+PoolKey = Tuple[str, str, Optional[str]]
+IdleConnections = Dict[PoolKey, List[http.client.HTTPConnection]]
+
+
+class PooledResponse:
+    """The part of urllib's response interface readurl uses."""
+
+    def __init__(
+        self,
+        url: str,
+        status: int,
+        reason: str,
+        headers: http.client.HTTPMessage,
+        body: bytes,
+        timing: RequestTiming,
+    ) -> None:
+        self.url = url
+        self.code = self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.timing = timing
+        self._body = body
+        self._offset = 0
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if amt is None or amt < 0:
+            amt = len(self._body)
+        if self._offset == 0 and amt >= len(self._body):
+            # Hand the whole body over instead of keeping a second reference
+            data, self._body = self._body, b""
+            return data
+        data = self._body[self._offset : self._offset + amt]
+        self._offset += len(data)
+        return data
+
+    def getcode(self) -> int:
+        return self.code
+
+    def geturl(self) -> str:
+        return self.url
+
+
+def _get_proxy_headers(proxy: str) -> Dict[str, str]:
+    parsed_proxy = urlsplit(proxy)
+    if not parsed_proxy.username:
+        return {}
+    credentials = "{}:{}".format(
+        unquote(parsed_proxy.username), unquote(parsed_proxy.password or "")
+    )
+    return {
+        "Proxy-Authorization": "Basic {}".format(
+            base64.b64encode(credentials.encode("utf-8")).decode("ascii")
+        )
+    }
+
+
+class HTTPConnectionPool:
+    def __init__(
+        self,
+        context: Optional[ssl.SSLContext] = None,
+        max_idle: int = MAX_IDLE_CONNECTIONS_PER_HOST,
+    ) -> None:
+        self.max_idle = max_idle
+        self._context = context
+        self._idle = {}  # type: IdleConnections
+        self._lock = threading.Lock()
+
+    @property
+    def context(self) -> ssl.SSLContext:
+        # Loading the CA certificates once is part of what we save
+        if self._context is None:
+            self._context = ssl.create_default_context()
+        return self._context
+
+    def _get_proxy(self, scheme: str, host: str) -> Optional[str]:
+        """Return the proxy urllib would use for this request, if any."""
+        proxy = util.get_web_proxies().get(scheme)
+        if not proxy or request.proxy_bypass(host):
+            return None
+        return proxy
+
+    def _new_connection(
+        self, key: PoolKey, timeout: Optional[float]
+    ) -> http.client.HTTPConnection:
+        scheme, netloc, proxy = key
+        host = netloc
+        tunnel = None
+        if proxy:
+            host = urlsplit(proxy).netloc.rpartition("@")[2]
+            if scheme == "https":
+                tunnel = netloc
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(
+                host, timeout=timeout, context=self.context
+            )  # type: http.client.HTTPConnection
+        else:
+            conn = http.client.HTTPConnection(host, timeout=timeout)
+        if tunnel and proxy:
+            conn.set_tunnel(tunnel, headers=_get_proxy_headers(proxy))
+        return conn
+
+    def _get_connection(
+        self, key: PoolKey, timeout: Optional[float]
+    ) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            return self._new_connection(key, timeout), False
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+
+    def _release_connection(
+        self, key: PoolKey, conn: http.client.HTTPConnection
+    ) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for conn in connections:
+                conn.close()
+
+    def urlopen(self, req: request.Request, timeout: Optional[float] = None):
+        """Send req over a pooled connection, like urllib.request.urlopen.
+
+        :raises HTTPError: when the server responds with a status outside
+            2xx, or with a redirect urllib would not follow either.
+        :raises URLError: when the request can't be sent.
+        """
+        response = self._open(req, timeout)
+        redirects = 0
+        while response.status in REDIRECT_CODES:
+            req = self._get_redirect_request(req, response, redirects)
+            redirects += 1
+            response = self._open(req, timeout)
+        return response
+
+    def _get_redirect_request(
+        self, req: request.Request, response: PooledResponse, redirects: int
+    ) -> request.Request:
+        """Return the request following response, which redirects req.
+
+        req was already sent, so it is never sent again: like urllib, 301,
+        302 and 303 replies to a POST become a GET without a body, and any
+        other redirect of a request that is not a GET or HEAD is an error.
+        """
+        http_error = error.HTTPError(
+            req.full_url,
+            response.status,
+            response.reason,
+            response.headers,
+            io.BytesIO(response.read()),
+        )
+        location = response.headers.get("Location")
+        if not location or redirects >= MAX_REDIRECTS:
+            raise http_error
+        new_url = urljoin(req.full_url, location)
+        if urlsplit(new_url).scheme not in ("http", "https"):
+            raise http_error
+        new_req = request.HTTPRedirectHandler().redirect_request(
+            req,
+            http_error,
+            response.status,
+            response.reason,
+            response.headers,
+            new_url,
+        )
+        if new_req is None:
+            raise http_error
+        return new_req
+
+    def _open(self, req: request.Request, timeout: Optional[float]):
+        parsed_url = urlsplit(req.full_url)
+        scheme = parsed_url.scheme
+        if scheme not in ("http", "https"):
+            return request.urlopen(req, timeout=timeout)
+        proxy = self._get_proxy(scheme, parsed_url.hostname or "")
+        headers = dict(req.header_items())
+        target = req.selector
+        if proxy:
+            if urlsplit(proxy).scheme != "http":
+                return request.urlopen(req, timeout=timeout)
+            if scheme == "http":
+                # Plain http requests go to the proxy with the full URL
+                target = req.full_url
+                headers.update(_get_proxy_headers(proxy))
+        key = (scheme, parsed_url.netloc, proxy)
+        method = req.get_method()
+
+        start = time.monotonic()
+        while True:
+            conn, reused = self._get_connection(key, timeout)
+            connect = 0.0
+            try:
+                if not reused:
+                    conn.connect()
+                    connect = time.monotonic() - start
+                conn.request(method, target, body=req.data, headers=headers)
+                resp = conn.getresponse()
+                body = resp.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if (
+                    reused
+                    and method in IDEMPOTENT_METHODS
+                    and isinstance(e, STALE_CONNECTION_ERRORS)
+                ):
+                    continue
+                raise error.URLError(e)
+            break
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release_connection(key, conn)
+        timing = RequestTiming(
+            method=method,
+            url=req.full_url,
+            status=resp.status,
+            reused=reused,
+            connect=connect,
+            total=time.monotonic() - start,
+        )
+        logging.debug(
+            "URL [%s] %s: %d in %.3fs (%s connection, connect %.3fs)",
+            timing.method,
+            timing.url,
+            timing.status,
+            timing.total,
+            "reused" if timing.reused else "new",
+            timing.connect,
+        )
+
+        if not 200 <= resp.status < 300 and resp.status not in REDIRECT_CODES:
+            # Like urllib, 304 Not Modified included
+            raise error.HTTPError(
+                req.full_url,
+                resp.status,
+                resp.reason,
+                resp.msg,
+                io.BytesIO(body),
+            )
+        return PooledResponse(
+            req.full_url, resp.status, resp.reason, resp.msg, body, timing
+        )
+
+
+_connection_pool = None  # type: Optional[HTTPConnectionPool]
+_connection_pool_lock = threading.Lock()
+
+
+def get_connection_pool() -> HTTPConnectionPool:
+    """Return the pool shared by every service client of this process."""
+    global _connection_pool
+    with _connection_pool_lock:
+        if _connection_pool is None:
+            _connection_pool = HTTPConnectionPool()
+        return _connection_pool
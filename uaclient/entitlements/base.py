@@ -23,6 +23,44 @@ from uaclient.yaml import safe_load
 
 event = event_logger.get_event_logger()
 
+HELP_INDEX_CACHE_KEY = "help-data-index"
+
+
+def get_help_index(cfg: config.UAConfig) -> Dict[str, str]:
+    """Return the help text of each service in DEFAULT_HELP_FILE.
+
+    Parsing the YAML help file costs far more than loading JSON, so the
+    texts are cached as JSON along with the fingerprint of the help file,
+    and the YAML is only parsed again once the help file changes.
+    """
+    fingerprint = system.get_paths_fingerprint([DEFAULT_HELP_FILE])
+    cached = cfg.read_cache(HELP_INDEX_CACHE_KEY, silent=True)
+    if (
+        isinstance(cached, dict)
+        and cached.get("fingerprint") == fingerprint
+        and isinstance(cached.get("help"), dict)
+    ):
+        return cached["help"]
+
+    help_dict = {}  # type: Dict[str, Any]
+    if os.path.exists(DEFAULT_HELP_FILE):
+        with open(DEFAULT_HELP_FILE, "r") as f:
+            help_dict = safe_load(f) or {}
+    help_index = {
+        name: value.get("help", "")
+        for name, value in help_dict.items()
+        if isinstance(value, dict)
+    }
+    try:
+        cfg.write_cache(
+            HELP_INDEX_CACHE_KEY,
+            {"fingerprint": fingerprint, "help": help_index},
+        )
+    except OSError as e:
+        # Non-root users can read the help, they just cannot index it
+        logging.debug("Unable to write help data index: %s", e)
+    return help_index
+
 
 class IncompatibleService:
     def __init__(
@@ -60,6 +98,10 @@ class UAEntitlement(metaclass=abc.ABCMeta):
     # List of services that depend on this service
     _dependent_services = ()  # type: Tuple[Type[UAEntitlement], ...]
 
+    # Inputs from status.STATUS_INPUTS the status of this entitlement
+    # depends on, besides the ones every entitlement depends on
+    status_inputs = ()  # type: Tuple[str, ...]
+
     affordance_check_arch = True
     affordance_check_series = True
     affordance_check_kernel_min_version = True
@@ -108,13 +150,7 @@ class UAEntitlement(metaclass=abc.ABCMeta):
     def help_info(self) -> str:
         """Help information for the entitlement"""
         if self._help_info is None:
-            help_dict = {}
-
-            if os.path.exists(DEFAULT_HELP_FILE):
-                with open(DEFAULT_HELP_FILE, "r") as f:
-                    help_dict = safe_load(f)
-
-            self._help_info = help_dict.get(self.name, {}).get("help", "")
+            self._help_info = get_help_index(self.cfg).get(self.name, "")
 
         return self._help_info
 
@@ -320,6 +356,8 @@ class UAEntitlement(metaclass=abc.ABCMeta):
             return False, None
 
         ret = self._perform_enable(silent=silent)
+        # Even a failed enable may have changed the status of services
+        self.cfg.delete_cache_key("status-services-cache")
         if not ret:
             return False, None
 
@@ -559,7 +597,9 @@ class UAEntitlement(metaclass=abc.ABCMeta):
                 # every other reason means we can't continue
                 return False, fail
 
-        if not self._perform_disable(silent=silent):
+        disabled = self._perform_disable(silent=silent)
+        self.cfg.delete_cache_key("status-services-cache")
+        if not disabled:
             return False, None
 
         msg_ops = self.messaging.get("post_disable", [])
@@ -36,6 +36,7 @@ class LivepatchEntitlement(UAEntitlement):
     affordance_check_series = False
     affordance_check_kernel_min_version = False
     affordance_check_kernel_flavor = False
+    status_inputs = ("livepatch",)
 
     @property
     def incompatible_services(self) -> Tuple[IncompatibleService, ...]:
@@ -137,6 +138,8 @@ class LivepatchEntitlement(UAEntitlement):
                 )
             except exceptions.ProcessExecutionError as e:
                 raise exceptions.ErrorInstallingLivepatch(error_msg=str(e))
+            finally:
+                system.invalidate_probes("snap")
 
         livepatch.configure_livepatch_proxy(http_proxy, https_proxy)
 
@@ -1,7 +1,6 @@
 import abc
 import copy
 import logging
-import re
 from os.path import exists
 from typing import Any, Dict, List, Optional, Tuple, Union
 
@@ -25,6 +24,8 @@ class RepoEntitlement(base.UAEntitlement):
     repo_list_file_tmpl = "/etc/apt/sources.list.d/ubuntu-{name}.list"
     repo_pref_file_tmpl = "/etc/apt/preferences.d/ubuntu-{name}"
 
+    status_inputs = ("apt",)  # type: Tuple[str, ...]
+
     # The repo Origin value for setting pinning
     origin = None  # type: Optional[str]
 
@@ -111,11 +112,8 @@ class RepoEntitlement(base.UAEntitlement):
                 ApplicationStatus.DISABLED,
                 messages.NO_APT_URL_FOR_SERVICE.format(title=self.title),
             )
-        policy = apt.get_apt_cache_policy(
-            error_msg=messages.APT_POLICY_FAILED.msg
-        )
-        match = re.search(r"{}/ubuntu".format(repo_url), policy)
-        if match:
+        policy = apt.get_apt_policy(error_msg=messages.APT_POLICY_FAILED.msg)
+        if policy.sources_for_url("{}/ubuntu".format(repo_url.rstrip("/"))):
             return (
                 ApplicationStatus.ENABLED,
                 messages.SERVICE_IS_ACTIVE.format(title=self.title),
@@ -154,6 +154,69 @@ class TestUaEntitlement:
         assert "/some/path" == entitlement.cfg.data_dir
 
 
+class TestHelpInfo:
+    @pytest.fixture
+    def help_file(self, tmpdir):
+        help_file = tmpdir.join("help_data.yaml")
+        help_file.write(
+            "testconcreteentitlement:\n"
+            "    help: |\n"
+            "      Some help\n"
+            "other:\n"
+            "    help: Other help\n"
+        )
+        with mock.patch.object(base, "DEFAULT_HELP_FILE", help_file.strpath):
+            yield help_file
+
+    def test_help_info_from_help_file(
+        self, help_file, concrete_entitlement_factory
+    ):
+        entitlement = concrete_entitlement_factory()
+
+        assert "Some help\n" == entitlement.help_info
+
+    def test_help_info_without_help_file(
+        self, tmpdir, concrete_entitlement_factory
+    ):
+        entitlement = concrete_entitlement_factory()
+
+        with mock.patch.object(
+            base, "DEFAULT_HELP_FILE", tmpdir.join("missing").strpath
+        ):
+            assert "" == entitlement.help_info
+
+    @mock.patch("uaclient.entitlements.base.safe_load")
+    def test_help_index_is_only_parsed_again_when_help_file_changes(
+        self, m_safe_load, help_file, FakeConfig
+    ):
+        m_safe_load.return_value = {"ent": {"help": "Help"}}
+        cfg = FakeConfig()
+
+        assert {"ent": "Help"} == base.get_help_index(cfg)
+        assert {"ent": "Help"} == base.get_help_index(cfg)
+        assert 1 == m_safe_load.call_count
+
+        m_safe_load.return_value = {"ent": {"help": "New help"}}
+        help_file.write("changed")
+        assert {"ent": "New help"} == base.get_help_index(cfg)
+        assert 2 == m_safe_load.call_count
+
+    def test_help_index_without_permission_to_cache_it(
+        self, help_file, FakeConfig
+    ):
+        cfg = FakeConfig()
+
+        with mock.patch.object(
+            cfg, "write_cache", side_effect=PermissionError()
+        ):
+            help_index = base.get_help_index(cfg)
+
+        assert {
+            "testconcreteentitlement": "Some help\n",
+            "other": "Other help",
+        } == help_index
+
+
 class TestUaEntitlementNames:
     @pytest.mark.parametrize(
         "p_name,expected",
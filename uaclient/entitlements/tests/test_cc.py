@@ -116,7 +116,7 @@ class TestCommonCriteriaEntitlementEnable:
     @mock.patch("uaclient.apt.setup_apt_proxy")
     @mock.patch("uaclient.system.should_reboot")
     @mock.patch("uaclient.system.subp")
-    @mock.patch("uaclient.apt.get_apt_cache_policy")
+    @mock.patch("uaclient.apt.get_apt_policy")
     @mock.patch("uaclient.system.get_platform_info")
     @mock.patch("uaclient.contract.apply_contract_overrides")
     def test_enable_configures_apt_sources_and_auth_files(
@@ -136,7 +136,7 @@ class TestCommonCriteriaEntitlementEnable:
     ):
         """When entitled, configure apt repo auth token, pinning and url."""
         m_subp.return_value = ("fakeout", "")
-        m_apt_cache_policy.return_value = "fakeout"
+        m_apt_cache_policy.return_value = apt.AptPolicy([])
         m_should_reboot.return_value = False
         original_exists = os.path.exists
 
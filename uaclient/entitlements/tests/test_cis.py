@@ -36,7 +36,7 @@ class TestCISEntitlementCanEnable:
 
 
 class TestCISEntitlementEnable:
-    @mock.patch("uaclient.apt.get_apt_cache_policy")
+    @mock.patch("uaclient.apt.get_apt_policy")
     @mock.patch("uaclient.apt.setup_apt_proxy")
     @mock.patch("uaclient.system.should_reboot")
     @mock.patch("uaclient.system.subp")
@@ -62,7 +62,7 @@ class TestCISEntitlementEnable:
 
         m_platform_info.side_effect = fake_platform
         m_subp.return_value = ("fakeout", "")
-        m_apt_policy.return_value = "fakeout"
+        m_apt_policy.return_value = apt.AptPolicy([])
         m_should_reboot.return_value = False
 
         with mock.patch(M_REPOPATH + "exists", mock.Mock(return_value=True)):
@@ -968,7 +968,7 @@ class TestApplicationStatus:
             ("https://esm.ubuntu.com/ubuntu", True),
         ),
     )
-    @mock.patch(M_PATH + "apt.get_apt_cache_policy")
+    @mock.patch(M_PATH + "apt.get_apt_policy")
     def test_enabled_status_by_apt_policy(
         self, m_run_apt_policy, policy_url, enabled, entitlement_factory
     ):
@@ -985,7 +985,9 @@ class TestApplicationStatus:
             " release v=18.04,o=UbuntuESMApps,...,n=bionic,l=UbuntuESMApps",
             "  origin esm.ubuntu.com",
         ]
-        m_run_apt_policy.return_value = "\n".join(policy_lines)
+        m_run_apt_policy.return_value = apt.AptPolicy.from_output(
+            "\n".join(policy_lines)
+        )
 
         application_status, explanation = entitlement.application_status()
 
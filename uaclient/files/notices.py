@@ -1,5 +1,6 @@
 import logging
 import os
+import threading
 from collections import namedtuple
 from enum import Enum
 from typing import List
@@ -8,6 +9,8 @@ from uaclient import defaults, event_logger, messages, system, util
 
 LOG = logging.getLogger(__name__)
 event = event_logger.get_event_logger()
+# Service statuses are evaluated concurrently and may add or remove notices
+_notices_lock = threading.Lock()
 NoticeFileDetails = namedtuple(
     "NoticeFileDetails", ["order_id", "label", "is_permanent", "message"]
 )
@@ -131,10 +134,11 @@ class NoticesManager:
         filename = "{}-{}".format(
             notice_details.value.order_id, notice_details.value.label
         )
-        system.write_file(
-            os.path.join(directory, filename),
-            description,
-        )
+        with _notices_lock:
+            system.write_file(
+                os.path.join(directory, filename),
+                description,
+            )
 
     def remove(self, notice_details: Notice):
         """Deletes a notice file.
@@ -154,7 +158,8 @@ class NoticesManager:
         filename = "{}-{}".format(
             notice_details.value.order_id, notice_details.value.label
         )
-        system.ensure_file_absent(os.path.join(directory, filename))
+        with _notices_lock:
+            system.ensure_file_absent(os.path.join(directory, filename))
 
     def list(self) -> List[str]:
         """Gets all the notice files currently saved.
@@ -27,6 +27,7 @@ HTTP_PROXY_OPTION = "http-proxy"
 HTTPS_PROXY_OPTION = "https-proxy"
 
 LIVEPATCH_CMD = "/snap/bin/canonical-livepatch"
+LIVEPATCH_STATE_DIR = "/var/snap/canonical-livepatch/common"
 
 LIVEPATCH_API_V1_KERNELS_SUPPORTED = "/v1/api/kernels/supported"
 
@@ -1,16 +1,25 @@
+import copy
 import json
 import logging
+import logging.handlers
+import queue
 from collections import OrderedDict
 from typing import Any, Dict  # noqa: F401
 
 from uaclient import util
 
+# Most records the file log queue holds before debug records are dropped
+LOG_QUEUE_MAX_SIZE = 10000
+
 
 class RedactionFilter(logging.Filter):
     """A logging filter to redact confidential info"""
 
     def filter(self, record: logging.LogRecord):
-        record.msg = util.redact_sensitive_logs(str(record.msg))
+        # Messages redacting themselves, like readurl's response logs, are
+        # left to be formatted by the handlers emitting the record, if any
+        if not getattr(record.msg, "redacts_itself", False):
+            record.msg = util.redact_sensitive_logs(str(record.msg))
         return True
 
 
@@ -58,3 +67,151 @@ class JsonArrayFormatter(logging.Formatter):
 
         local_log_record["extra"] = extra_message_dict
         return json.dumps(list(local_log_record.values()))
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """A FileHandler which leaves flushing to its QueueLogListener.
+
+    logging.StreamHandler flushes the stream after every record, which is a
+    write to disk per record.
+    """
+
+    def flush(self):
+        pass
+
+    def flush_buffer(self):
+        super().flush()
+
+    def close(self):
+        self.flush_buffer()
+        super().close()
+
+
+class QueueLogListener(logging.handlers.QueueListener):
+    """Handle queued log records on a background thread.
+
+    The handlers are flushed each time the queue runs empty, so records are
+    written out in batches.
+    """
+
+    def __init__(self, log_queue: queue.Queue, *handlers) -> None:
+        super().__init__(log_queue, *handlers)
+        self.log_queue = log_queue
+
+    def dequeue(self, block):
+        try:
+            return self.log_queue.get_nowait()
+        except queue.Empty:
+            if not block:
+                raise
+        self.flush()
+        return self.log_queue.get()
+
+    def enqueue_sentinel(self):
+        # Wait for room rather than fail when the queue is full
+        self.log_queue.put(None)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def flush(self):
+        for handler in self.handlers:
+            if isinstance(handler, BufferedFileHandler):
+                handler.flush_buffer()
+            else:
+                handler.flush()
+
+
+class QueueLogHandler(logging.handlers.QueueHandler):
+    """Send records to a QueueLogListener which writes them to its handlers.
+
+    The queue is bounded: once it is full, debug records are dropped and
+    counted, while records of other levels wait for room. Once the listener
+    is stopped, records are handled in the calling thread.
+    """
+
+    def __init__(self, listener: QueueLogListener) -> None:
+        super().__init__(listener.log_queue)
+        self.log_queue = listener.log_queue
+        self.listener = listener
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Arguments may change once the caller carries on, so merge them
+        # now. Exceptions are formatted here too, but kept apart from the
+        # message for JsonArrayFormatter.
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if not self.listener.running:
+            self.listener.handle(record)
+            self.listener.flush()
+            return
+        if record.levelno > logging.DEBUG:
+            self.log_queue.put(record)
+        else:
+            try:
+                self.log_queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return
+        if self.dropped:
+            self._enqueue_dropped_count()
+
+    def _enqueue_dropped_count(self):
+        dropped, self.dropped = self.dropped, 0
+        record = logging.LogRecord(
+            __name__,
+            logging.WARNING,
+            __file__,
+            0,
+            "Dropped %d debug log records while the log queue was full",
+            (dropped,),
+            None,
+        )
+        self.log_queue.put(self.prepare(record))
+
+    def flush(self):
+        """Wait for the queued records to be written."""
+        if self.listener.running:
+            self.log_queue.join()
+        self.listener.flush()
+
+    def close(self):
+        if self.listener.running:
+            self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+        super().close()
+
+
+def get_queue_file_handler(log_file: str) -> QueueLogHandler:
+    """Return a handler writing JSON records to log_file in the background.
+
+    Closing the handler, as logging.shutdown does on exit, writes out the
+    records still queued.
+    """
+    file_handler = BufferedFileHandler(log_file)
+    file_handler.setFormatter(JsonArrayFormatter())
+    listener = QueueLogListener(queue.Queue(LOG_QUEUE_MAX_SIZE), file_handler)
+    listener.start()
+    return QueueLogHandler(listener)
+
+
+def flush_queue_handlers(logger=None) -> None:
+    """Wait for the records queued by the handlers of logger to be written."""
+    if logger is None:
+        logger = logging.getLogger()
+    for handler in logger.handlers:
+        if isinstance(handler, QueueLogHandler):
+            handler.flush()
@@ -84,6 +84,9 @@ The update is not installed because this system does not have
 {service} enabled.
 """
 SECURITY_UPDATE_INSTALLED = "The update is already installed."
+SECURITY_FIX_NO_FIXED_VERSION = (
+    "{issue} metadata defines no fixed version for {pkg}."
+)
 SECURITY_USE_PRO_TMPL = (
     "For easiest security on {title}, use Ubuntu Pro."
     " https://ubuntu.com/{cloud}/pro."
@@ -124,6 +127,35 @@ token to renew the subscription.
 {{ pro attach NEW_TOKEN }}{end_bold}""".format(
     bold=TxtColor.BOLD, end_bold=TxtColor.ENDC
 )
+SECURITY_API_CACHE_SUMMARY = """\
+Security API cache: {path}
+Entries: {count} ({size} bytes of {max_size} bytes), TTL: {ttl} seconds"""
+SECURITY_API_CACHE_ENTRY = "{state:<6} {age:>8}s {size:>9}B  {url}"
+SECURITY_API_CACHE_CLEARED = "Removed all cached responses from {path}"
+SECURITY_NOTICE_DB_SUMMARY = """\
+Security notice database: {path}
+CVEs: {cves}, USNs: {notices}, source packages: {packages}"""
+SECURITY_NOTICE_DB_IMPORTED = (
+    "Imported {cves} CVEs and {notices} USNs affecting {packages} source"
+    " packages from {path}"
+)
+SECURITY_NOTICE_DB_IMPORT_FAILED = "Unable to import {path}: {error}"
+SECURITY_NOTICE_DB_CLEARED = "Removed security notice database {path}"
+SUBP_TRACE_SUMMARY = """\
+Subprocess trace: {path}
+Commands: {commands}, calls: {calls}, total time: {total:.3f} seconds"""
+SUBP_TRACE_HEADER = (
+    " TOTAL(s)  CALLS   MEAN(s)    MAX(s) FAILED RETRIES  COMMAND (CALLERS)"
+)
+SUBP_TRACE_ENTRY = (
+    "{total:>9.3f} {calls:>6} {mean:>9.3f} {max:>9.3f} {failures:>6}"
+    " {retries:>7}  {cmd} ({callers})"
+)
+SUBP_TRACE_NOT_FOUND = """\
+No subprocess trace found at {path}
+Set the subp_trace feature in uaclient.conf, or UA_FEATURES_SUBP_TRACE=1 in
+the environment, to record one."""
+SUBP_TRACE_CLEARED = "Removed subprocess trace {path}"
 SECURITY_DRY_RUN_WARNING = """\
 {bold}WARNING: The option --dry-run is being used.
 No packages will be installed when running this command.{end_bold}""".format(
@@ -952,6 +984,29 @@ API_MISSING_ARG = FormattedNamedMessage(
 API_NO_ARG_FOR_ENDPOINT = FormattedNamedMessage(
     name="api-no-argument-for-endpoint", msg="{endpoint} accepts no arguments"
 )
+API_ENDPOINT_XOR_BATCH = NamedMessage(
+    name="api-endpoint-xor-batch",
+    msg="Provide either an endpoint, with its --args, or --batch",
+)
+API_BATCH_UNREADABLE_INPUT = FormattedNamedMessage(
+    name="api-batch-unreadable-input",
+    msg="Unable to read batch requests from {source}: {error}",
+)
+API_BATCH_INVALID_INPUT = FormattedNamedMessage(
+    name="api-batch-invalid-input",
+    msg="Batch requests in {source} are not a JSON list: {error}",
+)
+API_BATCH_INVALID_REQUEST = FormattedNamedMessage(
+    name="api-batch-invalid-request",
+    msg=(
+        "Batch request {index} is not an object with an 'endpoint' string"
+        " and optional 'args'"
+    ),
+)
+API_SERVER_INVALID_JSON = FormattedNamedMessage(
+    name="api-server-invalid-json",
+    msg="Request {index} is not valid JSON: {error}",
+)
 
 INVALID_FILE_FORMAT = FormattedNamedMessage(
     name="invalid-file-format", msg="{file_name} is not valid {file_format}"
@@ -1193,6 +1248,11 @@ FIX_CANNOT_INSTALL_PACKAGE = FormattedNamedMessage(
     "Cannot install package {package} version {version}" "",
 )
 
+FIX_CANNOT_READ_ISSUES_FILE = FormattedNamedMessage(
+    "fix-cannot-read-issues-file",
+    "Unable to read security issues from {path}: {error}",
+)
+
 ERROR_PARSING_APT_SOURCE_FILES = FormattedNamedMessage(
     name="error-parsing-apt-source-files",
     msg="""\
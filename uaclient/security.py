@@ -1,10 +1,15 @@
 import copy
 import enum
+import logging
 import socket
 import textwrap
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import cmp_to_key
+from posixpath import join as urljoin
 from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+from urllib.parse import urlencode
 
 from uaclient import (
     apt,
@@ -38,6 +43,8 @@ from uaclient.entitlements.entitlement_status import (
 )
 from uaclient.files import notices
 from uaclient.files.notices import Notice
+from uaclient.security_api_cache import SecurityAPICache
+from uaclient.security_notice_db import SecurityNoticeDB
 from uaclient.status import colorize_commands
 
 CVE_OR_USN_REGEX = (
@@ -49,6 +56,9 @@ API_V1_CVE_TMPL = "cves/{cve}.json"
 API_V1_NOTICES = "notices.json"
 API_V1_NOTICE_TMPL = "notices/{notice}.json"
 
+# Maximum number of concurrent requests issued to the Security API
+RELATED_USNS_MAX_WORKERS = 8
+
 UBUNTU_STANDARD_UPDATES_POCKET = "Ubuntu standard updates"
 UA_INFRA_POCKET = "Ubuntu Pro: ESM Infra"
 UA_APPS_POCKET = "Ubuntu Pro: ESM Apps"
@@ -75,6 +85,25 @@ BinaryPackageFix = NamedTuple(
 )
 
 
+IssueFixData = NamedTuple(
+    "IssueFixData",
+    [
+        ("affected_pkg_status", Dict[str, "CVEPackageStatus"]),
+        ("usn_released_pkgs", Dict[str, Dict[str, Dict[str, str]]]),
+    ],
+)
+
+
+IssueFixPlan = NamedTuple(
+    "IssueFixPlan",
+    [
+        ("issue_id", str),
+        ("unfixed_pkgs", Set[str]),
+        ("binary_fixes", List[Tuple[str, BinaryPackageFix]]),
+    ],
+)
+
+
 @enum.unique
 class FixStatus(enum.Enum):
     """
@@ -108,11 +137,44 @@ class UASecurityClient(serviceclient.UAServiceClient):
 
         return extra_security_params
 
+    def __init__(
+        self, cfg: Optional[UAConfig] = None, use_cache: bool = True
+    ) -> None:
+        super().__init__(cfg=cfg)
+        self.cache = None  # type: Optional[SecurityAPICache]
+        self.notice_db = None  # type: Optional[SecurityNoticeDB]
+        # Faked responses from uaclient.conf must always win over anything
+        # we may have stored from previous runs or imported
+        if self.cfg.features.get("serviceclient_url_responses"):
+            return
+        if use_cache:
+            self.cache = SecurityAPICache.from_cfg(self.cfg)
+        notice_db = SecurityNoticeDB.from_cfg(self.cfg)
+        if notice_db.exists():
+            self.notice_db = notice_db
+
+    def _get_cache_key(
+        self, path: str, query_params: Optional[Dict[str, Any]]
+    ) -> str:
+        url = urljoin(self.cfg.security_url, path.lstrip("/"))
+        if query_params:
+            filtered_params = {
+                k: v for k, v in sorted(query_params.items()) if v is not None
+            }
+            if filtered_params:
+                url += "?" + urlencode(filtered_params)
+        return url
+
     @util.retry(socket.timeout, retry_sleeps=[1, 3, 5])
-    def request_url(
-        self, path, data=None, headers=None, method=None, query_params=None
+    def _request_url(
+        self,
+        path,
+        data=None,
+        headers=None,
+        method=None,
+        query_params=None,
+        timeout: Optional[int] = None,
     ):
-        query_params = self._get_query_params(query_params)
         return super().request_url(
             path=path,
             data=data,
@@ -120,8 +182,63 @@ class UASecurityClient(serviceclient.UAServiceClient):
             method=method,
             query_params=query_params,
             log_response_body=False,
+            timeout=timeout,
         )
 
+    def request_url(
+        self,
+        path,
+        data=None,
+        headers=None,
+        method=None,
+        query_params=None,
+        log_response_body: bool = False,
+        timeout: Optional[int] = None,
+    ):
+        """Request the Security API, serving GETs from the local cache.
+
+        Response bodies are never logged, so log_response_body is only kept
+        for compatibility with UAServiceClient.
+        """
+        query_params = self._get_query_params(query_params)
+        cache = self.cache
+        if cache is None or data is not None or method not in (None, "GET"):
+            return self._request_url(
+                path=path,
+                data=data,
+                headers=headers,
+                method=method,
+                query_params=query_params,
+                timeout=timeout,
+            )
+
+        cache_key = self._get_cache_key(path, query_params)
+        entry = cache.get(cache_key)
+        if entry is not None:
+            if cache.is_fresh(entry):
+                logging.debug("Using cached security API response: %s", path)
+                return entry.response, entry.headers
+            headers = dict(headers or self.headers())
+            headers.update(cache.conditional_headers(entry))
+
+        try:
+            response, response_headers = self._request_url(
+                path=path,
+                headers=headers,
+                method=method,
+                query_params=query_params,
+                timeout=timeout,
+            )
+        except exceptions.UrlError as e:
+            if entry is not None and e.code == 304:
+                logging.debug("Security API response not modified: %s", path)
+                entry = cache.refresh(entry)
+                return entry.response, entry.headers
+            raise
+
+        cache.put(cache_key, response, response_headers)
+        return response, response_headers
+
     def get_cves(
         self,
         query: Optional[str] = None,
@@ -137,6 +254,13 @@ class UASecurityClient(serviceclient.UAServiceClient):
 
         @return: List of CVE instances based on the the JSON response.
         """
+        filters = (query, priority, limit, offset, component, version, status)
+        if package and self.notice_db and all(f is None for f in filters):
+            cves_md = self.notice_db.get_cves_for_package(package)
+            if cves_md:
+                return [
+                    CVE(client=self, response=cve_md) for cve_md in cves_md
+                ]
         query_params = {
             "q": query,
             "priority": priority,
@@ -157,6 +281,11 @@ class UASecurityClient(serviceclient.UAServiceClient):
 
         @return: CVE instance for JSON response from the Security API.
         """
+        if self.notice_db:
+            cve_md = self.notice_db.get_cve(cve_id)
+            if cve_md is not None:
+                logging.debug("Using %s from the local notice db", cve_id)
+                return CVE(client=self, response=cve_md)
         cve_response, _headers = self.request_url(
             API_V1_CVE_TMPL.format(cve=cve_id)
         )
@@ -174,6 +303,16 @@ class UASecurityClient(serviceclient.UAServiceClient):
 
         @return: Sorted list of USN instances based on the the JSON response.
         """
+        usns_md = None  # type: Optional[List[Dict[str, Any]]]
+        filters = (release, limit, offset, order)
+        if details and self.notice_db and all(f is None for f in filters):
+            usns_md = self.notice_db.get_notices_for_cve(details)
+        if usns_md is not None:
+            logging.debug("Using notices for %s from the local db", details)
+            return sorted(
+                [USN(client=self, response=usn_md) for usn_md in usns_md],
+                key=lambda x: x.id,
+            )
         query_params = {
             "details": details,
             "release": release,
@@ -198,6 +337,11 @@ class UASecurityClient(serviceclient.UAServiceClient):
 
         @return: USN instance representing the JSON response.
         """
+        if self.notice_db:
+            notice_md = self.notice_db.get_notice(notice_id)
+            if notice_md is not None:
+                logging.debug("Using %s from the local notice db", notice_id)
+                return USN(client=self, response=notice_md)
         notice_response, _headers = self.request_url(
             API_V1_NOTICE_TMPL.format(notice=notice_id)
         )
@@ -478,27 +622,11 @@ def query_installed_source_pkg_versions() -> Dict[str, Dict[str, str]]:
     The dict keys will be source package name: "krb5". The value will be a dict
     with keys binary_pkg and version.
     """
-    status_field = "${db:Status-Status}"
-    out, _err = system.subp(
-        [
-            "dpkg-query",
-            "-f=${Package},${Source},${Version}," + status_field + "\n",
-            "-W",
-        ]
-    )
-    installed_packages = {}  # type: Dict[str, Dict[str, str]]
-    for pkg_line in out.splitlines():
-        pkg_name, source_pkg_name, pkg_version, status = pkg_line.split(",")
-        if not source_pkg_name:
-            # some package don't define the Source
-            source_pkg_name = pkg_name
-        if "installed" not in status:
-            continue
-        if source_pkg_name in installed_packages:
-            installed_packages[source_pkg_name][pkg_name] = pkg_version
-        else:
-            installed_packages[source_pkg_name] = {pkg_name: pkg_version}
-    return installed_packages
+    source_packages = apt.get_dpkg_status_index().source_packages
+    return {
+        source_pkg: dict(binary_pkgs)
+        for source_pkg, binary_pkgs in source_packages.items()
+    }
 
 
 def merge_usn_released_binary_package_versions(
@@ -550,12 +678,17 @@ def merge_usn_released_binary_package_versions(
     return usn_pkg_versions
 
 
-def get_related_usns(usn, client):
+def get_related_usns(usn, client, max_workers: Optional[int] = None):
     """For a give usn, get the related USNs for it.
 
     For each CVE associated with the given USN, we capture
     other USNs that are related to the CVE. We consider those
     USNs related to the original USN.
+
+    The related USNs are fetched concurrently, using at most max_workers
+    threads. When max_workers is not provided, the
+    security_api_max_workers feature from uaclient.conf is used, falling
+    back to RELATED_USNS_MAX_WORKERS.
     """
 
     # If the usn does not have any associated cves on it,
@@ -564,51 +697,70 @@ def get_related_usns(usn, client):
     if not usn.cves:
         return [usn]
 
+    related_usn_ids = sorted(
+        {
+            related_usn_id
+            for cve in usn.cves
+            for related_usn_id in cve.notices_ids
+        }
+    )
     related_usns = {}
-    for cve in usn.cves:
-        for related_usn_id in cve.notices_ids:
-            if related_usn_id not in related_usns:
-                related_usns[related_usn_id] = client.get_notice(
-                    notice_id=related_usn_id
+    # We already have the original USN, there is no need to fetch it again
+    if usn.id in related_usn_ids:
+        related_usns[usn.id] = usn
+        related_usn_ids.remove(usn.id)
+
+    if related_usn_ids:
+        if max_workers is None:
+            max_workers = int(
+                client.cfg.features.get(
+                    "security_api_max_workers", RELATED_USNS_MAX_WORKERS
                 )
+            )
+        max_workers = max(1, min(max_workers, len(related_usn_ids)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            fetched_usns = executor.map(
+                lambda notice_id: client.get_notice(notice_id=notice_id),
+                related_usn_ids,
+            )
+            related_usns.update(zip(related_usn_ids, fetched_usns))
 
     return list(sorted(related_usns.values(), key=lambda x: x.id))
 
 
-def fix_security_issue_id(
-    cfg: UAConfig, issue_id: str, dry_run: bool = False
-) -> FixStatus:
-    if dry_run:
-        print(messages.SECURITY_DRY_RUN_WARNING)
+def _is_cve_fixed_by_livepatch(
+    issue_id: str, lp_status: Optional[livepatch.LivepatchStatusStatus]
+) -> bool:
+    """Check whether Livepatch already reports a fix for this CVE."""
+    if (
+        lp_status is not None
+        and lp_status.livepatch is not None
+        and lp_status.livepatch.fixes is not None
+    ):
+        for fix in lp_status.livepatch.fixes:
+            if fix.name == issue_id.lower() and fix.patched:
+                print(
+                    messages.CVE_FIXED_BY_LIVEPATCH.format(
+                        issue=issue_id,
+                        version=lp_status.livepatch.version or "N/A",
+                    )
+                )
+                return True
+    return False
 
-    issue_id = issue_id.upper()
-    client = UASecurityClient(cfg=cfg)
-    installed_packages = query_installed_source_pkg_versions()
 
-    # Used to filter out beta pockets during merge_usns
-    beta_pockets = {
-        "esm-apps": _is_pocket_used_by_beta_service(UA_APPS_POCKET, cfg),
-        "esm-infra": _is_pocket_used_by_beta_service(UA_INFRA_POCKET, cfg),
-    }
+def _get_issue_fix_data(
+    client: UASecurityClient,
+    issue_id: str,
+    installed_packages: Dict[str, Dict[str, str]],
+    beta_pockets: Dict[str, bool],
+) -> IssueFixData:
+    """Query the Security API for everything needed to fix a CVE or USN.
 
+    :raises UserFacingError: if the issue cannot be found.
+    :raises SecurityAPIMetadataError: if a USN defines no fixed packages.
+    """
     if "CVE" in issue_id:
-        # Check livepatch status for CVE in fixes before checking CVE api
-        lp_status = livepatch.status()
-        if (
-            lp_status is not None
-            and lp_status.livepatch is not None
-            and lp_status.livepatch.fixes is not None
-        ):
-            for fix in lp_status.livepatch.fixes:
-                if fix.name == issue_id.lower() and fix.patched:
-                    print(
-                        messages.CVE_FIXED_BY_LIVEPATCH.format(
-                            issue=issue_id,
-                            version=lp_status.livepatch.version or "N/A",
-                        )
-                    )
-                    return FixStatus.SYSTEM_NON_VULNERABLE
-
         try:
             cve = client.get_cve(cve_id=issue_id)
             usns = client.get_notices(details=issue_id)
@@ -654,16 +806,368 @@ def fix_security_issue_id(
                 ),
                 issue_id=issue_id,
             )
+    return IssueFixData(
+        affected_pkg_status=affected_pkg_status,
+        usn_released_pkgs=usn_released_pkgs,
+    )
+
+
+def _get_beta_pockets(cfg: UAConfig) -> Dict[str, bool]:
+    """Return which pockets should be filtered out during merge_usns."""
+    return {
+        "esm-apps": _is_pocket_used_by_beta_service(UA_APPS_POCKET, cfg),
+        "esm-infra": _is_pocket_used_by_beta_service(UA_INFRA_POCKET, cfg),
+    }
+
+
+def fix_security_issue_id(
+    cfg: UAConfig,
+    issue_id: str,
+    dry_run: bool = False,
+    use_cache: bool = True,
+) -> FixStatus:
+    if dry_run:
+        print(messages.SECURITY_DRY_RUN_WARNING)
+
+    issue_id = issue_id.upper()
+    client = UASecurityClient(cfg=cfg, use_cache=use_cache)
+    installed_packages = query_installed_source_pkg_versions()
+
+    # Used to filter out beta pockets during merge_usns
+    beta_pockets = _get_beta_pockets(cfg)
+
+    if "CVE" in issue_id:
+        # Check livepatch status for CVE in fixes before checking CVE api
+        if _is_cve_fixed_by_livepatch(issue_id, livepatch.status()):
+            return FixStatus.SYSTEM_NON_VULNERABLE
+
+    fix_data = _get_issue_fix_data(
+        client=client,
+        issue_id=issue_id,
+        installed_packages=installed_packages,
+        beta_pockets=beta_pockets,
+    )
     return prompt_for_affected_packages(
         cfg=cfg,
         issue_id=issue_id,
-        affected_pkg_status=affected_pkg_status,
+        affected_pkg_status=fix_data.affected_pkg_status,
         installed_packages=installed_packages,
-        usn_released_pkgs=usn_released_pkgs,
+        usn_released_pkgs=fix_data.usn_released_pkgs,
         dry_run=dry_run,
     )
 
 
+def _plan_issue_fix(
+    issue_id: str,
+    fix_data: IssueFixData,
+    installed_packages: Dict[str, Dict[str, str]],
+) -> IssueFixPlan:
+    """Describe the affected packages of an issue and what would fix them.
+
+    Nothing is installed here: the binary packages which need an upgrade
+    are returned alongside the pocket providing the fix, so that the fixes
+    of several issues can be applied together.
+    """
+    affected_pkg_status = fix_data.affected_pkg_status
+    usn_released_pkgs = fix_data.usn_released_pkgs
+    count = len(affected_pkg_status)
+    print_affected_packages_header(issue_id, affected_pkg_status)
+
+    unfixed_pkgs = set()  # type: Set[str]
+    binary_fixes = []  # type: List[Tuple[str, BinaryPackageFix]]
+    pkg_index = 0
+    pkg_status_groups = group_by_usn_package_status(
+        affected_pkg_status, usn_released_pkgs
+    )
+    for status_value, pkg_status_group in sorted(pkg_status_groups.items()):
+        if status_value != "released":
+            print(
+                _format_packages_message(
+                    pkg_status_list=pkg_status_group,
+                    pkg_index=pkg_index,
+                    num_pkgs=count,
+                )
+            )
+            pkg_index += len(pkg_status_group)
+            unfixed_pkgs.update(src_pkg for src_pkg, _ in pkg_status_group)
+            continue
+
+        src_pocket_pkgs = defaultdict(list)
+        for src_pkg, pkg_status in pkg_status_group:
+            src_pocket_pkgs[pkg_status.pocket_source].append(
+                (src_pkg, pkg_status)
+            )
+
+        for pocket in [
+            UBUNTU_STANDARD_UPDATES_POCKET,
+            UA_INFRA_POCKET,
+            UA_APPS_POCKET,
+        ]:
+            pkg_src_group = src_pocket_pkgs[pocket]
+            if not pkg_src_group:
+                continue
+            print(
+                _format_packages_message(
+                    pkg_status_list=pkg_src_group,
+                    pkg_index=pkg_index,
+                    num_pkgs=count,
+                )
+            )
+            pkg_index += len(pkg_src_group)
+
+            pocket_fixes = []
+            for src_pkg, _ in pkg_src_group:
+                usn_released_src = usn_released_pkgs.get(src_pkg, {})
+                for binary_pkg, version in installed_packages[src_pkg].items():
+                    if binary_pkg not in usn_released_src:
+                        print(
+                            "- "
+                            + messages.SECURITY_FIX_NO_FIXED_VERSION.format(
+                                issue=issue_id, pkg=binary_pkg
+                            )
+                        )
+                        unfixed_pkgs.add(src_pkg)
+                        continue
+                    fixed_version = usn_released_src[binary_pkg].get(
+                        "version", ""
+                    )
+                    if not apt.compare_versions(fixed_version, version, "le"):
+                        pocket_fixes.append(
+                            (
+                                pocket,
+                                BinaryPackageFix(
+                                    source_pkg=src_pkg,
+                                    binary_pkg=binary_pkg,
+                                    fixed_version=fixed_version,
+                                ),
+                            )
+                        )
+
+            if not pocket_fixes:
+                print(messages.SECURITY_UPDATE_INSTALLED)
+            binary_fixes += pocket_fixes
+
+    return IssueFixPlan(
+        issue_id=issue_id,
+        unfixed_pkgs=unfixed_pkgs,
+        binary_fixes=binary_fixes,
+    )
+
+
+def _compare_binary_fixes(
+    fix1: Tuple[str, BinaryPackageFix], fix2: Tuple[str, BinaryPackageFix]
+) -> int:
+    """Order pocket and fix pairs from the highest fixed version down."""
+    version1, version2 = fix1[1].fixed_version, fix2[1].fixed_version
+    if apt.compare_versions(version1, version2, "gt"):
+        return -1
+    if apt.compare_versions(version1, version2, "lt"):
+        return 1
+    return 0
+
+
+def _merge_binary_fixes(
+    plans: List[IssueFixPlan],
+) -> Dict[str, List[Tuple[str, BinaryPackageFix]]]:
+    """Merge the fixes of every plan by binary package.
+
+    :returns: A dict mapping each binary package to the pocket and fix
+              required by each issue affecting it, highest fixed version
+              first.
+    """
+    merged_fixes = {}  # type: Dict[str, List[Tuple[str, BinaryPackageFix]]]
+    for plan in plans:
+        for pocket, binary_fix in plan.binary_fixes:
+            merged_fixes.setdefault(binary_fix.binary_pkg, []).append(
+                (pocket, binary_fix)
+            )
+    for binary_fixes in merged_fixes.values():
+        binary_fixes.sort(key=cmp_to_key(_compare_binary_fixes))
+    return merged_fixes
+
+
+def _install_merged_binary_fixes(
+    cfg: UAConfig,
+    merged_fixes: Dict[str, List[Tuple[str, BinaryPackageFix]]],
+    dry_run: bool,
+) -> Dict[str, str]:
+    """Install every merged fix in a single apt transaction.
+
+    Each binary package is upgraded to its candidate version, as long as it
+    satisfies the fixed version of at least one issue from a pocket the
+    machine can install from. Issues requiring higher versions, or versions
+    from unavailable pockets, are left unfixed.
+
+    :returns: The version each binary package was upgraded to.
+    """
+    if not merged_fixes:
+        return {}
+
+    # If we are running on --dry-run mode, we don't need to be root
+    # to understand what will happen with the system
+    if not util.we_are_currently_root() and not dry_run:
+        print(messages.SECURITY_APT_NON_ROOT)
+        return {}
+
+    available_pockets = {}  # type: Dict[str, bool]
+    upgrade_versions = {}  # type: Dict[str, str]
+    for binary_pkg, binary_fixes in sorted(merged_fixes.items()):
+        missing_versions = []  # type: List[str]
+        for pocket, binary_fix in binary_fixes:
+            if pocket not in available_pockets:
+                available_pockets[pocket] = _check_pocket_requirements(
+                    cfg, pocket, dry_run
+                )
+            if not available_pockets[pocket]:
+                continue
+            # Enabling the service of a pocket may change the candidate
+            candidate_version = apt.get_pkg_candidate_version(binary_pkg)
+            if candidate_version and apt.compare_versions(
+                binary_fix.fixed_version, candidate_version, "le"
+            ):
+                upgrade_versions[binary_pkg] = candidate_version
+                break
+            if binary_fix.fixed_version not in missing_versions:
+                missing_versions.append(binary_fix.fixed_version)
+                print(
+                    "- "
+                    + messages.FIX_CANNOT_INSTALL_PACKAGE.format(
+                        package=binary_pkg,
+                        version=binary_fix.fixed_version,
+                    ).msg
+                )
+
+    if upgrade_versions and not _run_package_upgrades(
+        sorted(upgrade_versions), dry_run
+    ):
+        return {}
+
+    return upgrade_versions
+
+
+def fix_security_issue_ids(
+    cfg: UAConfig,
+    issue_ids: List[str],
+    dry_run: bool = False,
+    use_cache: bool = True,
+) -> FixStatus:
+    """Fix several CVEs and USNs at once.
+
+    The installed packages are only queried once and the fixes for every
+    issue are merged into a single apt transaction, instead of running
+    apt once per issue and pocket.
+
+    :returns: The worst FixStatus among all the issues.
+    """
+    if dry_run:
+        print(messages.SECURITY_DRY_RUN_WARNING)
+
+    # Preserve the order the issues were given in, dropping duplicates
+    issue_ids = list(
+        OrderedDict.fromkeys(issue_id.upper() for issue_id in issue_ids)
+    )
+    client = UASecurityClient(cfg=cfg, use_cache=use_cache)
+    installed_packages = query_installed_source_pkg_versions()
+    beta_pockets = _get_beta_pockets(cfg)
+    lp_status = None
+    if any("CVE" in issue_id for issue_id in issue_ids):
+        lp_status = livepatch.status()
+
+    plans = []  # type: List[IssueFixPlan]
+    issue_status = OrderedDict()  # type: Dict[str, FixStatus]
+    for issue_id in issue_ids:
+        print()
+        if "CVE" in issue_id and _is_cve_fixed_by_livepatch(
+            issue_id, lp_status
+        ):
+            issue_status[issue_id] = FixStatus.SYSTEM_NON_VULNERABLE
+            continue
+        try:
+            fix_data = _get_issue_fix_data(
+                client=client,
+                issue_id=issue_id,
+                installed_packages=installed_packages,
+                beta_pockets=beta_pockets,
+            )
+        except exceptions.UserFacingError as e:
+            print(e.msg)
+            issue_status[issue_id] = FixStatus.SYSTEM_STILL_VULNERABLE
+            continue
+        plans.append(
+            _plan_issue_fix(
+                issue_id=issue_id,
+                fix_data=fix_data,
+                installed_packages=installed_packages,
+            )
+        )
+
+    print()
+    merged_fixes = _merge_binary_fixes(plans)
+    installed_versions = _install_merged_binary_fixes(
+        cfg, merged_fixes, dry_run
+    )
+    if installed_versions and system.should_reboot(
+        installed_pkgs=set(installed_versions)
+    ):
+        print(
+            messages.ENABLE_REBOOT_REQUIRED_TMPL.format(
+                operation="fix operation"
+            )
+        )
+        notices.add(
+            Notice.ENABLE_REBOOT_REQUIRED,
+            operation="fix operation",
+        )
+
+    issue_unfixed_pkgs = {}  # type: Dict[str, Set[str]]
+    for plan in plans:
+        unfixed_pkgs = set(plan.unfixed_pkgs)
+        issue_installed_pkgs = set()
+        for _, binary_fix in plan.binary_fixes:
+            installed_version = installed_versions.get(binary_fix.binary_pkg)
+            if installed_version and apt.compare_versions(
+                binary_fix.fixed_version, installed_version, "le"
+            ):
+                issue_installed_pkgs.add(binary_fix.binary_pkg)
+            else:
+                unfixed_pkgs.add(binary_fix.source_pkg)
+
+        if unfixed_pkgs:
+            issue_unfixed_pkgs[plan.issue_id] = unfixed_pkgs
+            issue_status[plan.issue_id] = FixStatus.SYSTEM_STILL_VULNERABLE
+        elif issue_installed_pkgs and system.should_reboot(
+            installed_pkgs=issue_installed_pkgs
+        ):
+            issue_status[
+                plan.issue_id
+            ] = FixStatus.SYSTEM_VULNERABLE_UNTIL_REBOOT
+        else:
+            issue_status[plan.issue_id] = FixStatus.SYSTEM_NON_VULNERABLE
+
+    for issue_id in issue_ids:
+        if issue_id in issue_unfixed_pkgs:
+            print(
+                _format_unfixed_packages_msg(
+                    list(issue_unfixed_pkgs[issue_id])
+                )
+            )
+        if issue_status[issue_id] == FixStatus.SYSTEM_NON_VULNERABLE:
+            fix_message = messages.SECURITY_ISSUE_RESOLVED
+        else:
+            fix_message = messages.SECURITY_ISSUE_NOT_RESOLVED
+        print(
+            util.handle_unicode_characters(fix_message.format(issue=issue_id))
+        )
+
+    for status in (
+        FixStatus.SYSTEM_STILL_VULNERABLE,
+        FixStatus.SYSTEM_VULNERABLE_UNTIL_REBOOT,
+    ):
+        if status in issue_status.values():
+            return status
+    return FixStatus.SYSTEM_NON_VULNERABLE
+
+
 def get_affected_packages_from_cves(cves, installed_packages):
     affected_pkgs = {}  # type: Dict[str, CVEPackageStatus]
 
@@ -1369,43 +1873,43 @@ def _check_subscription_is_expired(
     return False
 
 
-def upgrade_packages_and_attach(
-    cfg: UAConfig, upgrade_pkgs: List[str], pocket: str, dry_run: bool
+def _check_pocket_requirements(
+    cfg: UAConfig, pocket: str, dry_run: bool
 ) -> bool:
-    """Upgrade available packages to fix a CVE.
+    """Make sure the machine can install packages from the given pocket.
 
-    Upgrade all packages in upgrades_packages and, if necessary,
-    prompt regarding system attach prior to upgrading Ubuntu Pro packages.
+    Packages coming from Ubuntu Pro pockets require an attached machine
+    with a valid subscription and the related service enabled. The user is
+    prompted to fix any of those requirements when possible.
 
-    :return: True if package upgrade completed or unneeded, False otherwise.
+    :return: True if packages from the pocket can be installed.
     """
-    if not upgrade_pkgs:
+    if pocket == UBUNTU_STANDARD_UPDATES_POCKET:
         return True
 
-    # If we are running on --dry-run mode, we don't need to be root
-    # to understand what will happen with the system
-    if not util.we_are_currently_root() and not dry_run:
-        print(messages.SECURITY_APT_NON_ROOT)
+    # We are now using status-cache because non-root users won't
+    # have access to the private machine_token.json file. We
+    # can use the status-cache as a proxy for the attached
+    # information
+    status_cache = cfg.read_cache("status-cache") or {}
+    if not status_cache.get("attached", False):
+        if not _check_attached(cfg, dry_run):
+            return False
+    elif _check_subscription_is_expired(
+        status_cache=status_cache, cfg=cfg, dry_run=dry_run
+    ):
         return False
 
-    if pocket != UBUNTU_STANDARD_UPDATES_POCKET:
-        # We are now using status-cache because non-root users won't
-        # have access to the private machine_token.json file. We
-        # can use the status-cache as a proxy for the attached
-        # information
-        status_cache = cfg.read_cache("status-cache") or {}
-        if not status_cache.get("attached", False):
-            if not _check_attached(cfg, dry_run):
-                return False
-        elif _check_subscription_is_expired(
-            status_cache=status_cache, cfg=cfg, dry_run=dry_run
-        ):
-            return False
+    # Returns False if the subscription does not have the required service
+    # enabled
+    return _check_subscription_for_required_service(pocket, cfg, dry_run)
 
-        if not _check_subscription_for_required_service(pocket, cfg, dry_run):
-            # User subscription does not have required service enabled
-            return False
 
+def _run_package_upgrades(upgrade_pkgs: List[str], dry_run: bool) -> bool:
+    """Run a single apt transaction upgrading all upgrade_pkgs.
+
+    :return: True if the upgrade succeeded or if running in dry-run mode.
+    """
     print(
         colorize_commands(
             [
@@ -1430,3 +1934,28 @@ def upgrade_packages_and_attach(
             return False
 
     return True
+
+
+def upgrade_packages_and_attach(
+    cfg: UAConfig, upgrade_pkgs: List[str], pocket: str, dry_run: bool
+) -> bool:
+    """Upgrade available packages to fix a CVE.
+
+    Upgrade all packages in upgrades_packages and, if necessary,
+    prompt regarding system attach prior to upgrading Ubuntu Pro packages.
+
+    :return: True if package upgrade completed or unneeded, False otherwise.
+    """
+    if not upgrade_pkgs:
+        return True
+
+    # If we are running on --dry-run mode, we don't need to be root
+    # to understand what will happen with the system
+    if not util.we_are_currently_root() and not dry_run:
+        print(messages.SECURITY_APT_NON_ROOT)
+        return False
+
+    if not _check_pocket_requirements(cfg, pocket, dry_run):
+        return False
+
+    return _run_package_upgrades(upgrade_pkgs, dry_run)
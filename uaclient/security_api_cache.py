@@ -0,0 +1,242 @@
+"""
+On-disk cache for Security API responses.
+
+Responses are stored one per file under the data dir, keyed by the full
+request URL. Fresh entries are served without any network access, while
+stale entries are revalidated with a conditional GET using the ETag and
+Last-Modified headers returned by the server.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from uaclient import system, util
+
+LOG = logging.getLogger(__name__)
+
+SECURITY_API_CACHE_SUBDIR = "security-api-cache"
+DEFAULT_SECURITY_API_CACHE_TTL = 6 * 60 * 60  # 6 hours
+DEFAULT_SECURITY_API_CACHE_MAX_SIZE = 50 * 1024 * 1024  # 50 MiB
+
+CachedResponse = NamedTuple(
+    "CachedResponse",
+    [
+        ("url", str),
+        ("response", Any),
+        ("headers", Dict[str, str]),
+        ("fetched_at", float),
+        ("etag", Optional[str]),
+        ("last_modified", Optional[str]),
+    ],
+)
+
+CacheEntryInfo = NamedTuple(
+    "CacheEntryInfo",
+    [
+        ("url", str),
+        ("size", int),
+        ("fetched_at", float),
+        ("last_used", float),
+        ("fresh", bool),
+        ("etag", Optional[str]),
+    ],
+)
+
+
+def _get_header(headers: Any, name: str) -> Optional[str]:
+    """Case-insensitive header lookup on HTTPMessage or plain dicts."""
+    if not headers:
+        return None
+    for key in headers.keys():
+        if key.lower() == name.lower():
+            return headers[key]
+    return None
+
+
+class SecurityAPICache:
+    """Size-bounded LRU cache of Security API responses with a TTL.
+
+    Each entry lives in its own file named after the hash of the URL. The
+    file modification time tracks the last time the entry was used, which
+    is what eviction is based on once the cache grows beyond max_size.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        ttl: int = DEFAULT_SECURITY_API_CACHE_TTL,
+        max_size: int = DEFAULT_SECURITY_API_CACHE_MAX_SIZE,
+    ) -> None:
+        self.directory = directory
+        self.ttl = ttl
+        self.max_size = max_size
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "SecurityAPICache":
+        """Build the cache using the data dir and features from cfg."""
+        features = cfg.features
+        return cls(
+            directory=os.path.join(cfg.data_dir, SECURITY_API_CACHE_SUBDIR),
+            ttl=int(
+                features.get(
+                    "security_api_cache_ttl", DEFAULT_SECURITY_API_CACHE_TTL
+                )
+            ),
+            max_size=int(
+                features.get(
+                    "security_api_cache_max_size",
+                    DEFAULT_SECURITY_API_CACHE_MAX_SIZE,
+                )
+            ),
+        )
+
+    def _entry_path(self, url: str) -> str:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, digest + ".json")
+
+    def _entry_paths(self) -> List[str]:
+        try:
+            filenames = os.listdir(self.directory)
+        except OSError:
+            return []
+        return [
+            os.path.join(self.directory, filename)
+            for filename in filenames
+            if filename.endswith(".json")
+        ]
+
+    @staticmethod
+    def _load_entry(path: str) -> Optional[CachedResponse]:
+        try:
+            with open(path, "r") as stream:
+                content = json.load(stream, cls=util.DatetimeAwareJSONDecoder)
+            return CachedResponse(
+                url=content["url"],
+                response=content["response"],
+                headers=content.get("headers", {}),
+                fetched_at=float(content["fetched_at"]),
+                etag=content.get("etag"),
+                last_modified=content.get("last_modified"),
+            )
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            LOG.debug(
+                "Ignoring invalid security API cache entry %s: %s", path, e
+            )
+            return None
+
+    def is_fresh(self, entry: CachedResponse) -> bool:
+        return time.time() - entry.fetched_at < self.ttl
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """Return the cached entry for url, if any, marking it as used."""
+        path = self._entry_path(url)
+        if not os.path.exists(path):
+            return None
+        entry = self._load_entry(path)
+        if entry is None or entry.url != url:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry
+
+    def _write_entry(self, entry: CachedResponse) -> None:
+        content = json.dumps(
+            {
+                "url": entry.url,
+                "response": entry.response,
+                "headers": entry.headers,
+                "fetched_at": entry.fetched_at,
+                "etag": entry.etag,
+                "last_modified": entry.last_modified,
+            },
+            cls=util.DatetimeAwareJSONEncoder,
+        )
+        try:
+            system.write_file(self._entry_path(entry.url), content)
+        except OSError as e:
+            # Non-root users can still query the Security API, they just
+            # cannot store the responses.
+            LOG.debug("Unable to write security API cache entry: %s", e)
+            return
+        self._evict()
+
+    def put(self, url: str, response: Any, headers: Any) -> CachedResponse:
+        """Store a response and the validators needed to revalidate it."""
+        headers_dict = {key: headers[key] for key in (headers or {}).keys()}
+        entry = CachedResponse(
+            url=url,
+            response=response,
+            headers=headers_dict,
+            fetched_at=time.time(),
+            etag=_get_header(headers, "ETag"),
+            last_modified=_get_header(headers, "Last-Modified"),
+        )
+        self._write_entry(entry)
+        return entry
+
+    def refresh(self, entry: CachedResponse) -> CachedResponse:
+        """Mark an entry as fresh again after a 304 Not Modified response."""
+        refreshed = entry._replace(fetched_at=time.time())
+        self._write_entry(refreshed)
+        return refreshed
+
+    def conditional_headers(self, entry: CachedResponse) -> Dict[str, str]:
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until we fit in max_size."""
+        entries = []
+        total_size = 0
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_size += stat.st_size
+        for _mtime, size, path in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            LOG.debug("Evicting security API cache entry: %s", path)
+            try:
+                system.ensure_file_absent(path)
+            except OSError:
+                continue
+            total_size -= size
+
+    def entries(self) -> List[CacheEntryInfo]:
+        """Return information about every entry, most recently used first."""
+        infos = []
+        for path in self._entry_paths():
+            entry = self._load_entry(path)
+            if entry is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            infos.append(
+                CacheEntryInfo(
+                    url=entry.url,
+                    size=stat.st_size,
+                    fetched_at=entry.fetched_at,
+                    last_used=stat.st_mtime,
+                    fresh=self.is_fresh(entry),
+                    etag=entry.etag,
+                )
+            )
+        return sorted(infos, key=lambda info: info.last_used, reverse=True)
+
+    def clear(self) -> None:
+        for path in self._entry_paths():
+            system.ensure_file_absent(path)
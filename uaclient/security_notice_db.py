@@ -0,0 +1,222 @@
+"""
+Local database of Ubuntu security notices (USNs) and CVEs.
+
+The database is built from an exported dump of the Security API, a JSON
+object with "cves" and/or "notices" lists holding the same objects the
+API returns for cves/<id>.json and notices/<id>.json. It is stored in
+sqlite with indexes on CVE id, USN id and source package name, so that
+'pro fix' can be answered without network access.
+"""
+import contextlib
+import gzip
+import json
+import logging
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+from uaclient import system
+
+LOG = logging.getLogger(__name__)
+
+SECURITY_NOTICE_DB_FILE = "security-notices.db"
+
+NoticeDBStats = NamedTuple(
+    "NoticeDBStats", [("cves", int), ("notices", int), ("packages", int)]
+)
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS cves (
+        id TEXT PRIMARY KEY,
+        response TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS notices (
+        id TEXT PRIMARY KEY,
+        published TEXT,
+        response TEXT NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS cve_notices (
+        cve_id TEXT NOT NULL,
+        notice_id TEXT NOT NULL,
+        PRIMARY KEY (cve_id, notice_id)
+    )""",
+    """CREATE INDEX IF NOT EXISTS cve_notices_notice_id
+        ON cve_notices (notice_id)""",
+    """CREATE TABLE IF NOT EXISTS source_packages (
+        source_pkg TEXT NOT NULL,
+        issue_id TEXT NOT NULL,
+        PRIMARY KEY (source_pkg, issue_id)
+    )""",
+)
+
+
+def _cve_source_packages(cve: Dict[str, Any]) -> Iterable[str]:
+    for package in cve.get("packages", []):
+        if package.get("name"):
+            yield package["name"]
+
+
+def _notice_source_packages(notice: Dict[str, Any]) -> Iterable[str]:
+    for pkgs in notice.get("release_packages", {}).values():
+        for pkg in pkgs:
+            if pkg.get("is_source"):
+                yield pkg["name"]
+            elif "/" in pkg.get("source_link", ""):
+                yield pkg["source_link"].split("/")[-1]
+
+
+class SecurityNoticeDB:
+    """Read and populate the local security notice database."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    @classmethod
+    def from_cfg(cls, cfg) -> "SecurityNoticeDB":
+        """Use the security_notice_db feature path or the data dir one."""
+        path = cfg.features.get("security_notice_db")
+        if not path:
+            path = os.path.join(cfg.data_dir, SECURITY_NOTICE_DB_FILE)
+        return cls(path)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @contextlib.contextmanager
+    def _connect(self):
+        # A connection per operation keeps the database usable from the
+        # threads get_related_usns uses to fetch notices.
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _query_responses(
+        self, query: str, params: Iterable[Any]
+    ) -> List[Dict[str, Any]]:
+        if not self.exists():
+            return []
+        try:
+            with self._connect() as conn:
+                rows = conn.execute(query, tuple(params)).fetchall()
+        except sqlite3.Error as e:
+            LOG.warning(
+                "Unable to read security notice database %s: %s", self.path, e
+            )
+            return []
+        return [json.loads(response) for (response,) in rows]
+
+    def get_cve(self, cve_id: str) -> Optional[Dict[str, Any]]:
+        responses = self._query_responses(
+            "SELECT response FROM cves WHERE id = ?", [cve_id.upper()]
+        )
+        return responses[0] if responses else None
+
+    def get_notice(self, notice_id: str) -> Optional[Dict[str, Any]]:
+        responses = self._query_responses(
+            "SELECT response FROM notices WHERE id = ?", [notice_id.upper()]
+        )
+        return responses[0] if responses else None
+
+    def get_notices_for_cve(
+        self, cve_id: str
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return the notices fixing cve_id, or None if the CVE is unknown."""
+        if self.get_cve(cve_id) is None:
+            return None
+        return self._query_responses(
+            "SELECT notices.response FROM cve_notices"
+            " JOIN notices ON notices.id = cve_notices.notice_id"
+            " WHERE cve_notices.cve_id = ? ORDER BY notices.id",
+            [cve_id.upper()],
+        )
+
+    def get_cves_for_package(self, source_pkg: str) -> List[Dict[str, Any]]:
+        return self._query_responses(
+            "SELECT cves.response FROM source_packages"
+            " JOIN cves ON cves.id = source_packages.issue_id"
+            " WHERE source_packages.source_pkg = ? ORDER BY cves.id",
+            [source_pkg],
+        )
+
+    def stats(self) -> NoticeDBStats:
+        if not self.exists():
+            return NoticeDBStats(cves=0, notices=0, packages=0)
+        with self._connect() as conn:
+            counts = [
+                conn.execute(query).fetchone()[0]
+                for query in (
+                    "SELECT COUNT(*) FROM cves",
+                    "SELECT COUNT(*) FROM notices",
+                    "SELECT COUNT(DISTINCT source_pkg) FROM source_packages",
+                )
+            ]
+        return NoticeDBStats(*counts)
+
+    def import_dump(self, dump: Dict[str, Any]) -> NoticeDBStats:
+        """Insert or replace every CVE and notice found in dump.
+
+        :return: The number of CVEs, notices and source packages imported.
+        """
+        cves = dump.get("cves", [])
+        notices = dump.get("notices", [])
+        cve_notices = set()
+        source_packages = set()
+        for cve in cves:
+            cve_id = cve["id"].upper()
+            for notice_id in cve.get("notices_ids", []):
+                cve_notices.add((cve_id, notice_id.upper()))
+            for source_pkg in _cve_source_packages(cve):
+                source_packages.add((source_pkg, cve_id))
+        for notice in notices:
+            notice_id = notice["id"].upper()
+            for cve_id in notice.get("cves_ids", []):
+                cve_notices.add((cve_id.upper(), notice_id))
+            for source_pkg in _notice_source_packages(notice):
+                source_packages.add((source_pkg, notice_id))
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            for statement in _SCHEMA:
+                conn.execute(statement)
+            conn.executemany(
+                "INSERT OR REPLACE INTO cves (id, response) VALUES (?, ?)",
+                ((cve["id"].upper(), json.dumps(cve)) for cve in cves),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO notices (id, published, response)"
+                " VALUES (?, ?, ?)",
+                (
+                    (
+                        notice["id"].upper(),
+                        notice.get("published"),
+                        json.dumps(notice),
+                    )
+                    for notice in notices
+                ),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO cve_notices VALUES (?, ?)",
+                sorted(cve_notices),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO source_packages VALUES (?, ?)",
+                sorted(source_packages),
+            )
+        return NoticeDBStats(
+            cves=len(cves),
+            notices=len(notices),
+            packages=len({source_pkg for source_pkg, _ in source_packages}),
+        )
+
+    def import_file(self, dump_path: str) -> NoticeDBStats:
+        """Import a JSON dump, which may be gzip compressed."""
+        opener = gzip.open if dump_path.endswith(".gz") else open
+        with opener(dump_path, "rt") as stream:  # type: ignore
+            dump = json.load(stream)
+        return self.import_dump(dump)
+
+    def clear(self) -> None:
+        system.ensure_file_absent(self.path)
@@ -1,16 +1,38 @@
+import logging
+import os
 import re
 import textwrap
+import threading
 from collections import defaultdict
 from enum import Enum
 from functools import lru_cache
 from random import choice
-from typing import Any, DefaultDict, Dict, List, Tuple, Union  # noqa: F401
+from typing import (  # noqa: F401
+    Any,
+    DefaultDict,
+    Dict,
+    FrozenSet,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
 import apt  # type: ignore
 
 from uaclient import livepatch, messages
-from uaclient.apt import PreserveAptCfg, get_apt_cache, get_esm_cache
+from uaclient.apt import (
+    APT_LISTS_DIR,
+    APT_PREFERENCES_DIR,
+    APT_SOURCES_LIST,
+    APT_SOURCES_LIST_DIR,
+    DPKG_STATUS_FILE,
+    PreserveAptCfg,
+    get_apt_cache,
+    get_esm_cache,
+)
 from uaclient.config import UAConfig
+from uaclient.defaults import ESM_APT_ROOTDIR
 from uaclient.entitlements import ESMAppsEntitlement, ESMInfraEntitlement
 from uaclient.entitlements.entitlement_status import (
     ApplicabilityStatus,
@@ -21,6 +43,7 @@ from uaclient.system import (
     REBOOT_PKGS_FILE_PATH,
     get_distro_info,
     get_kernel_info,
+    get_paths_fingerprint,
     get_platform_info,
     is_current_series_lts,
     is_supported,
@@ -30,6 +53,8 @@ from uaclient.system import (
 
 ESM_SERVICES = ("esm-infra", "esm-apps")
 
+SECURITY_STATUS_CACHE_KEY = "security-status-cache"
+
 
 class UpdateStatus(Enum):
     "Represents the availability of a security package."
@@ -93,10 +118,9 @@ def get_origin_for_package(package: apt.package.Package) -> str:
             return "unknown"
         available_origins = package.candidate.origins
 
+    service_map = get_origin_information_to_service_map()
     for origin in available_origins:
-        service = get_origin_information_to_service_map().get(
-            (origin.origin, origin.archive), ""
-        )
+        service = service_map.get((origin.origin, origin.archive), "")
         if service in ESM_SERVICES:
             return service
         if origin.origin == "Ubuntu":
@@ -122,6 +146,71 @@ def get_update_status(service_name: str, ua_info: Dict[str, Any]) -> str:
     return UpdateStatus.UNAVAILABLE.value
 
 
+def _get_version_service(
+    version: apt.package.Version, service_map: Dict[Tuple[str, str], str]
+) -> Tuple[Optional[str], str]:
+    """Return the service providing version, if any, and its origin site."""
+    for origin in version.origins:
+        service = service_map.get((origin.origin, origin.archive))
+        if service:
+            return service, origin.site
+    return None, ""
+
+
+def _is_upgradable(
+    package: apt.package.Package, installed: apt.package.Version
+) -> bool:
+    # The candidate is the best version apt knows about for the package,
+    # so when it is not newer than the installed one there is nothing
+    # left to report.
+    candidate = package.candidate
+    return candidate is not None and candidate > installed
+
+
+def _get_package_security_updates(
+    package: apt.package.Package,
+    esm_cache,
+    esm_package_names: FrozenSet[str],
+    service_map: Dict[Tuple[str, str], str],
+) -> DefaultDict[str, List[Tuple[apt.package.Version, str]]]:
+    """Return the available updates for an installed package, by service.
+
+    :param esm_package_names: names of the packages in esm_cache.
+    :param service_map: result of get_origin_information_to_service_map.
+    """
+    result = defaultdict(list)
+    installed = package.installed
+    if _is_upgradable(package, installed):
+        for version in package.versions:
+            if not version > installed:
+                continue
+            service, site = _get_version_service(version, service_map)
+            if service:
+                result[service].append((version, site))
+                continue
+            # Also no need to report backports at least for now...
+            expected_origin = version.origins[0]
+            if "backports" not in expected_origin.archive:
+                result["standard-updates"].append(
+                    (version, expected_origin.site)
+                )
+
+    # This loop should be only used if the user does not have esm
+    # (infra or apps) enabled, and it is shorter than the
+    # previous one
+    if package.name in esm_package_names:
+        esm_package = esm_cache[package.name]
+        if _is_upgradable(esm_package, installed):
+            for version in esm_package.versions:
+                if not version > installed:
+                    continue
+                service, site = _get_version_service(version, service_map)
+                if service:
+                    result[service].append((version, site))
+
+    return result
+
+
 def filter_security_updates(
     packages: List[apt.package.Package],
 ) -> DefaultDict[str, List[Tuple[apt.package.Version, str]]]:
@@ -138,54 +227,127 @@ def filter_security_updates(
     # sources live in a private folder, we need a different apt cache
     # to access them.
     with PreserveAptCfg(get_esm_cache) as esm_cache:
-        esm_cache = get_esm_cache()
-
+        esm_package_names = frozenset(esm_cache.keys())
+        service_map = get_origin_information_to_service_map()
         for package in packages:
             if package.is_installed:
-                for version in package.versions:
-                    if version > package.installed:
-                        counted_as_security = False
-                        for origin in version.origins:
-                            service = (
-                                get_origin_information_to_service_map().get(
-                                    (origin.origin, origin.archive)
-                                )
-                            )
-                            if service:
-                                result[service].append((version, origin.site))
-                                counted_as_security = True
-                                # No need to loop through all the origins
-                                break
-                        # Also no need to report backports at least for now...
-                        expected_origin = version.origins[0]
-                        if (
-                            not counted_as_security
-                            and "backports" not in expected_origin.archive
-                        ):
-                            result["standard-updates"].append(
-                                (version, expected_origin.site)
-                            )
-
-                # This loop should be only used if the user does not have esm
-                # (infra or apps) enabled, and it is shorter than the
-                # previous one
-                if package.name in esm_cache:
-                    esm_package = esm_cache[package.name]
-                    for version in esm_package.versions:
-                        if version > package.installed:
-                            for origin in version.origins:
-                                service = get_origin_information_to_service_map().get(  # noqa
-                                    (origin.origin, origin.archive)
-                                )
-                                if service:
-                                    result[service].append(
-                                        (version, origin.site)
-                                    )
-                                    break
+                package_updates = _get_package_security_updates(
+                    package, esm_cache, esm_package_names, service_map
+                )
+                for service, updates in package_updates.items():
+                    result[service].extend(updates)
 
     return result
 
 
+class AptCacheSnapshot:
+    """Installed packages with their origin and available updates.
+
+    The snapshot is built walking the system apt cache once, with the ESM
+    cache opened alongside it, so every report derived from it shares the
+    cost of opening both caches.
+    """
+
+    def __init__(
+        self,
+        packages_by_origin: DefaultDict[str, List[apt.package.Package]],
+        updates_by_package: Dict[
+            str, DefaultDict[str, List[Tuple[apt.package.Version, str]]]
+        ],
+    ) -> None:
+        self.packages_by_origin = packages_by_origin
+        self.updates_by_package = updates_by_package
+
+    def security_updates(
+        self, packages: Optional[List[apt.package.Package]] = None
+    ) -> DefaultDict[str, List[Tuple[apt.package.Version, str]]]:
+        """Same as filter_security_updates, without reopening any cache.
+
+        :param packages: installed packages to look updates for, all of
+            them if None.
+        """
+        if packages is None:
+            packages = self.packages_by_origin["all"]
+        result = defaultdict(
+            list
+        )  # type: DefaultDict[str, List[Tuple[apt.package.Version, str]]]
+        for package in packages:
+            if package.name not in self.updates_by_package:
+                continue
+            package_updates = self.updates_by_package[package.name]
+            for service, updates in package_updates.items():
+                result[service].extend(updates)
+        return result
+
+
+_apt_cache_snapshot = (
+    None
+)  # type: Optional[Tuple[List[List[Any]], AptCacheSnapshot]]
+_apt_cache_snapshot_lock = threading.Lock()
+
+
+def get_apt_cache_snapshot_fingerprint() -> List[List[Any]]:
+    """Fingerprint the dpkg and apt files the apt caches are read from."""
+    return get_paths_fingerprint(
+        [
+            DPKG_STATUS_FILE,
+            APT_LISTS_DIR,
+            os.path.join(ESM_APT_ROOTDIR, "var/lib/apt/lists"),
+            APT_SOURCES_LIST,
+            APT_SOURCES_LIST_DIR,
+            APT_PREFERENCES_DIR,
+        ]
+    )
+
+
+def get_apt_cache_snapshot() -> AptCacheSnapshot:
+    """Return the snapshot of the apt caches, kept until they change.
+
+    The returned snapshot is shared between callers and must not be
+    modified.
+    """
+    global _apt_cache_snapshot
+    with _apt_cache_snapshot_lock:
+        fingerprint = get_apt_cache_snapshot_fingerprint()
+        if (
+            _apt_cache_snapshot is None
+            or _apt_cache_snapshot[0] != fingerprint
+        ):
+            _apt_cache_snapshot = (fingerprint, _build_apt_cache_snapshot())
+        return _apt_cache_snapshot[1]
+
+
+def invalidate_apt_cache_snapshot() -> None:
+    global _apt_cache_snapshot
+    with _apt_cache_snapshot_lock:
+        _apt_cache_snapshot = None
+
+
+def _build_apt_cache_snapshot() -> AptCacheSnapshot:
+    packages_by_origin = defaultdict(list)
+    updates_by_package = {}
+
+    with PreserveAptCfg(get_apt_cache) as cache:
+        # Opened within the same PreserveAptCfg block, so the apt config is
+        # only saved and restored once.
+        esm_cache = get_esm_cache()
+        esm_package_names = frozenset(esm_cache.keys())
+        service_map = get_origin_information_to_service_map()
+        for package in cache:
+            if not package.is_installed:
+                continue
+            packages_by_origin["all"].append(package)
+            packages_by_origin[get_origin_for_package(package)].append(package)
+            updates_by_package[package.name] = _get_package_security_updates(
+                package, esm_cache, esm_package_names, service_map
+            )
+
+    return AptCacheSnapshot(
+        packages_by_origin=packages_by_origin,
+        updates_by_package=updates_by_package,
+    )
+
+
 def get_ua_info(cfg: UAConfig) -> Dict[str, Any]:
     """Returns the Pro information based on the config object."""
     ua_info = {
@@ -299,25 +461,41 @@ def create_updates_list(
     return updates
 
 
-def security_status_dict(cfg: UAConfig) -> Dict[str, Any]:
-    """Returns the status of security updates on a system.
-
-    The returned dict has a 'packages' key with a list of all installed
-    packages which can receive security updates, with or without ESM,
-    reflecting the availability of the update based on the Pro status.
+def get_security_status_fingerprint(cfg: UAConfig) -> List[List[Any]]:
+    """Fingerprint the inputs security_status_dict depends on.
 
-    There is also a summary with the Ubuntu Pro information and the package
-    counts.
+    The installed packages come from the dpkg status file, the available
+    updates from the system and ESM apt lists, and the Pro information from
+    the machine token and the apt sources enabled for each service.
     """
+    token_file = cfg.machine_token_file
+    paths = [
+        DPKG_STATUS_FILE,
+        APT_LISTS_DIR,
+        os.path.join(ESM_APT_ROOTDIR, "var/lib/apt/lists"),
+        APT_SOURCES_LIST,
+        APT_SOURCES_LIST_DIR,
+        token_file.private_file.path,
+        token_file.public_file.path,
+    ]
+    if token_file.machine_token_overlay_path:
+        paths.append(token_file.machine_token_overlay_path)
+
+    return get_paths_fingerprint(paths)
+
+
+def _get_security_status_packages_dict(cfg: UAConfig) -> Dict[str, Any]:
+    """Compute the summary and packages parts of security_status_dict."""
     ua_info = get_ua_info(cfg)
 
     summary = {"ua": ua_info}  # type: Dict[str, Any]
-    packages_by_origin = get_installed_packages_by_origin()
+    snapshot = get_apt_cache_snapshot()
+    packages_by_origin = snapshot.packages_by_origin
 
     installed_packages = packages_by_origin["all"]
     summary["num_installed_packages"] = len(installed_packages)
 
-    security_upgradable_versions = filter_security_updates(installed_packages)
+    security_upgradable_versions = snapshot.security_updates()
     # This version of security-status only cares about security updates
     security_upgradable_versions["standard-updates"] = []
 
@@ -343,12 +521,71 @@ def security_status_dict(cfg: UAConfig) -> Dict[str, Any]:
     summary["num_standard_security_updates"] = len(
         security_upgradable_versions["standard-security"]
     )
+
+    return {"summary": summary, "packages": updates}
+
+
+def _read_security_status_cache(
+    cfg: UAConfig, fingerprint: List[List[Any]]
+) -> Optional[Dict[str, Any]]:
+    cached = cfg.read_cache(SECURITY_STATUS_CACHE_KEY, silent=True)
+    if not isinstance(cached, dict):
+        return None
+    if cached.get("fingerprint") != fingerprint:
+        logging.debug("Security status cache is outdated")
+        return None
+    result = cached.get("result")
+    if not isinstance(result, dict):
+        return None
+    return result
+
+
+def _write_security_status_cache(
+    cfg: UAConfig, fingerprint: List[List[Any]], result: Dict[str, Any]
+) -> None:
+    try:
+        cfg.write_cache(
+            SECURITY_STATUS_CACHE_KEY,
+            {"fingerprint": fingerprint, "result": result},
+        )
+    except OSError as e:
+        # Non-root users can compute the status, they just cannot store it
+        logging.debug("Unable to write security status cache: %s", e)
+
+
+def security_status_dict(
+    cfg: UAConfig, refresh: bool = False
+) -> Dict[str, Any]:
+    """Returns the status of security updates on a system.
+
+    The returned dict has a 'packages' key with a list of all installed
+    packages which can receive security updates, with or without ESM,
+    reflecting the availability of the update based on the Pro status.
+
+    There is also a summary with the Ubuntu Pro information and the package
+    counts.
+
+    The packages and Pro information are cached until the dpkg status, the
+    apt lists, the apt sources or the machine token change. The reboot and
+    Livepatch information is always computed.
+
+    :param refresh: ignore the cached result and compute everything again.
+    """
+    fingerprint = get_security_status_fingerprint(cfg)
+    result = None
+    if not refresh:
+        result = _read_security_status_cache(cfg, fingerprint)
+    if result is None:
+        result = _get_security_status_packages_dict(cfg)
+        _write_security_status_cache(cfg, fingerprint, result)
+
+    summary = dict(result["summary"])
     summary["reboot_required"] = get_reboot_status().value
 
     return {
         "_schema_version": "0.1",
         "summary": summary,
-        "packages": updates,
+        "packages": result["packages"],
         "livepatch": {"fixed_cves": get_livepatch_fixed_cves()},
     }
 
@@ -527,14 +764,15 @@ def security_status(cfg: UAConfig):
     is_lts = is_current_series_lts()
     is_attached = get_ua_info(cfg)["attached"]
 
-    packages_by_origin = get_installed_packages_by_origin()
-    security_upgradable_versions_infra = filter_security_updates(
+    snapshot = get_apt_cache_snapshot()
+    packages_by_origin = snapshot.packages_by_origin
+    security_upgradable_versions_infra = snapshot.security_updates(
         packages_by_origin["main"]
         + packages_by_origin["restricted"]
         + packages_by_origin["esm-infra"],
     )["esm-infra"]
 
-    security_upgradable_versions_apps = filter_security_updates(
+    security_upgradable_versions_apps = snapshot.security_updates(
         packages_by_origin["universe"]
         + packages_by_origin["multiverse"]
         + packages_by_origin["esm-apps"],
@@ -627,16 +865,17 @@ def list_unavailable_packages():
 
 
 def list_esm_infra_packages(cfg):
-    packages_by_origin = get_installed_packages_by_origin()
+    snapshot = get_apt_cache_snapshot()
+    packages_by_origin = snapshot.packages_by_origin
     infra_packages = packages_by_origin["esm-infra"]
     mr_packages = packages_by_origin["main"] + packages_by_origin["restricted"]
 
     all_infra_packages = infra_packages + mr_packages
 
     infra_updates = set()
-    security_upgradable_versions = filter_security_updates(all_infra_packages)[
-        "esm-infra"
-    ]
+    security_upgradable_versions = snapshot.security_updates(
+        all_infra_packages
+    )["esm-infra"]
     for update, _ in security_upgradable_versions:
         infra_updates.add(update.package)
 
@@ -681,7 +920,8 @@ def list_esm_infra_packages(cfg):
 
 
 def list_esm_apps_packages(cfg):
-    packages_by_origin = get_installed_packages_by_origin()
+    snapshot = get_apt_cache_snapshot()
+    packages_by_origin = snapshot.packages_by_origin
     apps_packages = packages_by_origin["esm-apps"]
     um_packages = (
         packages_by_origin["universe"] + packages_by_origin["multiverse"]
@@ -690,9 +930,9 @@ def list_esm_apps_packages(cfg):
     all_apps_packages = apps_packages + um_packages
 
     apps_updates = set()
-    security_upgradable_versions = filter_security_updates(all_apps_packages)[
-        "esm-apps"
-    ]
+    security_upgradable_versions = snapshot.security_updates(
+        all_apps_packages
+    )["esm-apps"]
     for update, _ in security_upgradable_versions:
         apps_updates.add(update.package)
 
@@ -6,7 +6,14 @@ from typing import Any, Dict, Optional, Tuple, Type
 from urllib import error
 from urllib.parse import urlencode
 
-from uaclient import config, exceptions, system, util, version
+from uaclient import (
+    config,
+    connection_pool,
+    exceptions,
+    system,
+    util,
+    version,
+)
 
 
 class UAServiceClient(metaclass=abc.ABCMeta):
@@ -77,6 +84,7 @@ class UAServiceClient(metaclass=abc.ABCMeta):
                 method=method,
                 timeout=timeout_to_use,
                 log_response_body=log_response_body,
+                urlopen=self._get_urlopen(),
             )
         except error.URLError as e:
             body = None
@@ -98,6 +106,13 @@ class UAServiceClient(metaclass=abc.ABCMeta):
             )
         return response, headers
 
+    def _get_urlopen(self):
+        """Reuse connections unless the http_connection_pool feature is off."""
+        enabled = self.cfg.features.get("http_connection_pool", True)
+        if str(enabled).lower() == "false":
+            return None
+        return connection_pool.get_connection_pool().urlopen
+
     def _get_response_overlay(self, url: str):
         """Return a list of fake response dicts for a given URL.
 
@@ -118,8 +118,9 @@ class SnapPackage:
 
 
 def get_installed_snaps() -> List[SnapPackage]:
-    out, _ = system.subp(
-        ["snap", "list", "--color", "never", "--unicode", "never"]
+    out, _ = system.probe(
+        ["snap", "list", "--color", "never", "--unicode", "never"],
+        system.PROBE_TTL_SHORT,
     )
     apps = out.splitlines()
     apps = apps[1:]
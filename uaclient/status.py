@@ -3,21 +3,30 @@ import logging
 import os
 import sys
 import textwrap
+import time
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple  # noqa: F401
 
 from uaclient import (
+    apt,
     event_logger,
     exceptions,
     livepatch,
     messages,
+    system,
     util,
     version,
 )
 from uaclient.config import UA_CONFIGURABLE_KEYS, UAConfig
 from uaclient.contract import get_available_resources, get_contract_information
-from uaclient.defaults import ATTACH_FAIL_DATE_FORMAT, PRINT_WRAP_WIDTH
+from uaclient.defaults import (
+    ATTACH_FAIL_DATE_FORMAT,
+    NOTICES_PERMANENT_DIRECTORY,
+    NOTICES_TEMPORARY_DIRECTORY,
+    PRINT_WRAP_WIDTH,
+)
 from uaclient.entitlements import entitlement_factory
 from uaclient.entitlements.entitlement_status import (
     ContractStatus,
@@ -25,6 +34,7 @@ from uaclient.entitlements.entitlement_status import (
     UserFacingConfigStatus,
     UserFacingStatus,
 )
+from uaclient.entitlements.fips import FIPSCommonEntitlement
 from uaclient.files import notices
 from uaclient.files.notices import Notice
 from uaclient.messages import TxtColor
@@ -33,6 +43,9 @@ event = event_logger.get_event_logger()
 LOG = logging.getLogger(__name__)
 
 
+# Maximum number of services whose status is evaluated concurrently
+STATUS_MAX_WORKERS = 8
+
 ESSENTIAL = "essential"
 STANDARD = "standard"
 ADVANCED = "advanced"
@@ -114,6 +127,106 @@ DEFAULT_STATUS = {
 }  # type: Dict[str, Any]
 
 
+# Seconds the livepatch status may be reused for at most
+LIVEPATCH_STATUS_TTL = 60
+
+
+def _machine_token_fingerprint(cfg: UAConfig) -> List[List[Any]]:
+    token_file = cfg.machine_token_file
+    paths = [token_file.private_file.path, token_file.public_file.path]
+    if token_file.machine_token_overlay_path:
+        paths.append(token_file.machine_token_overlay_path)
+    return system.get_paths_fingerprint(paths)
+
+
+def _config_fingerprint(cfg: UAConfig) -> List[List[Any]]:
+    return system.get_paths_fingerprint([cfg.cfg_path] if cfg.cfg_path else [])
+
+
+def _kernel_fingerprint(cfg: UAConfig) -> List[Optional[str]]:
+    kernel_info = system.get_kernel_info()
+    return [
+        kernel_info.uname_release,
+        kernel_info.proc_version_signature_version,
+    ]
+
+
+def _apt_fingerprint(cfg: UAConfig) -> List[List[Any]]:
+    return system.get_paths_fingerprint(
+        [
+            apt.APT_SOURCES_LIST,
+            apt.APT_SOURCES_LIST_DIR,
+            apt.APT_PREFERENCES_DIR,
+            apt.APT_LISTS_DIR,
+            apt.DPKG_STATUS_FILE,
+        ]
+    )
+
+
+def _livepatch_fingerprint(cfg: UAConfig) -> List[Any]:
+    # canonical-livepatch reports patch and kernel state that no file
+    # reliably reflects, so this also changes every LIVEPATCH_STATUS_TTL
+    # seconds to get its status again
+    return [
+        int(time.time() // LIVEPATCH_STATUS_TTL)
+    ] + system.get_paths_fingerprint(
+        [livepatch.LIVEPATCH_CMD, livepatch.LIVEPATCH_STATE_DIR]
+    )
+
+
+def _fips_fingerprint(cfg: UAConfig) -> List[Any]:
+    # The mtime of files in /proc says nothing about their content
+    try:
+        fips_enabled = system.load_file(FIPSCommonEntitlement.FIPS_PROC_FILE)
+    except OSError:
+        fips_enabled = None
+    return [fips_enabled] + system.get_paths_fingerprint(
+        [
+            system.REBOOT_FILE_CHECK_PATH,
+            system.REBOOT_PKGS_FILE_PATH,
+            NOTICES_PERMANENT_DIRECTORY,
+            NOTICES_TEMPORARY_DIRECTORY,
+        ]
+    )
+
+
+# Functions fingerprinting the inputs the status of entitlements depends
+# on, by name. Entitlements list the inputs they depend on in their
+# status_inputs attribute, on top of COMMON_STATUS_INPUTS.
+STATUS_INPUTS = {
+    "machine-token": _machine_token_fingerprint,
+    "config": _config_fingerprint,
+    "kernel": _kernel_fingerprint,
+    "apt": _apt_fingerprint,
+    "livepatch": _livepatch_fingerprint,
+    "fips": _fips_fingerprint,
+}  # type: Dict[str, Callable[[UAConfig], Any]]
+
+COMMON_STATUS_INPUTS = ("machine-token", "config", "kernel")
+
+
+def _get_service_status_inputs(
+    cfg: UAConfig, ent, fingerprints: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Return the fingerprint of each input the status of ent depends on.
+
+    Services blocking ent are part of its status, so their inputs are
+    included as well.
+
+    :param fingerprints: fingerprints already computed, by input name.
+    """
+    names = list(COMMON_STATUS_INPUTS) + list(ent.status_inputs)
+    for service in ent.incompatible_services:
+        names.extend(service.entitlement.status_inputs)
+
+    inputs = {}
+    for name in names:
+        if name not in fingerprints:
+            fingerprints[name] = STATUS_INPUTS[name](cfg)
+        inputs[name] = fingerprints[name]
+    return inputs
+
+
 def _get_blocked_by_services(ent):
     return [
         {
@@ -166,6 +279,58 @@ def _attached_service_status(ent, inapplicable_resources) -> Dict[str, Any]:
     }
 
 
+def _timed_attached_service_status(
+    ent, inapplicable_resources
+) -> Dict[str, Any]:
+    start = time.monotonic()
+    service_status = _attached_service_status(ent, inapplicable_resources)
+    LOG.debug(
+        "Status of %s computed in %.3fs", ent.name, time.monotonic() - start
+    )
+    return service_status
+
+
+def _get_attached_services_status(
+    cfg: UAConfig, ents: List[Any], inapplicable_resources: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Return the status of each entitlement, in the same order as ents.
+
+    Most of the time is spent waiting on subprocesses, so the statuses are
+    evaluated concurrently, using at most the status_max_workers feature
+    from uaclient.conf threads, falling back to STATUS_MAX_WORKERS. Setting
+    it to 1 evaluates them one after the other.
+    """
+    if not ents:
+        return []
+    max_workers = int(
+        cfg.features.get("status_max_workers", STATUS_MAX_WORKERS)
+    )
+    max_workers = max(1, min(max_workers, len(ents)))
+    start = time.monotonic()
+    if max_workers == 1:
+        statuses = [
+            _timed_attached_service_status(ent, inapplicable_resources)
+            for ent in ents
+        ]
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            statuses = list(
+                executor.map(
+                    lambda ent: _timed_attached_service_status(
+                        ent, inapplicable_resources
+                    ),
+                    ents,
+                )
+            )
+    LOG.debug(
+        "Status of %d services computed in %.3fs using %d threads",
+        len(ents),
+        time.monotonic() - start,
+        max_workers,
+    )
+    return statuses
+
+
 def _attached_status(cfg: UAConfig) -> Dict[str, Any]:
     """Return configuration of attached status as a dictionary."""
     notices.remove(Notice.AUTO_ATTACH_RETRY_FULL_NOTICE)
@@ -215,6 +380,16 @@ def _attached_status(cfg: UAConfig) -> Dict[str, Any]:
         if not resource.get("available")
     }
 
+    # Only root can read and write the cache, which lives in the private
+    # data dir. Services are only computed again when one of their inputs
+    # changed since the cache was written.
+    is_root = util.we_are_currently_root()
+    cached_services = {}  # type: Dict[str, Any]
+    if is_root:
+        cached_services = cfg.read_cache("status-services-cache") or {}
+    services_cache = {}  # type: Dict[str, Any]
+    fingerprints = {}  # type: Dict[str, Any]
+    outdated_ents = []
     for resource in resources:
         try:
             ent_cls = entitlement_factory(
@@ -223,10 +398,25 @@ def _attached_status(cfg: UAConfig) -> Dict[str, Any]:
         except exceptions.EntitlementNotFoundError:
             continue
         ent = ent_cls(cfg)
-        response["services"].append(
-            _attached_service_status(ent, inapplicable_resources)
-        )
+        inputs = _get_service_status_inputs(cfg, ent, fingerprints)
+        cached_service = cached_services.get(ent.name, {})
+        if cached_service.get("inputs") == inputs:
+            services_cache[ent.name] = cached_service
+        else:
+            services_cache[ent.name] = {"inputs": inputs}
+            outdated_ents.append(ent)
+
+    service_statuses = _get_attached_services_status(
+        cfg, outdated_ents, inapplicable_resources
+    )
+    for ent, service_status in zip(outdated_ents, service_statuses):
+        services_cache[ent.name]["status"] = service_status
+    response["services"] = [
+        service["status"] for service in services_cache.values()
+    ]
     response["services"].sort(key=lambda x: x.get("name", ""))
+    if is_root:
+        cfg.write_cache("status-services-cache", services_cache)
 
     support = cfg.machine_token_file.entitlements.get("support", {}).get(
         "entitlement"
@@ -0,0 +1,144 @@
+"""
+Opt-in tracing of the commands run through system.subp.
+
+When the subp_trace feature is set, either in uaclient.conf or with the
+UA_FEATURES_SUBP_TRACE environment variable, every command appends a JSON
+line to the trace file with its redacted command line, duration, return
+code, number of retries and the module that ran it. The feature value is
+the trace file path, or any true value for the default one in data_dir.
+The pro CLI and the lib/ scripts call configure once their config is
+read.
+'pro debug trace-summary' aggregates the trace by command.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from types import FrameType  # noqa: F401
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+TRACE_DISABLED_VALUES = ("", "0", "false", "no", "off")
+
+SubpTraceSummary = NamedTuple(
+    "SubpTraceSummary",
+    [
+        ("cmd", str),
+        ("calls", int),
+        ("total", float),
+        ("max", float),
+        ("failures", int),
+        ("retries", int),
+        ("callers", List[str]),
+    ],
+)
+
+trace_file = None  # type: Optional[str]
+_trace_lock = threading.Lock()
+
+
+def get_trace_file(cfg) -> Optional[str]:
+    """Return the trace file configured by the subp_trace feature."""
+    value = cfg.features.get("subp_trace")
+    if value is None or str(value).lower() in TRACE_DISABLED_VALUES:
+        return None
+    if isinstance(value, str) and value.lower() not in ("1", "true", "yes"):
+        return value
+    return cfg.data_path("subp-trace")
+
+
+def configure(cfg) -> None:
+    global trace_file
+    trace_file = get_trace_file(cfg)
+
+
+def _get_caller() -> str:
+    frame = sys._getframe(1)  # type: Optional[FrameType]
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module not in (__name__, "uaclient.system"):
+            return module
+        frame = frame.f_back
+    return ""
+
+
+def record(
+    cmd: str,
+    duration: float,
+    returncode: Optional[int],
+    retries: int,
+    failed: bool,
+) -> None:
+    """Append a command run to the trace file, if tracing is enabled."""
+    path = trace_file
+    if not path:
+        return
+    line = json.dumps(
+        {
+            "time": time.time(),
+            "pid": os.getpid(),
+            "cmd": cmd,
+            "duration": round(duration, 6),
+            "returncode": returncode,
+            "retries": retries,
+            "failed": failed,
+            "caller": _get_caller(),
+        }
+    )
+    try:
+        with _trace_lock:
+            with open(path, "a") as stream:
+                stream.write(line + "\n")
+    except OSError as e:
+        logging.debug("Unable to write subp trace %s: %s", path, str(e))
+
+
+def load_records(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path) as stream:
+        for line in stream:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A partial line left by an interrupted run
+                continue
+
+
+def summarize(records: Iterable[Dict[str, Any]]) -> List[SubpTraceSummary]:
+    """Aggregate trace records by command, by cumulative time first."""
+    summaries = {}  # type: Dict[str, Dict[str, Any]]
+    for entry in records:
+        summary = summaries.setdefault(
+            entry["cmd"],
+            {
+                "calls": 0,
+                "total": 0.0,
+                "max": 0.0,
+                "failures": 0,
+                "retries": 0,
+                "callers": set(),
+            },
+        )
+        summary["calls"] += 1
+        summary["total"] += entry["duration"]
+        summary["max"] = max(summary["max"], entry["duration"])
+        if entry.get("failed"):
+            summary["failures"] += 1
+        summary["retries"] += entry.get("retries", 0)
+        if entry.get("caller"):
+            summary["callers"].add(entry["caller"])
+    return sorted(
+        (
+            SubpTraceSummary(
+                cmd=cmd,
+                calls=summary["calls"],
+                total=summary["total"],
+                max=summary["max"],
+                failures=summary["failures"],
+                retries=summary["retries"],
+                callers=sorted(summary["callers"]),
+            )
+            for cmd, summary in summaries.items()
+        ),
+        key=lambda summary: (-summary.total, summary.cmd),
+    )
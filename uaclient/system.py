@@ -1,23 +1,40 @@
 import datetime
+import fcntl
+import json
 import logging
 import os
 import pathlib
 import re
 import subprocess
 import tempfile
+import threading
 import time
 import uuid
 from functools import lru_cache
 from shutil import rmtree
-from typing import Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
 
-from uaclient import exceptions, messages, util
+from uaclient import defaults, exceptions, messages, subp_trace, util
 
 REBOOT_FILE_CHECK_PATH = "/var/run/reboot-required"
 REBOOT_PKGS_FILE_PATH = "/var/run/reboot-required.pkgs"
 ETC_MACHINE_ID = "/etc/machine-id"
 DBUS_MACHINE_ID = "/var/lib/dbus/machine-id"
 DISTRO_INFO_CSV = "/usr/share/distro-info/ubuntu.csv"
+SYSTEM_PROBES_CACHE_FILE = os.path.join(
+    defaults.UAC_RUN_PATH, "system-probes.json"
+)
 
 # N.B. this relies on the version normalisation we perform in get_platform_info
 REGEX_OS_RELEASE_VERSION = (
@@ -95,7 +112,7 @@ def get_kernel_info() -> KernelInfo:
 @lru_cache(maxsize=None)
 def get_lscpu_arch() -> str:
     """used for livepatch"""
-    out, _err = subp(["lscpu"])
+    out, _err = probe(["lscpu"], PROBE_TTL_BOOT)
     for line in out.splitlines():
         if line.strip().startswith("Architecture:"):
             arch = line.split(":")[1].strip()
@@ -111,14 +128,14 @@ def get_lscpu_arch() -> str:
 
 @lru_cache(maxsize=None)
 def get_dpkg_arch() -> str:
-    out, _err = subp(["dpkg", "--print-architecture"])
+    out, _err = probe(["dpkg", "--print-architecture"], PROBE_TTL_BOOT)
     return out.strip()
 
 
 @lru_cache(maxsize=None)
 def get_virt_type() -> str:
     try:
-        out, _ = subp(["systemd-detect-virt"])
+        out, _ = probe(["systemd-detect-virt"], PROBE_TTL_BOOT)
         return out.strip()
     except exceptions.ProcessExecutionError:
         return ""
@@ -199,7 +216,9 @@ def get_platform_info() -> Dict[str, str]:
 
 @lru_cache(maxsize=None)
 def is_lts(series: str) -> bool:
-    out, _err = subp(["/usr/bin/ubuntu-distro-info", "--supported-esm"])
+    out, _err = probe(
+        ["/usr/bin/ubuntu-distro-info", "--supported-esm"], PROBE_TTL_HOUR
+    )
     return series in out
 
 
@@ -210,7 +229,9 @@ def is_current_series_lts() -> bool:
 
 @lru_cache(maxsize=None)
 def is_supported(series: str) -> bool:
-    out, _err = subp(["/usr/bin/ubuntu-distro-info", "--supported"])
+    out, _err = probe(
+        ["/usr/bin/ubuntu-distro-info", "--supported"], PROBE_TTL_HOUR
+    )
     return series in out
 
 
@@ -219,8 +240,9 @@ def is_active_esm(series: str) -> bool:
     """Return True when Ubuntu series supports ESM and is actively in ESM."""
     if not is_lts(series):
         return False
-    out, _err = subp(
-        ["/usr/bin/ubuntu-distro-info", "--series", series, "-yeol"]
+    out, _err = probe(
+        ["/usr/bin/ubuntu-distro-info", "--series", series, "-yeol"],
+        PROBE_TTL_HOUR,
     )
     return int(out) <= 0
 
@@ -239,13 +261,15 @@ def is_container(run_path: str = "/run") -> bool:
     # we do not identify a schroot as a container, we are explicitly
     # using the 'ischroot' command here.
     try:
-        subp(["ischroot"])
+        probe(["ischroot"], PROBE_TTL_BOOT)
         return False
     except exceptions.ProcessExecutionError:
         pass
 
     try:
-        subp(["systemd-detect-virt", "--quiet", "--container"])
+        probe(
+            ["systemd-detect-virt", "--quiet", "--container"], PROBE_TTL_BOOT
+        )
         return True
     except (IOError, OSError):
         pass
@@ -390,6 +414,20 @@ def write_file(filename: str, content: str, mode: int = 0o644) -> None:
     @param content: The content to write to the file.
     @param mode: The filesystem mode to set on the file.
     """
+    write_lines(filename, (content,), mode)
+
+
+def write_lines(
+    filename: str, lines: Iterable[str], mode: int = 0o644
+) -> None:
+    """Write lines to the provided filename as they are produced.
+
+    Like write_file, the file is only replaced once every line is written.
+
+    @param filename: The full path of the file to write.
+    @param lines: The strings to write to the file.
+    @param mode: The filesystem mode to set on the file.
+    """
     tmpf = None
     try:
         os.makedirs(os.path.dirname(filename), exist_ok=True)
@@ -399,7 +437,8 @@ def write_file(filename: str, content: str, mode: int = 0o644) -> None:
         logging.debug(
             "Writing file %s atomically via tempfile %s", filename, tmpf.name
         )
-        tmpf.write(content.encode("utf-8"))
+        for line in lines:
+            tmpf.write(line.encode("utf-8"))
         tmpf.flush()
         tmpf.close()
         os.chmod(tmpf.name, mode)
@@ -410,6 +449,33 @@ def write_file(filename: str, content: str, mode: int = 0o644) -> None:
         raise e
 
 
+def get_paths_fingerprint(paths: Sequence[str]) -> List[List[Any]]:
+    """Return [path, mtime_ns, size] for each path, or each file in it.
+
+    Directories are not walked recursively. Missing paths are reported
+    with None as mtime and size, so that creating them is noticed too.
+    """
+    fingerprint = []  # type: List[List[Any]]
+    for path in paths:
+        try:
+            if os.path.isdir(path):
+                entries = sorted(
+                    (entry.path, entry.stat())
+                    for entry in os.scandir(path)
+                    if entry.is_file()
+                )
+            else:
+                entries = [(path, os.stat(path))]
+        except OSError:
+            fingerprint.append([path, None, None])
+            continue
+        fingerprint.extend(
+            [entry_path, stat.st_mtime_ns, stat.st_size]
+            for entry_path, stat in entries
+        )
+    return fingerprint
+
+
 def ensure_file_absent(file_path: str) -> None:
     """Remove a file if it exists, logging a message about removal."""
     if os.path.exists(file_path):
@@ -417,6 +483,10 @@ def ensure_file_absent(file_path: str) -> None:
         os.unlink(file_path)
 
 
+# The return code of the last command run by each thread, for the trace
+_subp_state = threading.local()
+
+
 def _subp(
     args: Sequence[str],
     rcs: Optional[List[int]] = None,
@@ -452,6 +522,7 @@ def _subp(
             bytes_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env
         )
         (out, err) = proc.communicate(timeout=timeout)
+        _subp_state.returncode = proc.returncode
     except OSError:
         try:
             raise exceptions.ProcessExecutionError(
@@ -508,21 +579,165 @@ def subp(
         exceeds that number of seconds.
     """
     retry_sleeps = retry_sleeps.copy() if retry_sleeps is not None else None
-    while True:
+    retries = 0
+    start = time.monotonic()
+    _subp_state.returncode = None
+    try:
+        while True:
+            try:
+                out, err = _subp(args, rcs, capture, timeout, env=env)
+                break
+            except exceptions.ProcessExecutionError as e:
+                if capture:
+                    logging.debug(str(e))
+                    msg = "Stderr: {}\nStdout: {}".format(e.stderr, e.stdout)
+                    logging.warning(msg)
+                if not retry_sleeps:
+                    raise
+                retry_msg = " Retrying %d more times." % len(retry_sleeps)
+                logging.debug(str(e) + retry_msg)
+                time.sleep(retry_sleeps.pop(0))
+                retries += 1
+    except BaseException:
+        _trace_subp(args, start, retries, failed=True)
+        raise
+    _trace_subp(args, start, retries, failed=False)
+    return out, err
+
+
+def _trace_subp(
+    args: Sequence[str], start: float, retries: int, failed: bool
+) -> None:
+    if not subp_trace.trace_file:
+        return
+    subp_trace.record(
+        cmd=util.redact_sensitive_logs(
+            " ".join(
+                x.decode("utf-8") if isinstance(x, bytes) else x for x in args
+            )
+        ),
+        duration=time.monotonic() - start,
+        returncode=_subp_state.returncode,
+        retries=retries,
+        failed=failed,
+    )
+
+
+# Probe results survive until a reboot, when /run is emptied, or their TTL.
+PROBE_TTL_BOOT = 24 * 60 * 60
+PROBE_TTL_HOUR = 60 * 60
+PROBE_TTL_SHORT = 5 * 60
+# Failures are only reused briefly, as they may come from a transient state,
+# like cloud-id running before cloud-init is done early in boot
+PROBE_TTL_FAILURE = 60
+
+_probe_results = None  # type: Optional[Dict[str, Dict[str, Any]]]
+_probe_lock = threading.Lock()
+
+
+def _read_probe_results() -> Dict[str, Dict[str, Any]]:
+    try:
+        return json.loads(load_file(SYSTEM_PROBES_CACHE_FILE))
+    except (OSError, ValueError):
+        return {}
+
+
+def _load_probe_results() -> Dict[str, Dict[str, Any]]:
+    global _probe_results
+    if _probe_results is None:
+        _probe_results = _read_probe_results()
+    return _probe_results
+
+
+def _update_probe_results(
+    update: Callable[[Dict[str, Dict[str, Any]]], None]
+) -> None:
+    """Apply update to the probe results, and to the shared ones as root.
+
+    Other pro processes may have stored results since this one loaded
+    them, so the shared results are read again under a file lock, and
+    updated rather than replaced. update must be safe to apply twice.
+    """
+    global _probe_results
+    with _probe_lock:
+        if util.we_are_currently_root():
+            try:
+                os.makedirs(
+                    os.path.dirname(SYSTEM_PROBES_CACHE_FILE), exist_ok=True
+                )
+                with open(SYSTEM_PROBES_CACHE_FILE + ".lock", "a") as lock:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                    _probe_results = _read_probe_results()
+                    update(_probe_results)
+                    write_file(
+                        SYSTEM_PROBES_CACHE_FILE, json.dumps(_probe_results)
+                    )
+                return
+            except OSError as e:
+                logging.debug("Unable to persist system probes: %s", str(e))
+        update(_load_probe_results())
+
+
+@lru_cache(maxsize=None)
+def _get_root_id() -> str:
+    """Identify the root directory, which is not the host's in a chroot."""
+    root_stat = os.stat("/")
+    return "{}:{}".format(root_stat.st_dev, root_stat.st_ino)
+
+
+def probe(args: Sequence[str], ttl: int) -> Tuple[str, str]:
+    """Run a read-only command, reusing its result for ttl seconds.
+
+    Results are shared with other pro processes using the same root
+    directory through SYSTEM_PROBES_CACHE_FILE. Failures with an exit code
+    are reused for PROBE_TTL_FAILURE seconds at most.
+
+    @raises ProcessExecutionError: when the command fails.
+    """
+    cmd = " ".join(args)
+    # A chroot bind mounting /run must not get the results of the host
+    key = "{} @{}".format(cmd, _get_root_id())
+    with _probe_lock:
+        result = _load_probe_results().get(key)
+    if result is not None and result["exit_code"] is not None:
+        ttl = min(ttl, PROBE_TTL_FAILURE)
+    if result is None or not 0 <= time.time() - result["time"] < ttl:
         try:
-            out, err = _subp(args, rcs, capture, timeout, env=env)
-            break
+            out, err = subp(args)
+            result = {"out": out, "err": err, "exit_code": None}
         except exceptions.ProcessExecutionError as e:
-            if capture:
-                logging.debug(str(e))
-                msg = "Stderr: {}\nStdout: {}".format(e.stderr, e.stdout)
-                logging.warning(msg)
-            if not retry_sleeps:
+            if e.exit_code is None:
                 raise
-            retry_msg = " Retrying %d more times." % len(retry_sleeps)
-            logging.debug(str(e) + retry_msg)
-            time.sleep(retry_sleeps.pop(0))
-    return out, err
+            result = {
+                "out": e.stdout,
+                "err": e.stderr,
+                "exit_code": e.exit_code,
+            }
+        result["time"] = time.time()
+        _update_probe_results(lambda results: results.update({key: result}))
+    if result["exit_code"] is not None:
+        raise exceptions.ProcessExecutionError(
+            cmd=util.redact_sensitive_logs(cmd),
+            exit_code=result["exit_code"],
+            stdout=result["out"],
+            stderr=result["err"],
+        )
+    return result["out"], result["err"]
+
+
+def invalidate_probes(*commands: str) -> None:
+    """Forget the probes of the given commands, or all of them.
+
+    Call this after changing the state a probe reports, such as installing
+    a snap or some apt configuration.
+    """
+
+    def forget_probes(results: Dict[str, Dict[str, Any]]) -> None:
+        for key in list(results):
+            if not commands or key.split(" ", 1)[0] in commands:
+                del results[key]
+
+    _update_probe_results(forget_probes)
 
 
 def ensure_folder_absent(folder_path: str) -> None:
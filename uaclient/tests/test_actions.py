@@ -1,10 +1,13 @@
 import logging
+import tarfile
 
 import mock
 import pytest
 
 from uaclient import exceptions, messages
 from uaclient.actions import (
+    _ChunksReader,
+    _iter_redacted_log,
     attach_with_token,
     auto_attach,
     collect_logs,
@@ -127,36 +130,144 @@ class TestAutoAttach:
         assert unexpected_error == excinfo.value
 
 
-@mock.patch("uaclient.actions._write_command_output_to_file")
+def read_tarball(path):
+    with tarfile.open(path) as tar:
+        return {
+            member.name: tar.extractfile(member).read().decode("utf-8")
+            for member in tar.getmembers()
+            if member.isfile()
+        }
+
+
+@mock.patch(
+    "uaclient.actions._get_command_output", return_value=(False, "output")
+)
 class TestCollectLogs:
     @pytest.mark.parametrize("caplog_text", [logging.WARNING], indirect=True)
     @mock.patch("uaclient.util.we_are_currently_root", return_value=False)
-    @mock.patch("uaclient.system.write_file")
-    @mock.patch("uaclient.system.load_file")
     @mock.patch("uaclient.actions._get_state_files")
     @mock.patch("glob.glob")
     def test_collect_logs_invalid_file(
         self,
         m_glob,
         m_get_state_files,
-        m_load_file,
-        m_write_file,
         m_we_are_currently_root,
-        m_write_cmd,
+        m_get_command_output,
         caplog_text,
+        tmpdir,
     ):
-        m_get_state_files.return_value = ["a", "b"]
-        m_load_file.side_effect = [UnicodeError("test"), "test"]
+        log_a = tmpdir.join("a")
+        log_a.write_binary(b"valid\n\xff invalid")
+        log_b = tmpdir.join("b")
+        log_b.write("test")
+        m_get_state_files.return_value = [log_a.strpath, log_b.strpath]
         m_glob.return_value = []
+        output_file = tmpdir.join("logs.tar.gz").strpath
+
+        collect_logs(cfg=mock.MagicMock(), output_file=output_file)
+
+        logs = read_tarball(output_file)
+        assert "logs/a" not in logs
+        assert "test" == logs["logs/b"]
+        assert "Failed to load file: {}\n".format(log_a) in caplog_text()
+
+    @pytest.mark.parametrize("root", (True, False))
+    @mock.patch("uaclient.actions._get_state_files")
+    @mock.patch("glob.glob")
+    def test_collect_logs_redacts_files(
+        self, m_glob, m_get_state_files, m_get_command_output, root, tmpdir
+    ):
+        log = tmpdir.join("ubuntu-advantage.log")
+        log.write(
+            "Setting token\n{'machineToken': 'SEKRET'}\n"
+            "'Bearer SEKRET2'\nDone\n"
+        )
+        m_get_state_files.return_value = [log.strpath]
+        # The same file found twice is only added once
+        m_glob.return_value = [log.strpath]
+        output_file = tmpdir.join("logs.tar.gz").strpath
+
+        with mock.patch(
+            "uaclient.util.we_are_currently_root", return_value=root
+        ):
+            collect_logs(cfg=mock.MagicMock(), output_file=output_file)
+
+        redacted = (
+            "Setting token\n{'machineToken': '<REDACTED>'}\n"
+            "'Bearer <REDACTED>'\nDone\n"
+        )
+        with tarfile.open(output_file) as tar:
+            names = tar.getnames()
+            member = tar.getmember("logs/ubuntu-advantage.log")
+        assert 1 == names.count("logs/ubuntu-advantage.log")
+        # Whoever runs it, the tarball does not depend on the log file owner
+        assert (0o644, 0, "", "") == (
+            member.mode,
+            member.uid,
+            member.uname,
+            member.gname,
+        )
+        assert (
+            redacted == read_tarball(output_file)["logs/ubuntu-advantage.log"]
+        )
+        if root:
+            assert redacted == log.read()
+        else:
+            assert "SEKRET" in log.read()
+
+    @mock.patch("uaclient.actions._get_state_files", return_value=[])
+    @mock.patch("glob.glob", return_value=[])
+    def test_collect_logs_command_outputs(
+        self, _m_glob, _m_get_state_files, m_get_command_output, tmpdir
+    ):
+        m_get_command_output.side_effect = lambda cmd, rcs: (
+            cmd == "cloud-id",
+            "{} {}".format(cmd, rcs),
+        )
+        output_file = tmpdir.join("logs.tar.gz").strpath
+
+        collect_logs(cfg=mock.MagicMock(), output_file=output_file)
+
+        logs = read_tarball(output_file)
+        assert 11 == len(logs)
+        assert "cloud-id None" == logs["logs/cloud-id.txt-error"]
+        assert (
+            "systemctl status ua-timer.timer [0, 3]"
+            == logs["logs/ua-timer.timer.txt"]
+        )
+
+
+class TestIterRedactedLog:
+    @mock.patch("uaclient.util.REDACT_BLOCK_SIZE", 4)
+    def test_redacts_blocks_of_whole_lines(self, tmpdir):
+        content = "café 'Bearer SEKRET'\nnaïve\n'Bearer SEKRET2'"
+        log = tmpdir.join("log")
+        log.write_binary(content.encode("utf-8") + b" appended later")
+
+        assert (
+            "café 'Bearer <REDACTED>'\nnaïve\n'Bearer <REDACTED>'"
+            == b"".join(
+                _iter_redacted_log(log.strpath, len(content.encode("utf-8")))
+            ).decode("utf-8")
+        )
+
+
+class TestChunksReader:
+    @pytest.mark.parametrize(
+        "chunks,size,expected",
+        (
+            ([b"abc\n", b"de\n"], 7, [b"abc", b"\nde", b"\n", b""]),
+            ([b"abc\n", b"de\n", b"fgh"], 7, [b"abc", b"\nde", b"\n", b""]),
+            ([b"abc\n"], 7, [b"abc", b"\n\n\n", b"\n", b""]),
+        ),
+    )
+    def test_reads_exactly_size_bytes(self, chunks, size, expected):
+        reader = _ChunksReader(iter(chunks), size)
 
-        with mock.patch("os.path.isfile", return_value=True):
-            collect_logs(cfg=mock.MagicMock(), output_dir="test")
+        assert expected == [reader.read(3) for _ in expected]
 
-        assert 2 == m_load_file.call_count
-        assert [mock.call("a"), mock.call("b")] == m_load_file.call_args_list
-        assert 1 == m_write_file.call_count
-        assert [mock.call("test/b", "test")] == m_write_file.call_args_list
-        assert "Failed to load file: a\n" in caplog_text()
+    def test_reads_everything_by_default(self):
+        assert b"ab\n" == _ChunksReader(iter([b"a", b"b"]), 3).read()
 
 
 class TestGetCloudInstance:
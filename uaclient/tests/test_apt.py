@@ -19,7 +19,12 @@ from uaclient.apt import (
     APT_PROXY_CONF_FILE,
     APT_RETRIES,
     KEYRINGS_DIR,
+    AptPolicy,
+    AptPolicySource,
+    DpkgPackage,
+    InstalledAptPackages,
     PreserveAptCfg,
+    _parse_version,
     add_apt_auth_conf_entry,
     add_auth_apt_repo,
     add_ppa_pinning,
@@ -27,10 +32,13 @@ from uaclient.apt import (
     clean_apt_files,
     compare_versions,
     find_apt_list_files,
-    get_apt_cache_policy,
     get_apt_cache_time,
     get_apt_config_values,
+    get_apt_policy,
+    get_dpkg_status_index,
+    get_installed_packages,
     get_installed_packages_names,
+    invalidate_apt_policy,
     is_installed,
     remove_apt_list_files,
     remove_auth_apt_repo,
@@ -38,6 +46,7 @@ from uaclient.apt import (
     run_apt_update_command,
     setup_apt_proxy,
     update_esm_caches,
+    version_compare,
 )
 from uaclient.entitlements.base import UAEntitlement
 from uaclient.entitlements.entitlement_status import ApplicationStatus
@@ -50,10 +59,34 @@ POST_INSTALL_APT_CACHE_NO_UPDATES = """
      origin esm.ubuntu.com
 """
 
-APT_LIST_RETURN_STRING = """\
-"Listing... Done
-a/release, now 1.2+3 arch123 [i,a]
-b/release-updates, now 1.2+3 arch123 [i,a]
+DPKG_STATUS_CONTENT = """\
+Package: b
+Status: install ok installed
+Architecture: amd64
+Source: bsrc (1.0-1)
+Version: 1.0-1build1
+Description: a package
+ with a multi-line
+ .
+ Description
+
+Package: a
+Status: install ok installed
+Architecture: all
+Version: 1.2+3
+Conffiles:
+ /etc/a.conf 11a06baf8245fd8d690b99024d228c1f
+
+Package: removed
+Status: deinstall ok config-files
+Architecture: amd64
+Version: 1.0
+
+Package: b
+Status: install ok half-installed
+Architecture: i386
+Source: bsrc (1.0-1)
+Version: 1.0-1build1
 """
 
 
@@ -820,27 +853,66 @@ class TestRemoveRepoFromAptAuthFile:
 
 
 class TestGetInstalledPackages:
-    @mock.patch("uaclient.apt.system.subp", return_value=("", ""))
-    def test_correct_command_called(self, m_subp):
-        get_installed_packages_names()
+    @pytest.fixture
+    def status_file(self, tmpdir):
+        status_file = tmpdir.join("status")
+        status_file.write(DPKG_STATUS_CONTENT)
+        with mock.patch("uaclient.apt.DPKG_STATUS_FILE", status_file.strpath):
+            yield status_file
+
+    def test_empty_status_file_means_empty_list(self, status_file):
+        status_file.write("")
+        assert [] == get_installed_packages_names()
 
-        expected_call = mock.call(["apt", "list", "--installed"])
-        assert [expected_call] == m_subp.call_args_list
+    @pytest.mark.parametrize("trailing_newline", ((True), (False)))
+    def test_installed_packages_sorted_by_name(
+        self, status_file, trailing_newline
+    ):
+        if not trailing_newline:
+            status_file.write(DPKG_STATUS_CONTENT.rstrip("\n"))
+        assert [
+            InstalledAptPackages(name="a", version="1.2+3", arch="all"),
+            InstalledAptPackages(
+                name="b", version="1.0-1build1", arch="amd64"
+            ),
+            InstalledAptPackages(name="b", version="1.0-1build1", arch="i386"),
+        ] == get_installed_packages()
 
-    @mock.patch(
-        "uaclient.apt.system.subp", return_value=("Listing... Done\n", "")
-    )
-    def test_empty_output_means_empty_list(self, m_subp):
-        assert [] == get_installed_packages_names()
 
-    @pytest.mark.parametrize(
-        "apt_list_return",
-        (APT_LIST_RETURN_STRING, APT_LIST_RETURN_STRING[:-1]),
-    )
-    @mock.patch("uaclient.apt.system.subp")
-    def test_lines_are_split(self, m_subp, apt_list_return):
-        m_subp.return_value = apt_list_return, ""
-        assert ["a", "b"] == get_installed_packages_names()
+class TestGetDpkgStatusIndex:
+    def test_index_by_source_package(self, tmpdir):
+        status_file = tmpdir.join("status")
+        status_file.write(DPKG_STATUS_CONTENT)
+
+        index = get_dpkg_status_index(status_file.strpath)
+
+        assert {
+            "a": {"a": "1.2+3"},
+            "bsrc": {"b": "1.0-1build1"},
+        } == index.source_packages
+        assert [
+            DpkgPackage("b", "bsrc", "1.0-1build1", "amd64", "installed"),
+            DpkgPackage("a", "a", "1.2+3", "all", "installed"),
+            DpkgPackage("removed", "removed", "1.0", "amd64", "config-files"),
+            DpkgPackage("b", "bsrc", "1.0-1build1", "i386", "half-installed"),
+        ] == index.packages
+
+    def test_index_is_cached_until_status_file_changes(self, tmpdir):
+        status_file = tmpdir.join("status")
+        status_file.write(DPKG_STATUS_CONTENT)
+
+        with mock.patch("uaclient.apt._parse_dpkg_status") as m_parse:
+            m_parse.side_effect = lambda stream: iter([])
+            index = get_dpkg_status_index(status_file.strpath)
+            assert index is get_dpkg_status_index(status_file.strpath)
+            assert 1 == m_parse.call_count
+
+            # dpkg replaces the status file when it changes
+            new_status_file = tmpdir.join("status-new")
+            new_status_file.write(DPKG_STATUS_CONTENT)
+            os.rename(new_status_file.strpath, status_file.strpath)
+            get_dpkg_status_index(status_file.strpath)
+            assert 2 == m_parse.call_count
 
 
 class TestRunAptCommand:
@@ -907,43 +979,115 @@ class TestRunAptCommand:
         assert expected_message == excinfo.value.msg
 
     @mock.patch("uaclient.apt.system.subp")
-    def test_run_update_command_clean_apt_cache_policy_cache(self, m_subp):
+    def test_run_update_command_invalidates_apt_policy(self, m_subp):
         m_subp.side_effect = [
-            ("policy1", ""),
+            ("500 http://policy1 xenial/main amd64 Packages", ""),
             ("update", ""),
-            ("policy2", ""),
+            ("500 http://policy2 xenial/main amd64 Packages", ""),
         ]
 
-        assert "policy1" == get_apt_cache_policy()
-        # Confirming that caching is happening
-        assert "policy1" == get_apt_cache_policy()
+        policy = get_apt_policy()
+        assert ["http://policy1"] == [s.url for s in policy.sources]
+        # Confirming that the parsed policy is kept
+        assert policy is get_apt_policy()
 
         run_apt_update_command()
 
-        # Confirm cache was cleared
-        assert "policy2" == get_apt_cache_policy()
-        get_apt_cache_policy.cache_clear()
+        # Confirm the policy was invalidated
+        assert ["http://policy2"] == [s.url for s in get_apt_policy().sources]
+        invalidate_apt_policy()
 
     @mock.patch("uaclient.apt.system.subp")
-    def test_failed_run_update_command_clean_apt_cache_policy_cache(
-        self, m_subp
-    ):
+    def test_failed_run_update_command_invalidates_apt_policy(self, m_subp):
         m_subp.side_effect = [
-            ("policy1", ""),
+            ("500 http://policy1 xenial/main amd64 Packages", ""),
             exceptions.UserFacingError("test"),
-            ("policy2", ""),
+            ("500 http://policy2 xenial/main amd64 Packages", ""),
         ]
 
-        assert "policy1" == get_apt_cache_policy()
-        # Confirming that caching is happening
-        assert "policy1" == get_apt_cache_policy()
+        policy = get_apt_policy()
+        assert ["http://policy1"] == [s.url for s in policy.sources]
+        # Confirming that the parsed policy is kept
+        assert policy is get_apt_policy()
 
         with pytest.raises(exceptions.UserFacingError):
             run_apt_update_command()
 
-        # Confirm cache was cleared
-        assert "policy2" == get_apt_cache_policy()
-        get_apt_cache_policy.cache_clear()
+        # Confirm the policy was invalidated
+        assert ["http://policy2"] == [s.url for s in get_apt_policy().sources]
+        invalidate_apt_policy()
+
+
+APT_CACHE_POLICY_OUTPUT = """\
+Package files:
+ 100 /var/lib/dpkg/status
+     release a=now
+ 510 https://esm.ubuntu.com/infra/ubuntu jammy-infra-security/main amd64 Packages
+     release v=22.04,o=UbuntuESM,a=jammy-infra-security,n=jammy,l=UbuntuESM,c=main,b=amd64
+     origin esm.ubuntu.com
+ 500 http://archive.ubuntu.com/ubuntu jammy-updates/main amd64 Packages
+     release v=22.04,o=Ubuntu,a=jammy-updates,n=jammy,l=Ubuntu,c=main,b=amd64
+     origin archive.ubuntu.com
+ 500 http://archive.ubuntu.com/ubuntu jammy/main amd64 Packages
+     release v=22.04,o=Ubuntu,a=jammy,n=jammy,l=Ubuntu,c=main,b=amd64
+     origin archive.ubuntu.com
+Pinned packages:
+     ubuntu-advantage-tools -> 27.11 with priority 1001
+"""  # noqa: E501
+
+
+class TestAptPolicy:
+    def test_from_output(self):
+        policy = AptPolicy.from_output(APT_CACHE_POLICY_OUTPUT)
+
+        assert [
+            AptPolicySource(100, "/var/lib/dpkg/status", "", "now"),
+            AptPolicySource(
+                500, "http://archive.ubuntu.com/ubuntu", "Ubuntu", "jammy"
+            ),
+            AptPolicySource(
+                500,
+                "http://archive.ubuntu.com/ubuntu",
+                "Ubuntu",
+                "jammy-updates",
+            ),
+            AptPolicySource(
+                510,
+                "https://esm.ubuntu.com/infra/ubuntu",
+                "UbuntuESM",
+                "jammy-infra-security",
+            ),
+        ] == sorted(policy.sources)
+
+    @pytest.mark.parametrize(
+        "url_prefix,expected_archives",
+        (
+            ("https://esm.ubuntu.com/infra/ubuntu", ["jammy-infra-security"]),
+            ("https://esm.ubuntu.com/apps/ubuntu", []),
+            ("https://esm.ubuntu.com/ubuntu", []),
+            ("http://archive.ubuntu.com", ["jammy", "jammy-updates"]),
+            ("http://", ["jammy", "jammy-updates"]),
+        ),
+    )
+    def test_sources_for_url(self, url_prefix, expected_archives):
+        policy = AptPolicy.from_output(APT_CACHE_POLICY_OUTPUT)
+
+        assert expected_archives == sorted(
+            source.archive for source in policy.sources_for_url(url_prefix)
+        )
+
+    @pytest.mark.parametrize(
+        "origin,archive,expected",
+        (
+            ("Ubuntu", "jammy-updates", True),
+            ("UbuntuESM", "jammy-updates", False),
+            ("Ubuntu", "jammy-security", False),
+        ),
+    )
+    def test_has_origin_archive(self, origin, archive, expected):
+        policy = AptPolicy.from_output(APT_CACHE_POLICY_OUTPUT)
+
+        assert expected is policy.has_origin_archive(origin, archive)
 
 
 class TestAptProxyConfig:
@@ -1053,12 +1197,98 @@ class TestCompareVersion:
             ("2.10", "2.9", "lt", False),
         ),
     )
-    def test_compare_versions(
-        self, ver1, ver2, relation, expected_result, _subp
-    ):
+    def test_compare_versions(self, ver1, ver2, relation, expected_result):
         """compare_versions returns True when the comparison is accurate."""
-        with mock.patch("uaclient.system._subp", side_effect=_subp):
-            assert expected_result is compare_versions(ver1, ver2, relation)
+        assert expected_result is compare_versions(ver1, ver2, relation)
+
+    @pytest.mark.parametrize(
+        "ver1,ver2,relation",
+        (
+            ("a:1.0", "1.0", "lt"),
+            ("1.0", ":1.0", "gt"),
+            ("-1", "1.0", "lt"),
+            ("1.0", "1.0", "invalid"),
+        ),
+    )
+    @mock.patch("uaclient.system.subp")
+    def test_compare_versions_returns_false_on_invalid_input(
+        self, m_subp, ver1, ver2, relation
+    ):
+        """compare_versions is False for invalid versions and relations."""
+        assert compare_versions(ver1, ver2, relation) is False
+        assert 0 == m_subp.call_count
+
+    @pytest.mark.parametrize(
+        "ver1,ver2,expected_sign",
+        (
+            # Expected results obtained from dpkg --compare-versions
+            ("1.0", "1.0-0", 0),
+            ("1.0", "1.0.0", -1),
+            ("1.0", "1.00", 0),
+            ("1.0~rc1", "1.0", -1),
+            ("1.0~~", "1.0~", -1),
+            ("1.0~~a", "1.0~~", 1),
+            ("1.0~", "1.0", -1),
+            ("1.0a", "1.0", 1),
+            ("1.0+dfsg-1", "1.0-1", 1),
+            ("1.0-1", "1.0-1ubuntu1", -1),
+            ("1.0-1ubuntu1", "1.0-1ubuntu1.1", -1),
+            ("1.0-1ubuntu0.1", "1.0-1", 1),
+            ("1:1.0", "2.0", 1),
+            ("0:1.0", "1.0", 0),
+            ("2:0.1", "1:9.9", 1),
+            ("1.0-a", "1.0-A", 1),
+            ("1.0a", "1.0A", 1),
+            ("1.0+", "1.0.", -1),
+            ("1.0-1~bpo", "1.0-1", -1),
+            ("2.1~18.04.1", "2.1", -1),
+            ("27.11.3~18.04.1", "27.11.3~16.04.1", 1),
+            ("5.15.0-1026.30~20.04.1", "5.15.0-1026.30", -1),
+            ("4.4.0-210.242", "4.4.0-21.37", 1),
+            ("1:2.3.4-5ubuntu1~esm1", "1:2.3.4-5ubuntu1", -1),
+            ("1:2.3.4-5ubuntu0.1~esm1", "1:2.3.4-5ubuntu1", -1),
+            ("1.2.3+really1.2.2", "1.2.3", 1),
+            ("1.0~beta.1", "1.0~beta1", 1),
+            ("1.0.1~git20200101", "1.0.1", -1),
+            ("0.9", "1.0", -1),
+            ("2.10", "2.9", 1),
+            ("1.0-1+b1", "1.0-1", 1),
+            ("1.0-1+deb10u1", "1.0-1+deb9u1", 1),
+            ("7.58.0-2ubuntu3.24", "7.58.0-2ubuntu3.9", 1),
+            ("2.27-3ubuntu1.6", "2.27-3ubuntu1.5", 1),
+            ("1.1.1f-1ubuntu2.16", "1.1.1f-1ubuntu2.9", 1),
+            ("3.0.2-0ubuntu1.10", "3.0.2-0ubuntu1", 1),
+            ("2:8.2.3995-1ubuntu2.3", "2:8.1.2269-1ubuntu5.14", 1),
+            ("20210119~20.04.1", "20210119~18.04.1", 1),
+            ("1.3.dfsg-1", "1.3-1", 1),
+            ("1.0-0.1", "1.0-0", 1),
+            ("0", "0~", 1),
+            ("a", "1", 1),
+            ("1.2-3-4", "1.2-3", 1),
+            ("1.2-3-4", "1.2-3.4", 1),
+            ("1.0+~", "1.0+", -1),
+            ("9", "10", -1),
+            ("09", "9", 0),
+            ("1.0.", "1.0", 1),
+            ("1.0+1", "1.0.1", -1),
+            ("1.0-1.", "1.0-1", 1),
+        ),
+    )
+    def test_version_compare_matches_dpkg(self, ver1, ver2, expected_sign):
+        """version_compare orders versions the same way dpkg does."""
+        result = version_compare(ver1, ver2)
+        assert expected_sign == (result > 0) - (result < 0)
+        reverse = version_compare(ver2, ver1)
+        assert -expected_sign == (reverse > 0) - (reverse < 0)
+
+    def test_parsed_versions_are_memoized(self):
+        """Parsing the same version twice is served from the parse cache."""
+        _parse_version.cache_clear()
+        version_compare("1.0-1ubuntu1", "1.0-1ubuntu2")
+        version_compare("1.0-1ubuntu1", "1.0-1ubuntu3")
+        cache_info = _parse_version.cache_info()
+        assert 3 == cache_info.misses
+        assert 1 == cache_info.hits
 
 
 class TestAptCache:
@@ -6,13 +6,16 @@ import os
 import re
 import socket
 import stat
+import subprocess
 import sys
 import textwrap
 
 import mock
 import pytest
 
-from uaclient import defaults, exceptions, messages, status
+from uaclient import defaults, exceptions
+from uaclient import log as pro_log
+from uaclient import messages, status
 from uaclient.cli import (
     action_help,
     assert_attached,
@@ -33,6 +36,34 @@ from uaclient.exceptions import (
 )
 from uaclient.files.notices import Notice
 
+STARTUP_SCRIPT = """\
+import sys
+from unittest import mock
+
+# python3-apt is not installed in every test environment
+sys.modules["apt"] = mock.MagicMock()
+sys.modules["apt_pkg"] = mock.MagicMock()
+
+from uaclient import cli, config
+from uaclient.files.state_files import UserConfigData
+
+cfg = config.UAConfig({"data_dir": sys.argv[1]}, user_config=UserConfigData())
+args = cli.get_parser(cfg).parse_args(["status", "--format", "json"])
+assert args.action is cli.action_status
+"""
+# Modules only imported by the actions of the commands that need them
+LAZY_MODULES = (
+    "uaclient.api.api",
+    "uaclient.apt_news",
+    "uaclient.jobs.update_messaging",
+    "uaclient.security",
+    "uaclient.security_api_cache",
+    "uaclient.security_notice_db",
+    "uaclient.security_status",
+)
+# uaclient modules imported before dispatching `pro status --format json`
+STARTUP_MODULE_BUDGET = 50
+
 BIG_DESC = "123456789 " * 7 + "next line"
 BIG_URL = "http://" + "adsf" * 10
 
@@ -837,6 +868,7 @@ class TestSetupLogging:
 
         setup_logging(logging.INFO, logging.INFO, log_file=log_file.strpath)
         logging.info("after setup")
+        pro_log.flush_queue_handlers()
 
         assert "after setup" in log_file.read()
 
@@ -853,6 +885,7 @@ class TestSetupLogging:
         logging.error("before setup")
         setup_logging(logging.INFO, logging.INFO, log_file=log_file.strpath)
         logging.error("after setup")
+        pro_log.flush_queue_handlers()
 
         content = log_file.read()
         assert re.match(r'\[.*"ERROR", "before setup"', content) is None
@@ -902,12 +935,13 @@ class TestSetupLogging:
             h
             for h in root_logger.handlers
             if h.level == logging.DEBUG
-            and isinstance(h, logging.FileHandler)
-            and h.stream.name == log_file
+            and isinstance(h, pro_log.QueueLogHandler)
+            and h.listener.handlers[0].stream.name == log_file
         ]
         assert len(root_logger.handlers) == 2
         assert len(stream_handlers) == 1
         assert len(file_handlers) == 1
+        first_file_handler = file_handlers[0]
 
         setup_logging(logging.INFO, logging.DEBUG)
         stream_handlers = [
@@ -919,12 +953,14 @@ class TestSetupLogging:
             h
             for h in root_logger.handlers
             if h.level == logging.DEBUG
-            and isinstance(h, logging.FileHandler)
-            and h.stream.name == log_file
+            and isinstance(h, pro_log.QueueLogHandler)
+            and h.listener.handlers[0].stream.name == log_file
         ]
         assert len(root_logger.handlers) == 2
         assert len(stream_handlers) == 1
         assert len(file_handlers) == 1
+        # The replaced handler was closed along with its thread
+        assert not first_file_handler.listener.running
 
     @pytest.mark.parametrize("pre_existing", (True, False))
     @mock.patch("uaclient.cli.config")
@@ -946,6 +982,7 @@ class TestSetupLogging:
 
         setup_logging(logging.INFO, logging.INFO, log_file=log_path)
         logging.info("after setup")
+        pro_log.flush_queue_handlers()
 
         assert expected_mode == stat.S_IMODE(os.lstat(log_path).st_mode)
         log_content = log_file.read()
@@ -1029,3 +1066,38 @@ class TestWarnAboutNewVersion:
             assert re.search(expected_notice, caplog_text())
         else:
             assert not re.search(expected_notice, caplog_text())
+
+
+class TestStartupImports:
+    def test_status_imports_stay_within_budget(self, tmpdir):
+        """Fail when `pro status` starts importing more than it needs."""
+        topdir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+        proc = subprocess.run(
+            [
+                sys.executable,
+                "-X",
+                "importtime",
+                "-c",
+                STARTUP_SCRIPT,
+                tmpdir.strpath,
+            ],
+            cwd=topdir,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        assert 0 == proc.returncode, proc.stderr
+
+        # Lines look like "import time: <self> | <cumulative> | <module>"
+        imported = {
+            line.rpartition("|")[2].strip()
+            for line in proc.stderr.splitlines()
+            if line.startswith("import time:")
+        }
+        uaclient_modules = sorted(
+            module for module in imported if module.startswith("uaclient")
+        )
+        assert [] == [module for module in LAZY_MODULES if module in imported]
+        assert len(uaclient_modules) <= STARTUP_MODULE_BUDGET, "\n".join(
+            uaclient_modules
+        )
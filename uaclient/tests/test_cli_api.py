@@ -1,14 +1,17 @@
+import io
+import json
 import re
 import textwrap
 
 import mock
 import pytest
 
+from uaclient import exceptions, messages
 from uaclient.cli import action_api, api_parser, get_parser, main
 
 HELP_OUTPUT = textwrap.dedent(
     """\
-usage: api \[-h\] \[--args \[OPTIONS .*\]\] endpoint
+usage: api \[-h\] \[--args \[OPTIONS .*\]\] \[--batch \[FILE\]\]\s+\[endpoint\]
 
 Calls the Client API endpoints.
 
@@ -19,6 +22,7 @@ positional arguments:
   -h, --help            show this help message and exit
   --args \[OPTIONS .*\](.|\n)*Options to pass to the API endpoint, formatted as(.|\n)*
                         key=value
+  --batch \[FILE\](.|\n)*Call the endpoints of a JSON list of(.|\n)*
 """  # noqa
 )
 
@@ -37,12 +41,13 @@ class TestActionAPI:
     @pytest.mark.parametrize(
         "result,expected_return", (("success", 0), ("failure", 1))
     )
-    @mock.patch("uaclient.cli.call_api")
+    @mock.patch("uaclient.api.api.call_api")
     def test_api_action(self, m_call_api, result, expected_return, FakeConfig):
         m_call_api.return_value.result = result
         args = mock.MagicMock()
         args.endpoint_path = "example_endpoint"
         args.options = []
+        args.batch = None
         cfg = FakeConfig()
         return_code = action_api(args, cfg=cfg)
         assert m_call_api.call_count == 1
@@ -52,6 +57,98 @@ class TestActionAPI:
         assert m_call_api.return_value.to_json.call_count == 1
         assert return_code == expected_return
 
+    @pytest.mark.parametrize(
+        "endpoint_path,options,batch",
+        (
+            (None, [], None),
+            ("example_endpoint", [], "-"),
+            (None, ["key=value"], "-"),
+        ),
+    )
+    def test_api_requires_endpoint_xor_batch(
+        self, endpoint_path, options, batch, FakeConfig
+    ):
+        args = mock.MagicMock(
+            endpoint_path=endpoint_path, options=options, batch=batch
+        )
+
+        with pytest.raises(exceptions.UserFacingError) as excinfo:
+            action_api(args, cfg=FakeConfig())
+
+        assert messages.API_ENDPOINT_XOR_BATCH.name == excinfo.value.msg_code
+
+    @pytest.mark.parametrize("from_stdin", (False, True))
+    @mock.patch("uaclient.api.api.call_api_batch")
+    def test_api_batch(
+        self, m_call_api_batch, from_stdin, capsys, tmpdir, FakeConfig
+    ):
+        requests = [
+            {"endpoint": "u.pro.version.v1"},
+            {"endpoint": "u.pro.packages.updates.v1"},
+        ]
+        results = [mock.MagicMock(result="success") for _ in requests]
+        for i, result in enumerate(results):
+            result.to_json.return_value = '{"response": %d}' % i
+        results[1].result = "failure"
+        m_call_api_batch.return_value = iter(results)
+        batch_file = tmpdir.join("batch.json")
+        batch_file.write(json.dumps(requests))
+        args = mock.MagicMock(endpoint_path=None, options=[])
+        cfg = FakeConfig()
+
+        if from_stdin:
+            args.batch = "-"
+            with mock.patch("sys.stdin", io.StringIO(batch_file.read())):
+                return_code = action_api(args, cfg=cfg)
+        else:
+            args.batch = batch_file.strpath
+            return_code = action_api(args, cfg=cfg)
+
+        assert 1 == return_code
+        assert [mock.call(requests, cfg)] == m_call_api_batch.call_args_list
+        out, _err = capsys.readouterr()
+        assert '{"response": 0}\n{"response": 1}\n' == out
+
+    @pytest.mark.parametrize(
+        "content,error",
+        (("[{", "Expecting"), ('{"endpoint": "u.pro.version.v1"}', "dict")),
+    )
+    @mock.patch("uaclient.api.api.call_api_batch")
+    def test_api_batch_invalid_input(
+        self, m_call_api_batch, content, error, FakeConfig
+    ):
+        args = mock.MagicMock(endpoint_path=None, options=[], batch="-")
+
+        with mock.patch("sys.stdin", io.StringIO(content)):
+            with pytest.raises(exceptions.UserFacingError) as excinfo:
+                action_api(args, cfg=FakeConfig())
+
+        assert messages.API_BATCH_INVALID_INPUT.name == excinfo.value.msg_code
+        assert "stdin" in excinfo.value.msg
+        assert error in excinfo.value.msg
+        assert 0 == m_call_api_batch.call_count
+
+    @mock.patch("uaclient.api.api.call_api_batch")
+    def test_api_batch_unreadable_input(
+        self, m_call_api_batch, tmpdir, FakeConfig
+    ):
+        batch_file = tmpdir.join("missing.json")
+        args = mock.MagicMock(
+            endpoint_path=None, options=[], batch=batch_file.strpath
+        )
+
+        with pytest.raises(exceptions.UserFacingError) as excinfo:
+            action_api(args, cfg=FakeConfig())
+
+        assert (
+            messages.API_BATCH_UNREADABLE_INPUT.name == excinfo.value.msg_code
+        )
+        assert (
+            "Unable to read batch requests from {}: No such file or"
+            " directory".format(batch_file.strpath)
+        ) == excinfo.value.msg
+        assert 0 == m_call_api_batch.call_count
+
 
 class TestParser:
     def test_security_status_parser_updates_parser_config(self, FakeConfig):
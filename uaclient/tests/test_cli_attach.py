@@ -616,9 +616,9 @@ class TestActionAttach:
         }
         assert expected == json.loads(fake_stdout.getvalue())
 
-    @mock.patch(M_PATH + "_initiate")
-    @mock.patch(M_PATH + "_wait")
-    @mock.patch(M_PATH + "_revoke")
+    @mock.patch("uaclient.api.u.pro.attach.magic.initiate.v1._initiate")
+    @mock.patch("uaclient.api.u.pro.attach.magic.wait.v1._wait")
+    @mock.patch("uaclient.api.u.pro.attach.magic.revoke.v1._revoke")
     def test_magic_attach_revoke_token_if_wait_fails(
         self,
         m_revoke,
@@ -59,7 +59,9 @@ class TestActionAutoAttach:
         assert HELP_OUTPUT == out
 
     @mock.patch(M_PATH + "_post_cli_attach")
-    @mock.patch(M_PATH + "_full_auto_attach")
+    @mock.patch(
+        "uaclient.api.u.pro.attach.auto.full_auto_attach.v1._full_auto_attach"
+    )
     def test_happy_path(
         self,
         m_full_auto_attach,
@@ -81,7 +83,9 @@ class TestActionAutoAttach:
 
     @mock.patch(M_PATH + "event")
     @mock.patch(M_PATH + "_post_cli_attach")
-    @mock.patch(M_PATH + "_full_auto_attach")
+    @mock.patch(
+        "uaclient.api.u.pro.attach.auto.full_auto_attach.v1._full_auto_attach"
+    )
     def test_handle_full_auto_attach_errors(
         self,
         m_full_auto_attach,
@@ -119,7 +123,9 @@ class TestActionAutoAttach:
     )
     @mock.patch(M_PATH + "logging")
     @mock.patch(M_PATH + "_post_cli_attach")
-    @mock.patch(M_PATH + "_full_auto_attach")
+    @mock.patch(
+        "uaclient.api.u.pro.attach.auto.full_auto_attach.v1._full_auto_attach"
+    )
     def test_uncaught_errors_are_handled(
         self,
         m_full_auto_attach,
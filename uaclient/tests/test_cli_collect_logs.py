@@ -54,21 +54,15 @@ class TestActionCollectLogs:
         ],
     )
     @mock.patch("tarfile.open")
-    @mock.patch("builtins.open")
-    @mock.patch(M_PATH + "util.redact_sensitive_logs", return_value="test")
+    @mock.patch("uaclient.actions._add_redacted_log")
     # let's pretend all files exist
     @mock.patch("os.path.isfile", return_value=True)
-    @mock.patch("uaclient.system.write_file")
-    @mock.patch("uaclient.system.load_file")
-    @mock.patch("uaclient.system.subp", return_value=(None, None))
+    @mock.patch("uaclient.system.subp", return_value=("", ""))
     def test_collect_logs(
         self,
         m_subp,
-        _load_file,
-        _write_file,
         m_isfile,
-        redact,
-        _fopen,
+        m_add_redacted_log,
         _tarfile,
         _glob,
         FakeConfig,
@@ -76,49 +70,62 @@ class TestActionCollectLogs:
         cfg = FakeConfig()
         action_collect_logs(mock.MagicMock(), cfg=cfg)
 
-        assert m_subp.call_args_list == [
-            mock.call(["cloud-id"], rcs=None),
-            mock.call(["pro", "status", "--format", "json"], rcs=None),
-            mock.call(["/snap/bin/canonical-livepatch", "status"], rcs=None),
-            mock.call(["systemctl", "list-timers", "--all"], rcs=None),
-            mock.call(
-                [
-                    "journalctl",
-                    "--boot=0",
-                    "-o",
-                    "short-precise",
-                    "-u",
-                    "ua-timer.service",
-                    "-u",
-                    "ua-auto-attach.service",
-                    "-u",
-                    "ua-reboot-cmds.service",
-                    "-u",
-                    "ubuntu-advantage.service",
-                    "-u",
-                    "cloud-init-local.service",
-                    "-u",
-                    "cloud-init-config.service",
-                    "-u",
-                    "cloud-config.service",
-                ],
-                rcs=None,
-            ),
-            mock.call(["systemctl", "status", "ua-timer.service"], rcs=[0, 3]),
-            mock.call(["systemctl", "status", "ua-timer.timer"], rcs=[0, 3]),
-            mock.call(
-                ["systemctl", "status", "ua-auto-attach.path"], rcs=[0, 3]
-            ),
-            mock.call(
-                ["systemctl", "status", "ua-auto-attach.service"], rcs=[0, 3]
-            ),
-            mock.call(
-                ["systemctl", "status", "ua-reboot-cmds.service"], rcs=[0, 3]
-            ),
-            mock.call(
-                ["systemctl", "status", "ubuntu-advantage.service"], rcs=[0, 3]
-            ),
-        ]
+        # Commands run concurrently, in no particular order
+        assert sorted(m_subp.call_args_list, key=str) == sorted(
+            [
+                mock.call(["cloud-id"], rcs=None),
+                mock.call(["pro", "status", "--format", "json"], rcs=None),
+                mock.call(
+                    ["/snap/bin/canonical-livepatch", "status"], rcs=None
+                ),
+                mock.call(["systemctl", "list-timers", "--all"], rcs=None),
+                mock.call(
+                    [
+                        "journalctl",
+                        "--boot=0",
+                        "-o",
+                        "short-precise",
+                        "-u",
+                        "ua-timer.service",
+                        "-u",
+                        "ua-auto-attach.service",
+                        "-u",
+                        "ua-reboot-cmds.service",
+                        "-u",
+                        "ubuntu-advantage.service",
+                        "-u",
+                        "cloud-init-local.service",
+                        "-u",
+                        "cloud-init-config.service",
+                        "-u",
+                        "cloud-config.service",
+                    ],
+                    rcs=None,
+                ),
+                mock.call(
+                    ["systemctl", "status", "ua-timer.service"], rcs=[0, 3]
+                ),
+                mock.call(
+                    ["systemctl", "status", "ua-timer.timer"], rcs=[0, 3]
+                ),
+                mock.call(
+                    ["systemctl", "status", "ua-auto-attach.path"], rcs=[0, 3]
+                ),
+                mock.call(
+                    ["systemctl", "status", "ua-auto-attach.service"],
+                    rcs=[0, 3],
+                ),
+                mock.call(
+                    ["systemctl", "status", "ua-reboot-cmds.service"],
+                    rcs=[0, 3],
+                ),
+                mock.call(
+                    ["systemctl", "status", "ubuntu-advantage.service"],
+                    rcs=[0, 3],
+                ),
+            ],
+            key=str,
+        )
 
         assert m_isfile.call_count == 17
         assert m_isfile.call_args_list == [
@@ -140,7 +147,21 @@ class TestActionCollectLogs:
             mock.call("/var/log/ubuntu-advantage.log"),
             mock.call("/var/log/ubuntu-advantage.log.1"),
         ]
-        assert redact.call_count == 17
+        # ubuntu-advantage.log is both a state file and a rotated log
+        assert m_add_redacted_log.call_count == 16
+
+    @mock.patch("uaclient.cli.actions.collect_logs")
+    def test_collect_logs_permission_error(
+        self, m_collect_logs, caplog_text, FakeConfig
+    ):
+        m_collect_logs.side_effect = PermissionError("denied")
+        args = mock.MagicMock(output="/root/logs.tar.gz")
+
+        assert 1 == action_collect_logs(args, cfg=FakeConfig())
+        assert [
+            mock.call(mock.ANY, "/root/logs.tar.gz")
+        ] == m_collect_logs.call_args_list
+        assert "denied" in caplog_text()
 
 
 class TestParser:
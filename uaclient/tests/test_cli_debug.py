@@ -0,0 +1,181 @@
+import mock
+import pytest
+
+from uaclient import exceptions, subp_trace
+from uaclient.cli import (
+    action_debug_security_cache,
+    action_debug_security_notices,
+    action_debug_trace_summary,
+    main,
+)
+from uaclient.security_api_cache import SecurityAPICache
+from uaclient.security_notice_db import SecurityNoticeDB
+
+HELP_OUTPUT = """\
+usage: pro debug security-cache [--clear] [flags]
+
+List the Ubuntu Security API responses stored locally by 'pro fix', with their
+size and freshness.
+
+Flags:
+  -h, --help  show this help message and exit
+  --clear     remove every cached Security API response
+"""
+
+TRACE_SUMMARY_HELP_OUTPUT = """\
+usage: pro debug trace-summary [--file FILE] [--top N] [--clear] [flags]
+
+Show the commands run by the Pro client that took the most time, from the
+trace written when the subp_trace feature is set. The pro command, the timer,
+the daemons, the API server and the scripts run by apt or at boot all write to
+it.
+
+Flags:
+  -h, --help   show this help message and exit
+  --file FILE  trace file to read instead of the configured one
+  --top N      number of commands to show (default: 10)
+  --clear      remove the trace file
+"""
+
+URL = "https://ubuntu.com/security/cves/CVE-2020-1234.json"
+
+
+class TestActionDebugSecurityCache:
+    @mock.patch("uaclient.cli.setup_logging")
+    def test_security_cache_help(self, _m_setup_logging, capsys, FakeConfig):
+        with pytest.raises(SystemExit):
+            with mock.patch(
+                "sys.argv",
+                ["/usr/bin/ua", "debug", "security-cache", "--help"],
+            ):
+                with mock.patch(
+                    "uaclient.config.UAConfig",
+                    return_value=FakeConfig(),
+                ):
+                    main()
+        out, _err = capsys.readouterr()
+        assert HELP_OUTPUT == out
+
+    def test_lists_cached_entries(self, capsys, FakeConfig):
+        cfg = FakeConfig()
+        SecurityAPICache.from_cfg(cfg).put(URL, {"id": "CVE-2020-1234"}, {})
+
+        args = mock.MagicMock(clear=False)
+        assert 0 == action_debug_security_cache(args, cfg=cfg)
+
+        out, _err = capsys.readouterr()
+        assert "Entries: 1 (" in out
+        assert "fresh" in out
+        assert URL in out
+
+    def test_clear_removes_entries(self, capsys, FakeConfig):
+        cfg = FakeConfig()
+        cache = SecurityAPICache.from_cfg(cfg)
+        cache.put(URL, {"id": "CVE-2020-1234"}, {})
+
+        args = mock.MagicMock(clear=True)
+        assert 0 == action_debug_security_cache(args, cfg=cfg)
+
+        assert [] == cache.entries()
+        out, _err = capsys.readouterr()
+        assert "Removed all cached responses" in out
+
+    @mock.patch("uaclient.util.we_are_currently_root", return_value=False)
+    def test_clear_requires_root(self, _m_root, FakeConfig):
+        args = mock.MagicMock(clear=True)
+        with pytest.raises(exceptions.NonRootUserError):
+            action_debug_security_cache(args, cfg=FakeConfig())
+
+
+class TestActionDebugSecurityNotices:
+    def test_import_and_summary(self, capsys, tmpdir, FakeConfig):
+        dump = tmpdir.join("dump.json")
+        dump.write(
+            '{"cves": [{"id": "CVE-2020-1234", "packages": []}],'
+            ' "notices": []}'
+        )
+        cfg = FakeConfig()
+        args = mock.MagicMock(clear=False, import_files=[dump.strpath])
+
+        assert 0 == action_debug_security_notices(args, cfg=cfg)
+
+        assert SecurityNoticeDB.from_cfg(cfg).get_cve("CVE-2020-1234")
+        out, _err = capsys.readouterr()
+        assert "Imported 1 CVEs and 0 USNs" in out
+        assert "CVEs: 1, USNs: 0, source packages: 0" in out
+
+    def test_invalid_dump(self, tmpdir, FakeConfig):
+        dump = tmpdir.join("dump.json")
+        dump.write("not json")
+        args = mock.MagicMock(clear=False, import_files=[dump.strpath])
+
+        with pytest.raises(exceptions.UserFacingError) as excinfo:
+            action_debug_security_notices(args, cfg=FakeConfig())
+        assert "Unable to import {}".format(dump.strpath) in str(excinfo.value)
+
+    @mock.patch("uaclient.util.we_are_currently_root", return_value=False)
+    def test_import_requires_root(self, _m_root, FakeConfig):
+        args = mock.MagicMock(clear=False, import_files=["dump.json"])
+        with pytest.raises(exceptions.NonRootUserError):
+            action_debug_security_notices(args, cfg=FakeConfig())
+
+
+class TestActionDebugTraceSummary:
+    @mock.patch("uaclient.cli.setup_logging")
+    def test_trace_summary_help(self, _m_setup_logging, capsys, FakeConfig):
+        with pytest.raises(SystemExit):
+            with mock.patch(
+                "sys.argv",
+                ["/usr/bin/ua", "debug", "trace-summary", "--help"],
+            ):
+                with mock.patch(
+                    "uaclient.config.UAConfig",
+                    return_value=FakeConfig(),
+                ):
+                    main()
+        out, _err = capsys.readouterr()
+        assert TRACE_SUMMARY_HELP_OUTPUT == out
+
+    def test_summarizes_top_commands(self, capsys, tmpdir, FakeConfig):
+        trace = tmpdir.join("trace.jsonl")
+        cfg = FakeConfig()
+        cfg.override_features({"subp_trace": trace.strpath})
+        with mock.patch("uaclient.subp_trace.trace_file", trace.strpath):
+            subp_trace.record("apt-cache policy", 0.5, 0, 0, False)
+            subp_trace.record("apt-cache policy", 1.5, 0, 0, False)
+            subp_trace.record("lscpu", 0.25, 0, 0, False)
+            subp_trace.record("ischroot", 1.25, 1, 0, True)
+
+        args = mock.MagicMock(file=None, top=2, clear=False)
+        assert 0 == action_debug_trace_summary(args, cfg=cfg)
+
+        out, _err = capsys.readouterr()
+        lines = out.splitlines()
+        assert "Subprocess trace: {}".format(trace.strpath) == lines[0]
+        assert "Commands: 3, calls: 4, total time: 3.500 seconds" == lines[1]
+        assert [
+            "    2.000      2     1.000     1.500      0       0"
+            "  apt-cache policy ({})".format(__name__),
+            "    1.250      1     1.250     1.250      1       0"
+            "  ischroot ({})".format(__name__),
+        ] == lines[3:]
+
+    def test_missing_trace(self, capsys, tmpdir, FakeConfig):
+        path = tmpdir.join("trace.jsonl").strpath
+        args = mock.MagicMock(file=path, top=10, clear=False)
+
+        assert 0 == action_debug_trace_summary(args, cfg=FakeConfig())
+
+        out, _err = capsys.readouterr()
+        assert "No subprocess trace found at {}".format(path) in out
+
+    def test_clear_removes_trace(self, capsys, tmpdir, FakeConfig):
+        trace = tmpdir.join("trace.jsonl")
+        trace.write("")
+        args = mock.MagicMock(file=trace.strpath, top=10, clear=True)
+
+        assert 0 == action_debug_trace_summary(args, cfg=FakeConfig())
+
+        assert not trace.check()
+        out, _err = capsys.readouterr()
+        assert "Removed subprocess trace {}".format(trace.strpath) in out
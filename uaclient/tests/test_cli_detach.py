@@ -152,7 +152,7 @@ class TestActionDetach:
         [(True, False, True), (False, False, False), (True, True, True)],
     )
     @mock.patch("uaclient.contract.UAContractClient")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     @mock.patch("uaclient.cli.entitlements_disable_order")
     @mock.patch("uaclient.cli.entitlements.entitlement_factory")
     def test_entitlements_disabled_appropriately(
@@ -230,7 +230,7 @@ class TestActionDetach:
 
     @mock.patch("uaclient.cli.entitlements_disable_order")
     @mock.patch("uaclient.contract.UAContractClient")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_config_cache_deleted(
         self,
         m_update_apt_and_motd_msgs,
@@ -255,7 +255,7 @@ class TestActionDetach:
 
     @mock.patch("uaclient.cli.entitlements_disable_order")
     @mock.patch("uaclient.contract.UAContractClient")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_correct_message_emitted(
         self,
         m_update_apt_and_motd_msgs,
@@ -283,7 +283,7 @@ class TestActionDetach:
 
     @mock.patch("uaclient.cli.entitlements_disable_order")
     @mock.patch("uaclient.contract.UAContractClient")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_returns_zero(
         self,
         m_update_apt_and_motd_msgs,
@@ -340,7 +340,7 @@ class TestActionDetach:
         ],
     )
     @mock.patch("uaclient.contract.UAContractClient")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     @mock.patch("uaclient.entitlements.entitlement_factory")
     @mock.patch("uaclient.cli.entitlements_disable_order")
     def test_informational_message_emitted(
@@ -3,7 +3,7 @@ import textwrap
 import mock
 import pytest
 
-from uaclient import exceptions
+from uaclient import exceptions, messages
 from uaclient.cli import action_fix, main
 from uaclient.security import FixStatus
 
@@ -11,20 +11,26 @@ M_PATH = "uaclient.cli."
 
 HELP_OUTPUT = textwrap.dedent(
     """\
-usage: pro fix <CVE-yyyy-nnnn+>|<USN-nnnn-d+> [flags]
+usage: pro fix <CVE-yyyy-nnnn+>|<USN-nnnn-d+> ... [flags]
 
 Inspect and resolve CVEs and USNs (Ubuntu Security Notices) on this machine.
 
 positional arguments:
-  security_issue  Security vulnerability ID to inspect and resolve on this
-                  system. Format: CVE-yyyy-nnnn, CVE-yyyy-nnnnnnn or USN-nnnn-
-                  dd
+  security_issue    Security vulnerability ID to inspect and resolve on this
+                    system. Format: CVE-yyyy-nnnn, CVE-yyyy-nnnnnnn or USN-
+                    nnnn-dd. When several IDs are provided, their fixes are
+                    installed together in a single package upgrade.
 
 Flags:
-  -h, --help      show this help message and exit
-  --dry-run       If used, fix will not actually run but will display
-                  everything that will happen on the machine during the
-                  command.
+  -h, --help        show this help message and exit
+  --from-file FILE  Read security vulnerability IDs to fix from FILE, one per
+                    line. Empty lines and lines starting with # are ignored.
+                    Use - to read from standard input.
+  --dry-run         If used, fix will not actually run but will display
+                    everything that will happen on the machine during the
+                    command.
+  --no-cache        If used, fix will neither read from nor write to the local
+                    cache of Ubuntu Security API responses.
 """
 )
 
@@ -70,12 +76,19 @@ class TestActionFix:
     ):
         """Check that root and non-root will emit attached status"""
         cfg = FakeConfig()
-        args = mock.MagicMock(security_issue=issue, dry_run=False)
+        args = mock.MagicMock(
+            security_issue=[issue],
+            from_file=None,
+            dry_run=False,
+            no_cache=False,
+        )
         m_fix_security_issue_id.return_value = FixStatus.SYSTEM_NON_VULNERABLE
         if is_valid:
             assert 0 == action_fix(args, cfg=cfg)
             assert [
-                mock.call(cfg=cfg, issue_id=issue, dry_run=False)
+                mock.call(
+                    cfg=cfg, issue_id=issue, dry_run=False, use_cache=True
+                )
             ] == m_fix_security_issue_id.call_args_list
         else:
             with pytest.raises(exceptions.UserFacingError) as excinfo:
@@ -88,3 +101,85 @@ class TestActionFix:
 
             assert expected_msg == str(excinfo.value)
             assert 0 == m_fix_security_issue_id.call_count
+
+    @mock.patch("uaclient.security.fix_security_issue_id")
+    @mock.patch("uaclient.security.fix_security_issue_ids")
+    def test_multiple_issues_are_fixed_in_batch(
+        self, m_fix_security_issue_ids, m_fix_security_issue_id, FakeConfig
+    ):
+        cfg = FakeConfig()
+        args = mock.MagicMock(
+            security_issue=["CVE-2020-1234", "USN-1234-1"],
+            from_file=None,
+            dry_run=True,
+            no_cache=False,
+        )
+        m_fix_security_issue_ids.return_value = (
+            FixStatus.SYSTEM_VULNERABLE_UNTIL_REBOOT
+        )
+
+        assert 2 == action_fix(args, cfg=cfg)
+        assert [
+            mock.call(
+                cfg=cfg,
+                issue_ids=["CVE-2020-1234", "USN-1234-1"],
+                dry_run=True,
+                use_cache=True,
+            )
+        ] == m_fix_security_issue_ids.call_args_list
+        assert 0 == m_fix_security_issue_id.call_count
+
+    @pytest.mark.parametrize("use_stdin", ((False), (True)))
+    @mock.patch("uaclient.security.fix_security_issue_ids")
+    def test_issues_are_read_from_file(
+        self, m_fix_security_issue_ids, use_stdin, tmpdir, FakeConfig
+    ):
+        content = "# CVEs from the scanner\nCVE-2020-1234\n\n  USN-1234-1\n"
+        issues_file = tmpdir.join("issues")
+        issues_file.write(content)
+        cfg = FakeConfig()
+        args = mock.MagicMock(
+            security_issue=["CVE-2021-1234"],
+            from_file="-" if use_stdin else issues_file.strpath,
+            dry_run=False,
+            no_cache=True,
+        )
+        m_fix_security_issue_ids.return_value = FixStatus.SYSTEM_NON_VULNERABLE
+
+        with mock.patch("sys.stdin", mock.MagicMock()) as m_stdin:
+            m_stdin.readlines.return_value = content.splitlines(True)
+            assert 0 == action_fix(args, cfg=cfg)
+
+        assert [
+            mock.call(
+                cfg=cfg,
+                issue_ids=["CVE-2021-1234", "CVE-2020-1234", "USN-1234-1"],
+                dry_run=False,
+                use_cache=False,
+            )
+        ] == m_fix_security_issue_ids.call_args_list
+
+    @mock.patch("uaclient.security.fix_security_issue_ids")
+    def test_error_when_issues_file_cannot_be_read(
+        self, m_fix_security_issue_ids, tmpdir, FakeConfig
+    ):
+        issues_file = tmpdir.join("missing")
+        args = mock.MagicMock(security_issue=[], from_file=issues_file.strpath)
+
+        with pytest.raises(exceptions.UserFacingError) as excinfo:
+            action_fix(args, cfg=FakeConfig())
+
+        assert (
+            messages.FIX_CANNOT_READ_ISSUES_FILE.name == excinfo.value.msg_code
+        )
+        assert (
+            "Unable to read security issues from {}: No such file or"
+            " directory".format(issues_file.strpath)
+        ) == excinfo.value.msg
+        assert 0 == m_fix_security_issue_ids.call_count
+
+    def test_error_when_no_issue_is_provided(self, FakeConfig):
+        args = mock.MagicMock(security_issue=[], from_file=None)
+        with pytest.raises(exceptions.UserFacingError) as excinfo:
+            action_fix(args, cfg=FakeConfig())
+        assert "no issue was provided" in str(excinfo.value)
@@ -136,7 +136,7 @@ class TestActionRefresh:
             mock.call(Notice.OPERATION_IN_PROGRESS),
         ] == m_remove_notice.call_args_list
 
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_refresh_messages_error(self, m_update_motd, FakeConfig):
         """On failure in update_motd_messages emit an error."""
         m_update_motd.side_effect = Exception("test")
@@ -150,7 +150,7 @@ class TestActionRefresh:
     @mock.patch("uaclient.jobs.update_messaging.exists", return_value=True)
     @mock.patch("logging.exception")
     @mock.patch("uaclient.system.subp")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_refresh_messages_doesnt_fail_if_update_notifier_does(
         self,
         m_update_motd,
@@ -174,8 +174,8 @@ class TestActionRefresh:
         assert messages.REFRESH_MESSAGES_SUCCESS in capsys.readouterr()[0]
 
     @mock.patch("uaclient.apt_news.update_apt_news")
-    @mock.patch("uaclient.cli.refresh_motd")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.refresh_motd")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     def test_refresh_messages_happy_path(
         self,
         m_update_motd,
@@ -232,8 +232,8 @@ class TestActionRefresh:
         assert [mock.call()] == m_process_config.call_args_list
 
     @mock.patch("uaclient.apt_news.update_apt_news")
-    @mock.patch("uaclient.cli.refresh_motd")
-    @mock.patch("uaclient.cli.update_motd_messages")
+    @mock.patch("uaclient.jobs.update_messaging.refresh_motd")
+    @mock.patch("uaclient.jobs.update_messaging.update_motd_messages")
     @mock.patch("uaclient.contract.request_updated_contract")
     @mock.patch("uaclient.config.UAConfig.process_config")
     @mock.patch("uaclient.files.notices.NoticesManager.remove")
@@ -16,7 +16,7 @@ M_PATH = "uaclient.cli."
 
 HELP_OUTPUT = textwrap.dedent(
     """\
-usage: security-status \[-h\] \[--format {json,yaml,text}\]
+usage: security-status \[-h\] \[--format {json,yaml,text}\] \[--refresh\]
                        \[--thirdparty \| --unavailable \| --esm-infra\ \| --esm-apps]
 
 Show security updates for packages in the system, including all
@@ -40,6 +40,8 @@ complete status on Ubuntu Pro services, run 'pro status'.
   -h, --help            show this help message and exit
   --format {json,yaml,text}
                         Format for the output
+  --refresh             Ignore the cached json/yaml result and check every
+                        installed package again
   --thirdparty          List and present information about third-party
                         packages
   --unavailable         List and present information about unavailable
@@ -50,8 +52,8 @@ complete status on Ubuntu Pro services, run 'pro status'.
 )
 
 
-@mock.patch(M_PATH + "security_status.security_status")
-@mock.patch(M_PATH + "security_status.security_status_dict")
+@mock.patch("uaclient.security_status.security_status")
+@mock.patch("uaclient.security_status.security_status_dict")
 @mock.patch(M_PATH + "contract.get_available_resources")
 class TestActionSecurityStatus:
     @mock.patch(M_PATH + "setup_logging")
@@ -96,6 +98,7 @@ class TestActionSecurityStatus:
         args.unavailable = False
         args.esm_infra = False
         args.esm_apps = False
+        args.refresh = False
         action_security_status(args, cfg=cfg)
 
         if output_format == "json":
@@ -107,6 +110,9 @@ class TestActionSecurityStatus:
                 ),
             ]
             assert m_safe_dump.call_count == 0
+            assert m_security_status_dict.call_args_list == [
+                mock.call(cfg, refresh=False)
+            ]
         elif output_format == "yaml":
             assert m_safe_dump.call_args_list == [
                 mock.call(
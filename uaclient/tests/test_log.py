@@ -1,7 +1,10 @@
 import json
 import logging
+import queue
+import threading
 from io import StringIO
 
+import mock
 import pytest
 
 from uaclient import log as pro_log
@@ -121,6 +124,31 @@ class TestLogger:
         log = caplog_text()
         assert expected in log
 
+    def test_messages_redacting_themselves_are_formatted_when_emitted(
+        self,
+    ):
+        message = mock.MagicMock(redacts_itself=True)
+        message.__str__.return_value = "token: SEKRET"
+        logger = logging.getLogger("test_redaction_filter")
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addFilter(pro_log.RedactionFilter())
+        buffer = StringIO()
+        handler = logging.StreamHandler(buffer)
+        handler.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        try:
+            logger.debug(message)
+            assert 0 == message.__str__.call_count
+
+            handler.setLevel(logging.DEBUG)
+            logger.debug(message)
+        finally:
+            logger.removeHandler(handler)
+
+        assert 1 == message.__str__.call_count
+        assert "token: SEKRET\n" == buffer.getvalue()
+
 
 class TestLoggerFormatter:
     @pytest.mark.parametrize(
@@ -157,3 +185,105 @@ class TestLoggerFormatter:
             assert val[6].get("key") == extra.get("key")
         else:
             assert 7 == len(val)
+
+
+class BlockingHandler(logging.Handler):
+    """Record messages, blocking until unblocked."""
+
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.handling = threading.Event()
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.handling.set()
+        self.unblock.wait(5)
+        self.messages.append(record.getMessage())
+
+
+@pytest.fixture
+def queue_logger(logging_sandbox):
+    logger = logging.getLogger("queue-logger")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    yield logger
+    for handler in logger.handlers:
+        handler.close()
+    logger.handlers = []
+
+
+class TestQueueLogHandler:
+    def test_writes_json_records_to_file(self, queue_logger, tmpdir):
+        log_file = tmpdir.join("file.log")
+        queue_logger.addHandler(
+            pro_log.get_queue_file_handler(log_file.strpath)
+        )
+
+        queue_logger.debug("first %s", "record")
+        try:
+            raise ValueError("oops")
+        except ValueError:
+            queue_logger.exception("failed")
+        pro_log.flush_queue_handlers(queue_logger)
+
+        first, second = [json.loads(line) for line in log_file.readlines()]
+        assert ["DEBUG", "queue-logger", "first record"] == [
+            first[1],
+            first[2],
+            first[5],
+        ]
+        assert "failed" == second[5]
+        assert "ValueError: oops" in second[6]["exc_info"]
+
+    def test_close_writes_queued_records(self, queue_logger, tmpdir):
+        log_file = tmpdir.join("file.log")
+        handler = pro_log.get_queue_file_handler(log_file.strpath)
+        queue_logger.addHandler(handler)
+
+        for i in range(100):
+            queue_logger.debug("record %d", i)
+        handler.close()
+        queue_logger.debug("after close")
+
+        assert 101 == len(log_file.readlines())
+        assert not handler.listener.running
+
+    def test_arguments_are_formatted_when_queued(self, queue_logger):
+        blocking_handler = BlockingHandler()
+        listener = pro_log.QueueLogListener(queue.Queue(), blocking_handler)
+        listener.start()
+        queue_logger.addHandler(pro_log.QueueLogHandler(listener))
+        arg = ["before"]
+
+        queue_logger.debug("%r", arg)
+        arg[0] = "after"
+        blocking_handler.unblock.set()
+        pro_log.flush_queue_handlers(queue_logger)
+
+        assert ["['before']"] == blocking_handler.messages
+
+    def test_drops_debug_records_when_queue_is_full(self, queue_logger):
+        blocking_handler = BlockingHandler()
+        listener = pro_log.QueueLogListener(queue.Queue(2), blocking_handler)
+        listener.start()
+        handler = pro_log.QueueLogHandler(listener)
+        queue_logger.addHandler(handler)
+
+        queue_logger.debug("handled")
+        assert blocking_handler.handling.wait(5)
+        for i in range(4):
+            queue_logger.debug("queued %d", i)
+        assert 2 == handler.dropped
+        blocking_handler.unblock.set()
+        queue_logger.info("not dropped")
+        pro_log.flush_queue_handlers(queue_logger)
+
+        assert [
+            "handled",
+            "queued 0",
+            "queued 1",
+            "not dropped",
+            "Dropped 2 debug log records while the log queue was full",
+        ] == blocking_handler.messages
+        assert 0 == handler.dropped
@@ -1,6 +1,7 @@
 import copy
 import datetime
 import textwrap
+import threading
 from collections import defaultdict
 
 import mock
@@ -16,6 +17,7 @@ from uaclient.files.notices import Notice
 from uaclient.messages import (
     ENABLE_REBOOT_REQUIRED_TMPL,
     FAIL_X,
+    FIX_CANNOT_INSTALL_PACKAGE,
     OKGREEN_CHECK,
     PROMPT_ENTER_TOKEN,
     PROMPT_EXPIRED_ENTER_TOKEN,
@@ -37,15 +39,19 @@ from uaclient.security import (
     API_V1_NOTICE_TMPL,
     API_V1_NOTICES,
     CVE,
+    UA_INFRA_POCKET,
+    UBUNTU_STANDARD_UPDATES_POCKET,
     USN,
     CVEPackageStatus,
     FixStatus,
+    IssueFixData,
     UASecurityClient,
     _check_attached,
     _check_subscription_for_required_service,
     _check_subscription_is_expired,
     _prompt_for_attach,
     fix_security_issue_id,
+    fix_security_issue_ids,
     get_cve_affected_source_packages_status,
     get_related_usns,
     get_usn_affected_packages_status,
@@ -55,6 +61,7 @@ from uaclient.security import (
     query_installed_source_pkg_versions,
     upgrade_packages_and_attach,
 )
+from uaclient.security_notice_db import SecurityNoticeDB
 from uaclient.status import colorize_commands
 
 M_PATH = "uaclient.contract."
@@ -874,36 +881,204 @@ class TestUASecurityClient:
             ] == request_url.call_args_list
 
 
+@mock.patch("uaclient.security.UASecurityClient._request_url")
+class TestUASecurityClientCache:
+    def test_fresh_responses_are_served_from_cache(
+        self, m_request_url, FakeConfig
+    ):
+        m_request_url.return_value = ({"id": "CVE-1"}, {"ETag": '"v1"'})
+        client = UASecurityClient(FakeConfig())
+
+        assert {"id": "CVE-1"} == client.get_cve("CVE-1").response
+        assert {"id": "CVE-1"} == client.get_cve("CVE-1").response
+        assert 1 == m_request_url.call_count
+
+    def test_use_cache_false_bypasses_cache(self, m_request_url, FakeConfig):
+        m_request_url.return_value = ({"id": "CVE-1"}, {})
+        cfg = FakeConfig()
+        UASecurityClient(cfg).get_cve("CVE-1")
+        client = UASecurityClient(cfg, use_cache=False)
+
+        assert client.cache is None
+        client.get_cve("CVE-1")
+        assert 2 == m_request_url.call_count
+
+    def test_query_params_are_part_of_the_cache_key(
+        self, m_request_url, FakeConfig
+    ):
+        m_request_url.return_value = ({"notices": []}, {})
+        client = UASecurityClient(FakeConfig())
+
+        client.get_notices(details="CVE-1")
+        client.get_notices(details="CVE-2")
+        client.get_notices(details="CVE-1")
+        assert 2 == m_request_url.call_count
+
+    @mock.patch("uaclient.security_api_cache.time.time")
+    def test_stale_responses_are_revalidated(
+        self, m_time, m_request_url, FakeConfig
+    ):
+        m_time.return_value = 0
+        m_request_url.return_value = (
+            {"id": "CVE-1"},
+            {"ETag": '"v1"', "Last-Modified": "yesterday"},
+        )
+        client = UASecurityClient(FakeConfig())
+        client.get_cve("CVE-1")
+
+        m_time.return_value = client.cache.ttl + 1
+        m_request_url.side_effect = exceptions.UrlError(
+            mock.MagicMock(), code=304
+        )
+        assert {"id": "CVE-1"} == client.get_cve("CVE-1").response
+
+        _args, kwargs = m_request_url.call_args
+        assert '"v1"' == kwargs["headers"]["If-None-Match"]
+        assert "yesterday" == kwargs["headers"]["If-Modified-Since"]
+        # The 304 makes the entry fresh again
+        client.get_cve("CVE-1")
+        assert 2 == m_request_url.call_count
+
+    @mock.patch("uaclient.security_api_cache.time.time")
+    def test_stale_responses_are_replaced_when_modified(
+        self, m_time, m_request_url, FakeConfig
+    ):
+        m_time.return_value = 0
+        m_request_url.return_value = ({"id": "old"}, {"ETag": '"v1"'})
+        client = UASecurityClient(FakeConfig())
+        client.get_cve("CVE-1")
+
+        m_time.return_value = client.cache.ttl + 1
+        m_request_url.return_value = ({"id": "new"}, {"ETag": '"v2"'})
+        assert {"id": "new"} == client.get_cve("CVE-1").response
+        assert (
+            '"v2"'
+            == client.cache.get(
+                client._get_cache_key(API_V1_CVE_TMPL.format(cve="CVE-1"), {})
+            ).etag
+        )
+
+    def test_errors_are_not_cached(self, m_request_url, FakeConfig):
+        m_request_url.side_effect = exceptions.UrlError(
+            mock.MagicMock(), code=500
+        )
+        client = UASecurityClient(FakeConfig())
+        for _ in range(2):
+            with pytest.raises(exceptions.UrlError):
+                client.get_cve("CVE-1")
+        assert 2 == m_request_url.call_count
+
+    def test_cache_disabled_with_response_overlay(
+        self, m_request_url, FakeConfig
+    ):
+        cfg = FakeConfig()
+        cfg.override_features({"serviceclient_url_responses": "/some/path"})
+        assert UASecurityClient(cfg).cache is None
+
+
+@mock.patch("uaclient.security.UASecurityClient._request_url")
+class TestUASecurityClientNoticeDB:
+    @pytest.fixture
+    def cfg(self, FakeConfig):
+        cfg = FakeConfig()
+        SecurityNoticeDB.from_cfg(cfg).import_dump(
+            {
+                "cves": [
+                    {
+                        "id": "CVE-2020-1234",
+                        "notices_ids": ["USN-1111-1"],
+                        "packages": [{"name": "openssl", "statuses": []}],
+                    }
+                ],
+                "notices": [
+                    {"id": "USN-1111-1", "cves_ids": ["CVE-2020-1234"]}
+                ],
+            }
+        )
+        return cfg
+
+    def test_known_issues_are_resolved_locally(self, m_request_url, cfg):
+        client = UASecurityClient(cfg)
+
+        assert "CVE-2020-1234" == client.get_cve("cve-2020-1234").id
+        assert "USN-1111-1" == client.get_notice("USN-1111-1").id
+        assert ["USN-1111-1"] == [
+            usn.id for usn in client.get_notices(details="CVE-2020-1234")
+        ]
+        assert ["CVE-2020-1234"] == [
+            cve.id for cve in client.get_cves(package="openssl")
+        ]
+        assert 0 == m_request_url.call_count
+
+    def test_unknown_issues_use_the_security_api(self, m_request_url, cfg):
+        m_request_url.return_value = ({"id": "USN-2222-1"}, {})
+        client = UASecurityClient(cfg, use_cache=False)
+
+        assert "USN-2222-1" == client.get_notice("USN-2222-1").id
+        assert 1 == m_request_url.call_count
+
+    @pytest.mark.parametrize(
+        "filters",
+        (
+            {"release": "focal"},
+            {"limit": 1},
+            {"offset": 1},
+            {"order": "oldest"},
+        ),
+    )
+    def test_filtered_notices_use_the_security_api(
+        self, m_request_url, filters, cfg
+    ):
+        m_request_url.return_value = ({"notices": []}, {})
+        client = UASecurityClient(cfg, use_cache=False)
+
+        assert [] == client.get_notices(details="CVE-2020-1234", **filters)
+        assert 1 == m_request_url.call_count
+
+    def test_db_disabled_with_response_overlay(self, m_request_url, cfg):
+        cfg.override_features({"serviceclient_url_responses": "/some/path"})
+        assert UASecurityClient(cfg).notice_db is None
+
+    def test_db_unused_when_missing(self, m_request_url, FakeConfig):
+        assert UASecurityClient(FakeConfig()).notice_db is None
+
+
 class TestQueryInstalledPkgSources:
     @pytest.mark.parametrize(
-        "dpkg_out,results",
+        "dpkg_status,results",
         (
             # Ignore b non-installed status
-            ("a,,1.2,installed\nb,b,1.2,config-files", {"a": {"a": "1.2"}}),
+            (
+                "Package: a\nStatus: install ok installed\nVersion: 1.2\n\n"
+                "Package: b\nStatus: deinstall ok config-files\n"
+                "Version: 1.2\n",
+                {"a": {"a": "1.2"}},
+            ),
             # Handle cases where no Source is defined for the pkg
             (
-                "a,,1.2,installed\nzip,zip,3.0,installed",
+                "Package: a\nStatus: install ok installed\nVersion: 1.2\n\n"
+                "Package: zip\nStatus: install ok installed\n"
+                "Source: zip\nVersion: 3.0\n",
                 {"a": {"a": "1.2"}, "zip": {"zip": "3.0"}},
             ),
-            # Prefer Source package name to binary package name
+            # Prefer Source package name to binary package name, without
+            # the source version dpkg appends to binNMUs
             (
-                "b,bsrc,1.2,installed\nzip,zip,3.0,installed",
-                {"bsrc": {"b": "1.2"}, "zip": {"zip": "3.0"}},
+                "Package: b\nStatus: install ok installed\n"
+                "Source: bsrc (1.2)\nVersion: 1.2+b1\n\n"
+                "Package: zip\nStatus: install ok installed\n"
+                "Source: zip\nVersion: 3.0\n",
+                {"bsrc": {"b": "1.2+b1"}, "zip": {"zip": "3.0"}},
             ),
         ),
     )
-    @mock.patch("uaclient.security.system.subp")
-    @mock.patch("uaclient.system.get_platform_info")
     def test_result_keyed_by_source_package_name(
-        self, get_platform_info, subp, dpkg_out, results
+        self, dpkg_status, results, tmpdir
     ):
-        get_platform_info.return_value = {"series": "bionic"}
-        subp.return_value = dpkg_out, ""
-        assert results == query_installed_source_pkg_versions()
-        _format = "-f=${Package},${Source},${Version},${db:Status-Status}\n"
-        assert [
-            mock.call(["dpkg-query", _format, "-W"])
-        ] == subp.call_args_list
+        status_file = tmpdir.join("status")
+        status_file.write(dpkg_status)
+        with mock.patch("uaclient.apt.DPKG_STATUS_FILE", status_file.strpath):
+            assert results == query_installed_source_pkg_versions()
 
 
 CVE_PKG_STATUS_NEEDED = {
@@ -2324,6 +2499,113 @@ class TestGetRelatedUSNs:
 
         assert [usn] == get_related_usns(usn, client)
 
+    def _usn_with_related_notices(self, client, usn_id, cves_notices):
+        return USN(
+            client,
+            {
+                "id": usn_id,
+                "cves": [
+                    {"id": "CVE-{}".format(i), "notices_ids": notices_ids}
+                    for i, notices_ids in enumerate(cves_notices)
+                ],
+            },
+        )
+
+    @mock.patch("uaclient.security.UASecurityClient.get_notice")
+    def test_related_usns_are_deduplicated_and_sorted(
+        self, m_get_notice, FakeConfig
+    ):
+        client = UASecurityClient(cfg=FakeConfig())
+        usn = self._usn_with_related_notices(
+            client,
+            "USN-1",
+            [["USN-3", "USN-1"], ["USN-2", "USN-3"], ["USN-4"]],
+        )
+        m_get_notice.side_effect = lambda notice_id: USN(
+            client, {"id": notice_id}
+        )
+
+        related_usns = get_related_usns(usn, client)
+
+        assert ["USN-1", "USN-2", "USN-3", "USN-4"] == [
+            related_usn.id for related_usn in related_usns
+        ]
+        assert usn is related_usns[0]
+        assert ["USN-2", "USN-3", "USN-4"] == sorted(
+            call[1]["notice_id"] for call in m_get_notice.call_args_list
+        )
+
+    @pytest.mark.parametrize(
+        "max_workers,features,expected_workers",
+        (
+            (None, {}, 3),
+            (None, {"security_api_max_workers": 2}, 2),
+            (1, {"security_api_max_workers": 2}, 1),
+            (0, {}, 1),
+        ),
+    )
+    @mock.patch("uaclient.security.ThreadPoolExecutor")
+    @mock.patch("uaclient.security.UASecurityClient.get_notice")
+    def test_parallelism_is_bounded(
+        self,
+        _m_get_notice,
+        m_executor,
+        max_workers,
+        features,
+        expected_workers,
+        FakeConfig,
+    ):
+        cfg = FakeConfig()
+        cfg.override_features(features)
+        client = UASecurityClient(cfg=cfg)
+        usn = self._usn_with_related_notices(
+            client, "USN-1", [["USN-2", "USN-3", "USN-4"]]
+        )
+        m_executor.return_value.__enter__.return_value.map.return_value = []
+
+        get_related_usns(usn, client, max_workers=max_workers)
+
+        assert [
+            mock.call(max_workers=expected_workers)
+        ] == m_executor.call_args_list
+
+    @mock.patch("uaclient.security.UASecurityClient.get_notice")
+    def test_related_usns_are_fetched_concurrently(
+        self, m_get_notice, FakeConfig
+    ):
+        """All requests must be in flight at the same time to pass."""
+        client = UASecurityClient(cfg=FakeConfig())
+        usn = self._usn_with_related_notices(
+            client, "USN-1", [["USN-2", "USN-3"], ["USN-4"]]
+        )
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fake_get_notice(notice_id):
+            barrier.wait()
+            return USN(client, {"id": notice_id})
+
+        m_get_notice.side_effect = fake_get_notice
+
+        related_usns = get_related_usns(usn, client, max_workers=3)
+        assert ["USN-2", "USN-3", "USN-4"] == [
+            related_usn.id for related_usn in related_usns
+        ]
+
+    @mock.patch("uaclient.security.UASecurityClient.get_notice")
+    def test_errors_fetching_related_usns_are_raised(
+        self, m_get_notice, FakeConfig
+    ):
+        client = UASecurityClient(cfg=FakeConfig())
+        usn = self._usn_with_related_notices(
+            client, "USN-1", [["USN-2", "USN-3"]]
+        )
+        m_get_notice.side_effect = exceptions.SecurityAPIError(
+            mock.MagicMock(), {"message": "not found"}
+        )
+
+        with pytest.raises(exceptions.SecurityAPIError):
+            get_related_usns(usn, client)
+
 
 class TestGetUSNAffectedPackagesStatus:
     @pytest.mark.parametrize(
@@ -2489,6 +2771,323 @@ class TestFixSecurityIssueId:
         assert expected_msg in exc.value.msg
 
 
+def _released_fix_data(released_pkgs, pocket="updates"):
+    """Build IssueFixData where every source package has a released fix.
+
+    :param released_pkgs: dict mapping source packages to a dict of binary
+                          packages and their fixed versions.
+    """
+    return IssueFixData(
+        affected_pkg_status={
+            src_pkg: CVEPackageStatus(
+                {"status": "released", "pocket": pocket, "description": ""}
+            )
+            for src_pkg in released_pkgs
+        },
+        usn_released_pkgs={
+            src_pkg: {
+                binary_pkg: {"version": version}
+                for binary_pkg, version in binary_pkgs.items()
+            }
+            for src_pkg, binary_pkgs in released_pkgs.items()
+        },
+    )
+
+
+@mock.patch("uaclient.security._get_beta_pockets", return_value={})
+@mock.patch("uaclient.security.print_affected_packages_header")
+@mock.patch("uaclient.security.apt.run_apt_update_command")
+@mock.patch("uaclient.security.apt.run_apt_command")
+@mock.patch("uaclient.security.apt.get_pkg_candidate_version")
+@mock.patch("uaclient.util.we_are_currently_root", return_value=True)
+@mock.patch("uaclient.security.query_installed_source_pkg_versions")
+@mock.patch("uaclient.security._get_issue_fix_data")
+class TestFixSecurityIssueIds:
+    def test_fixes_are_merged_into_a_single_upgrade(
+        self,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        m_candidate_version,
+        m_run_apt_command,
+        m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+        capsys,
+    ):
+        m_query_installed.return_value = {
+            "openssl": {"libssl": "1.0", "openssl": "1.0"},
+            "curl": {"curl": "2.0"},
+        }
+        m_candidate_version.return_value = "9.0"
+        fix_data = {
+            "CVE-2020-0001": _released_fix_data(
+                {"openssl": {"libssl": "1.1", "openssl": "1.1"}}
+            ),
+            "USN-1234-1": _released_fix_data(
+                {
+                    "openssl": {"libssl": "1.2", "openssl": "1.0"},
+                    "curl": {"curl": "2.1"},
+                }
+            ),
+        }
+        m_get_issue_fix_data.side_effect = lambda **kwargs: fix_data[
+            kwargs["issue_id"]
+        ]
+
+        with mock.patch("uaclient.security.system.should_reboot") as m_reboot:
+            m_reboot.return_value = False
+            with mock.patch("uaclient.livepatch.status", return_value=None):
+                assert FixStatus.SYSTEM_NON_VULNERABLE == (
+                    fix_security_issue_ids(
+                        FakeConfig(),
+                        ["cve-2020-0001", "USN-1234-1", "CVE-2020-0001"],
+                    )
+                )
+
+        assert 1 == m_query_installed.call_count
+        assert ["CVE-2020-0001", "USN-1234-1"] == [
+            call[1]["issue_id"] for call in m_get_issue_fix_data.call_args_list
+        ]
+        assert 1 == m_run_apt_update.call_count
+        [apt_call] = m_run_apt_command.call_args_list
+        assert ["apt-get", "install", "--only-upgrade", "-y"] == apt_call[1][
+            "cmd"
+        ][:4]
+        assert ["curl", "libssl", "openssl"] == sorted(apt_call[1]["cmd"][4:])
+        assert 3 == m_candidate_version.call_count
+
+        out, _ = capsys.readouterr()
+        assert (
+            OKGREEN_CHECK
+            + " CVE-2020-0001 is resolved.\n"
+            + OKGREEN_CHECK
+            + " USN-1234-1 is resolved.\n"
+        ) in out
+
+    def test_failed_issues_do_not_block_the_others(
+        self,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        m_candidate_version,
+        m_run_apt_command,
+        _m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+        capsys,
+    ):
+        m_query_installed.return_value = {
+            "curl": {"curl": "2.0"},
+            "bash": {"bash": "1.0"},
+        }
+        m_candidate_version.return_value = "1.0"
+
+        def fake_fix_data(issue_id, **kwargs):
+            if issue_id == "USN-1111-1":
+                raise exceptions.UserFacingError(
+                    "Error: USN-1111-1 not found."
+                )
+            if issue_id == "USN-2222-1":
+                return _released_fix_data({"bash": {"bash": "1.1"}})
+            return _released_fix_data({"curl": {"curl": "2.1"}})
+
+        m_get_issue_fix_data.side_effect = fake_fix_data
+        m_candidate_version.side_effect = lambda pkg: {
+            "curl": "2.1",
+            "bash": "1.0",
+        }[pkg]
+
+        with mock.patch("uaclient.security.system.should_reboot") as m_reboot:
+            m_reboot.return_value = False
+            assert FixStatus.SYSTEM_STILL_VULNERABLE == fix_security_issue_ids(
+                FakeConfig(), ["USN-1111-1", "USN-2222-1", "USN-3333-1"]
+            )
+
+        [apt_call] = m_run_apt_command.call_args_list
+        assert ["curl"] == apt_call[1]["cmd"][4:]
+
+        out, _ = capsys.readouterr()
+        assert "Error: USN-1111-1 not found." in out
+        assert "1 package is still affected: bash" in out
+        assert FAIL_X + " USN-1111-1 is not resolved." in out
+        assert FAIL_X + " USN-2222-1 is not resolved." in out
+        assert OKGREEN_CHECK + " USN-3333-1 is resolved." in out
+
+    @mock.patch("uaclient.security.notices.add")
+    def test_reboot_required_after_upgrade(
+        self,
+        m_notices_add,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        m_candidate_version,
+        _m_run_apt_command,
+        _m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+        capsys,
+    ):
+        m_query_installed.return_value = {"linux": {"linux-image": "1.0"}}
+        m_candidate_version.return_value = "1.1"
+        m_get_issue_fix_data.return_value = _released_fix_data(
+            {"linux": {"linux-image": "1.1"}}
+        )
+
+        with mock.patch("uaclient.security.system.should_reboot") as m_reboot:
+            m_reboot.return_value = True
+            assert (
+                FixStatus.SYSTEM_VULNERABLE_UNTIL_REBOOT
+                == fix_security_issue_ids(
+                    FakeConfig(), ["USN-1111-1", "USN-2222-1"]
+                )
+            )
+
+        assert [
+            mock.call(Notice.ENABLE_REBOOT_REQUIRED, operation="fix operation")
+        ] == m_notices_add.call_args_list
+        out, _ = capsys.readouterr()
+        assert 1 == out.count(
+            ENABLE_REBOOT_REQUIRED_TMPL.format(operation="fix operation")
+        )
+
+    def test_highest_installable_fixed_version_is_installed(
+        self,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        m_candidate_version,
+        m_run_apt_command,
+        _m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+        capsys,
+    ):
+        m_query_installed.return_value = {"openssl": {"libssl": "1.0"}}
+        m_candidate_version.return_value = "1.1"
+        fix_data = {
+            "USN-1111-1": _released_fix_data({"openssl": {"libssl": "1.2"}}),
+            "USN-2222-1": _released_fix_data({"openssl": {"libssl": "1.1"}}),
+        }
+        m_get_issue_fix_data.side_effect = lambda **kwargs: fix_data[
+            kwargs["issue_id"]
+        ]
+
+        with mock.patch("uaclient.security.system.should_reboot") as m_reboot:
+            m_reboot.return_value = False
+            assert FixStatus.SYSTEM_STILL_VULNERABLE == fix_security_issue_ids(
+                FakeConfig(), ["USN-1111-1", "USN-2222-1"]
+            )
+
+        [apt_call] = m_run_apt_command.call_args_list
+        assert ["libssl"] == apt_call[1]["cmd"][4:]
+        out, _ = capsys.readouterr()
+        assert (
+            "- "
+            + FIX_CANNOT_INSTALL_PACKAGE.format(
+                package="libssl", version="1.2"
+            ).msg
+        ) in out
+        assert FAIL_X + " USN-1111-1 is not resolved." in out
+        assert OKGREEN_CHECK + " USN-2222-1 is resolved." in out
+
+    @mock.patch("uaclient.security._check_pocket_requirements")
+    def test_fixes_from_unavailable_pockets_fall_back_to_lower_versions(
+        self,
+        m_check_pocket,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        m_candidate_version,
+        m_run_apt_command,
+        _m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+        capsys,
+    ):
+        m_check_pocket.side_effect = (
+            lambda cfg, pocket, dry_run: pocket != UA_INFRA_POCKET
+        )
+        m_query_installed.return_value = {"curl": {"curl": "1.0"}}
+        m_candidate_version.return_value = "1.1"
+        fix_data = {
+            "CVE-2020-0001": _released_fix_data({"curl": {"curl": "1.1"}}),
+            "CVE-2020-0002": _released_fix_data(
+                {"curl": {"curl": "1.1+esm1"}}, pocket="esm-infra"
+            ),
+        }
+        m_get_issue_fix_data.side_effect = lambda **kwargs: fix_data[
+            kwargs["issue_id"]
+        ]
+
+        with mock.patch("uaclient.security.system.should_reboot") as m_reboot:
+            m_reboot.return_value = False
+            with mock.patch("uaclient.livepatch.status", return_value=None):
+                assert (
+                    FixStatus.SYSTEM_STILL_VULNERABLE
+                    == fix_security_issue_ids(
+                        FakeConfig(), ["CVE-2020-0001", "CVE-2020-0002"]
+                    )
+                )
+
+        assert [
+            mock.call(mock.ANY, UA_INFRA_POCKET, False),
+            mock.call(mock.ANY, UBUNTU_STANDARD_UPDATES_POCKET, False),
+        ] == m_check_pocket.call_args_list
+        [apt_call] = m_run_apt_command.call_args_list
+        assert ["curl"] == apt_call[1]["cmd"][4:]
+        out, _ = capsys.readouterr()
+        assert OKGREEN_CHECK + " CVE-2020-0001 is resolved." in out
+        assert FAIL_X + " CVE-2020-0002 is not resolved." in out
+
+    @mock.patch("uaclient.livepatch.status")
+    def test_livepatch_status_is_queried_once(
+        self,
+        m_livepatch_status,
+        m_get_issue_fix_data,
+        m_query_installed,
+        _m_root,
+        _m_candidate_version,
+        m_run_apt_command,
+        _m_run_apt_update,
+        _m_header,
+        _m_beta_pockets,
+        FakeConfig,
+    ):
+        m_livepatch_status.return_value = livepatch.LivepatchStatusStatus(
+            kernel="4.4.0-210.242-generic",
+            supported=None,
+            livepatch=livepatch.LivepatchPatchStatus(
+                state="applied",
+                version="87.1",
+                fixes=[
+                    livepatch.LivepatchPatchFixStatus(
+                        name="cve-2013-1798", patched=True
+                    )
+                ],
+            ),
+        )
+        m_query_installed.return_value = {}
+        m_get_issue_fix_data.return_value = IssueFixData(
+            affected_pkg_status={}, usn_released_pkgs={}
+        )
+
+        assert FixStatus.SYSTEM_NON_VULNERABLE == fix_security_issue_ids(
+            FakeConfig(), ["CVE-2013-1798", "CVE-2013-1799"]
+        )
+
+        assert 1 == m_livepatch_status.call_count
+        assert ["CVE-2013-1799"] == [
+            call[1]["issue_id"] for call in m_get_issue_fix_data.call_args_list
+        ]
+        assert 0 == m_run_apt_command.call_count
+
+
 class TestMergeUSNReleasedBinaryPackageVersions:
     @pytest.mark.parametrize(
         "usns_released_packages, expected_pkgs_dict",
@@ -0,0 +1,118 @@
+import os
+
+import mock
+
+from uaclient.security_api_cache import (
+    SECURITY_API_CACHE_SUBDIR,
+    SecurityAPICache,
+)
+
+M_PATH = "uaclient.security_api_cache."
+URL = "https://ubuntu.com/security/cves/CVE-2020-1234.json"
+
+
+class TestSecurityAPICache:
+    def test_get_returns_none_when_entry_is_missing(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        assert cache.get(URL) is None
+
+    def test_put_and_get_roundtrip(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        cache.put(
+            URL,
+            {"id": "CVE-2020-1234"},
+            {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 GMT"},
+        )
+
+        entry = cache.get(URL)
+        assert {"id": "CVE-2020-1234"} == entry.response
+        assert '"abc"' == entry.etag
+        assert "Mon, 01 Jan 2024 GMT" == entry.last_modified
+        assert {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 GMT",
+        } == cache.conditional_headers(entry)
+
+    def test_header_lookup_is_case_insensitive(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        entry = cache.put(URL, {}, {"etag": '"abc"'})
+        assert '"abc"' == entry.etag
+        assert entry.last_modified is None
+        assert {"If-None-Match": '"abc"'} == cache.conditional_headers(entry)
+
+    @mock.patch(M_PATH + "time.time")
+    def test_entries_expire_after_ttl(self, m_time, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath, ttl=10)
+        m_time.return_value = 100
+        cache.put(URL, {}, {})
+        m_time.return_value = 109
+        assert cache.is_fresh(cache.get(URL))
+        m_time.return_value = 110
+        entry = cache.get(URL)
+        assert not cache.is_fresh(entry)
+
+        m_time.return_value = 115
+        assert cache.is_fresh(cache.refresh(entry))
+        assert cache.is_fresh(cache.get(URL))
+
+    def test_invalid_entries_are_ignored(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        cache.put(URL, {}, {})
+        with open(cache._entry_path(URL), "w") as stream:
+            stream.write("not json")
+        assert cache.get(URL) is None
+        assert [] == cache.entries()
+
+    def test_least_recently_used_entries_are_evicted(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        urls = ["{}?{}".format(URL, i) for i in range(3)]
+        for i, url in enumerate(urls):
+            cache.put(url, {"data": "x" * 100}, {})
+            os.utime(cache._entry_path(url), (i, i))
+        # Using the oldest entry makes the second one the LRU
+        cache.get(urls[0])
+        entry_size = os.stat(cache._entry_path(urls[0])).st_size
+        cache.max_size = entry_size * 2 + 50
+
+        cache._evict()
+
+        assert cache.get(urls[0]) is not None
+        assert cache.get(urls[1]) is None
+        assert cache.get(urls[2]) is not None
+
+    def test_write_errors_are_not_fatal(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        with mock.patch(
+            M_PATH + "system.write_file", side_effect=PermissionError()
+        ):
+            entry = cache.put(URL, {"id": "1"}, {})
+        assert {"id": "1"} == entry.response
+        assert cache.get(URL) is None
+
+    def test_entries_and_clear(self, tmpdir):
+        cache = SecurityAPICache(tmpdir.strpath)
+        cache.put(URL, {}, {"ETag": '"abc"'})
+        [info] = cache.entries()
+        assert URL == info.url
+        assert info.fresh
+        assert '"abc"' == info.etag
+        assert info.size > 0
+
+        cache.clear()
+        assert [] == cache.entries()
+
+    def test_from_cfg_uses_data_dir_and_features(self, FakeConfig):
+        cfg = FakeConfig()
+        cfg.override_features(
+            {
+                "security_api_cache_ttl": 60,
+                "security_api_cache_max_size": 1024,
+            }
+        )
+        cache = SecurityAPICache.from_cfg(cfg)
+        assert (
+            os.path.join(cfg.data_dir, SECURITY_API_CACHE_SUBDIR)
+            == cache.directory
+        )
+        assert 60 == cache.ttl
+        assert 1024 == cache.max_size
@@ -0,0 +1,91 @@
+import gzip
+import json
+import os
+
+from uaclient.security_notice_db import (
+    SECURITY_NOTICE_DB_FILE,
+    NoticeDBStats,
+    SecurityNoticeDB,
+)
+
+CVE_1 = {
+    "id": "CVE-2020-1234",
+    "notices_ids": ["USN-1111-1", "USN-2222-1"],
+    "packages": [{"name": "openssl", "statuses": []}],
+}
+CVE_2 = {
+    "id": "CVE-2020-5678",
+    "notices_ids": [],
+    "packages": [{"name": "curl", "statuses": []}],
+}
+USN_1 = {
+    "id": "USN-1111-1",
+    "cves_ids": ["CVE-2020-1234"],
+    "release_packages": {
+        "focal": [
+            {"name": "openssl", "is_source": True, "version": "1.1"},
+            {
+                "name": "libssl1.1",
+                "source_link": "https://launchpad.net/ubuntu/+source/openssl",
+                "version": "1.1",
+            },
+        ]
+    },
+}
+USN_2 = {"id": "usn-2222-1", "cves_ids": ["cve-2020-1234"]}
+DUMP = {"cves": [CVE_1, CVE_2], "notices": [USN_1, USN_2]}
+
+
+class TestSecurityNoticeDB:
+    def test_missing_db_returns_nothing(self, tmpdir):
+        notice_db = SecurityNoticeDB(tmpdir.join("notices.db").strpath)
+        assert not notice_db.exists()
+        assert notice_db.get_cve("CVE-2020-1234") is None
+        assert notice_db.get_notices_for_cve("CVE-2020-1234") is None
+        assert NoticeDBStats(0, 0, 0) == notice_db.stats()
+        # Reading never creates the database
+        assert not notice_db.exists()
+
+    def test_import_and_lookup(self, tmpdir):
+        notice_db = SecurityNoticeDB(tmpdir.join("db", "notices.db").strpath)
+        assert NoticeDBStats(
+            cves=2, notices=2, packages=2
+        ) == notice_db.import_dump(DUMP)
+
+        assert CVE_1 == notice_db.get_cve("cve-2020-1234")
+        assert USN_2 == notice_db.get_notice("USN-2222-1")
+        assert notice_db.get_notice("USN-3333-1") is None
+        assert [USN_1, USN_2] == notice_db.get_notices_for_cve("CVE-2020-1234")
+        assert [] == notice_db.get_notices_for_cve("CVE-2020-5678")
+        assert [CVE_1] == notice_db.get_cves_for_package("openssl")
+        assert NoticeDBStats(2, 2, 2) == notice_db.stats()
+
+    def test_reimport_replaces_entries(self, tmpdir):
+        notice_db = SecurityNoticeDB(tmpdir.join("notices.db").strpath)
+        notice_db.import_dump(DUMP)
+        updated_cve = dict(CVE_2, description="updated")
+        notice_db.import_dump({"cves": [updated_cve]})
+
+        assert updated_cve == notice_db.get_cve("CVE-2020-5678")
+        assert NoticeDBStats(2, 2, 2) == notice_db.stats()
+
+    def test_import_gzip_file_and_clear(self, tmpdir):
+        dump_path = tmpdir.join("dump.json.gz").strpath
+        with gzip.open(dump_path, "wt") as stream:
+            json.dump(DUMP, stream)
+        notice_db = SecurityNoticeDB(tmpdir.join("notices.db").strpath)
+
+        notice_db.import_file(dump_path)
+        assert CVE_2 == notice_db.get_cve("CVE-2020-5678")
+
+        notice_db.clear()
+        assert not notice_db.exists()
+
+    def test_from_cfg(self, FakeConfig):
+        cfg = FakeConfig()
+        assert (
+            os.path.join(cfg.data_dir, SECURITY_NOTICE_DB_FILE)
+            == SecurityNoticeDB.from_cfg(cfg).path
+        )
+        cfg.override_features({"security_notice_db": "/srv/notices.db"})
+        assert "/srv/notices.db" == SecurityNoticeDB.from_cfg(cfg).path
@@ -1,3 +1,4 @@
+import os
 from collections import defaultdict
 from typing import List, Optional
 
@@ -6,12 +7,15 @@ import pytest
 
 from uaclient import livepatch
 from uaclient.security_status import (
+    SECURITY_STATUS_CACHE_KEY,
     RebootStatus,
     UpdateStatus,
     filter_security_updates,
+    get_apt_cache_snapshot,
     get_livepatch_fixed_cves,
     get_origin_for_package,
     get_reboot_status,
+    get_security_status_fingerprint,
     get_ua_info,
     get_update_status,
     security_status_dict,
@@ -517,16 +521,91 @@ class TestSecurityStatus:
                 == "not-a-security-update"
             )
 
+    @mock.patch(M_PATH + "get_esm_cache")
+    def test_filter_security_updates_skips_non_upgradable_packages(
+        self, m_esm_cache
+    ):
+        installed = mock_version("1.0", [MOCK_ORIGINS["now"]])
+        package = mock_package(
+            name="pinned",
+            installed_version=installed,
+            other_versions=[
+                mock_version("2.0", [MOCK_ORIGINS["standard-security"]])
+            ],
+        )
+        # A pin keeps the installed version as the candidate
+        package.candidate = installed
+        esm_cache = mock.MagicMock()
+        esm_cache.keys.return_value = ["other-package"]
+        m_esm_cache.return_value = esm_cache
+
+        with mock.patch(
+            M_PATH + "get_origin_information_to_service_map",
+            return_value=ORIGIN_TO_SERVICE_MOCK,
+        ):
+            assert {} == filter_security_updates([package])
+        # Packages missing from the ESM cache index are never looked up
+        assert 0 == esm_cache.__getitem__.call_count
+
+    @mock.patch(M_PATH + "get_esm_cache", return_value={})
+    @mock.patch(M_PATH + "get_apt_cache")
+    def test_apt_cache_snapshot_matches_filter_security_updates(
+        self, m_cache, _m_esm_cache
+    ):
+        infra_package = mock_package(
+            name="infra-update-available",
+            installed_version=mock_version(
+                "1.0", [MOCK_ORIGINS["now"], MOCK_ORIGINS["archive_main"]]
+            ),
+            other_versions=[mock_version("2.0", [MOCK_ORIGINS["infra"]])],
+        )
+        security_package = mock_package(
+            name="security-update-available",
+            installed_version=mock_version(
+                "1.0", [MOCK_ORIGINS["now"], MOCK_ORIGINS["archive_main"]]
+            ),
+            other_versions=[
+                mock_version("2.0", [MOCK_ORIGINS["standard-security"]])
+            ],
+        )
+        not_installed = mock_package(name="not-installed")
+        m_cache.return_value = [infra_package, security_package, not_installed]
+
+        with mock.patch(
+            M_PATH + "get_origin_information_to_service_map",
+            return_value=ORIGIN_TO_SERVICE_MOCK,
+        ):
+            snapshot = get_apt_cache_snapshot()
+            assert [infra_package, security_package] == (
+                snapshot.packages_by_origin["all"]
+            )
+            assert [infra_package, security_package] == (
+                snapshot.packages_by_origin["main"]
+            )
+            for packages in (
+                [infra_package, security_package],
+                [security_package],
+            ):
+                assert filter_security_updates(
+                    packages
+                ) == snapshot.security_updates(packages)
+            assert (
+                filter_security_updates([infra_package, security_package])
+                == snapshot.security_updates()
+            )
+
     @mock.patch(M_PATH + "get_reboot_status")
     @mock.patch(M_PATH + "get_livepatch_fixed_cves", return_value=[])
     @mock.patch(M_PATH + "status", return_value={"attached": False})
     @mock.patch(M_PATH + "get_origin_for_package", return_value="main")
-    @mock.patch(M_PATH + "filter_security_updates")
+    @mock.patch(M_PATH + "_get_package_security_updates")
+    @mock.patch(M_PATH + "get_esm_cache")
     @mock.patch(M_PATH + "get_apt_cache")
     def test_security_status_dict(
         self,
         m_cache,
-        m_filter_sec_updates,
+        m_esm_cache,
+        m_package_sec_updates,
         _m_get_origin,
         _m_status,
         _m_livepatch_cves,
@@ -538,12 +617,16 @@ class TestSecurityStatus:
         m_version = mock_version("1.0", size=123456)
         m_package = mock_package("example_package", m_version)
 
-        m_cache.return_value = [m_package] * 10
-        m_filter_sec_updates.return_value = {
-            "esm-infra": [(m_version, "some.url.for.esm")] * 2,
-            "esm-apps": [],
-            "standard-security": [],
-        }
+        m_cache.return_value = [m_package] + [
+            mock_package("other_package_{}".format(i), mock_version("1.0"))
+            for i in range(9)
+        ]
+        m_package_sec_updates.side_effect = lambda package, *_: defaultdict(
+            list,
+            {"esm-infra": [(m_version, "some.url.for.esm")] * 2}
+            if package is m_package
+            else {},
+        )
         m_reboot_status.return_value = RebootStatus.REBOOT_NOT_REQUIRED
 
         expected_output = {
@@ -590,6 +673,108 @@ class TestSecurityStatus:
         }
 
         assert expected_output == security_status_dict(cfg)
+        # Both caches are opened only once
+        assert 1 == m_cache.call_count
+        assert 1 == m_esm_cache.call_count
+
+
+@mock.patch(M_PATH + "get_reboot_status")
+@mock.patch(M_PATH + "get_livepatch_fixed_cves", return_value=[])
+@mock.patch(M_PATH + "get_security_status_fingerprint")
+@mock.patch(M_PATH + "_get_security_status_packages_dict")
+class TestSecurityStatusDictCache:
+    RESULT = {
+        "summary": {"ua": {"attached": False}, "num_installed_packages": 1},
+        "packages": [{"package": "example_package"}],
+    }
+
+    def test_result_is_reused_while_fingerprint_matches(
+        self,
+        m_packages_dict,
+        m_fingerprint,
+        m_livepatch_cves,
+        m_reboot_status,
+        FakeConfig,
+    ):
+        cfg = FakeConfig()
+        m_packages_dict.return_value = self.RESULT
+        m_fingerprint.return_value = [["/var/lib/dpkg/status", 1, 2]]
+        m_reboot_status.return_value = RebootStatus.REBOOT_NOT_REQUIRED
+
+        first = security_status_dict(cfg)
+        m_reboot_status.return_value = RebootStatus.REBOOT_REQUIRED
+        second = security_status_dict(cfg)
+
+        assert 1 == m_packages_dict.call_count
+        assert first["packages"] == second["packages"]
+        assert "no" == first["summary"]["reboot_required"]
+        # Reboot and Livepatch information is never cached
+        assert "yes" == second["summary"]["reboot_required"]
+        assert 2 == m_livepatch_cves.call_count
+
+    def test_fingerprint_change_or_refresh_recomputes(
+        self,
+        m_packages_dict,
+        m_fingerprint,
+        _m_livepatch_cves,
+        m_reboot_status,
+        FakeConfig,
+    ):
+        cfg = FakeConfig()
+        m_packages_dict.return_value = self.RESULT
+        m_fingerprint.return_value = [["/var/lib/dpkg/status", 1, 2]]
+        m_reboot_status.return_value = RebootStatus.REBOOT_NOT_REQUIRED
+
+        security_status_dict(cfg)
+        security_status_dict(cfg, refresh=True)
+        assert 2 == m_packages_dict.call_count
+
+        m_fingerprint.return_value = [["/var/lib/dpkg/status", 3, 2]]
+        security_status_dict(cfg)
+        assert 3 == m_packages_dict.call_count
+
+    def test_write_errors_are_not_fatal(
+        self,
+        m_packages_dict,
+        m_fingerprint,
+        _m_livepatch_cves,
+        m_reboot_status,
+        FakeConfig,
+    ):
+        cfg = FakeConfig()
+        m_packages_dict.return_value = self.RESULT
+        m_fingerprint.return_value = []
+        m_reboot_status.return_value = RebootStatus.REBOOT_NOT_REQUIRED
+
+        with mock.patch.object(
+            cfg, "write_cache", side_effect=PermissionError()
+        ):
+            result = security_status_dict(cfg)
+        assert self.RESULT["packages"] == result["packages"]
+        assert cfg.read_cache(SECURITY_STATUS_CACHE_KEY) is None
+
+
+class TestGetSecurityStatusFingerprint:
+    def test_fingerprint_follows_file_changes(self, tmpdir, FakeConfig):
+        lists_dir = tmpdir.mkdir("lists")
+        lists_dir.join("archive_Packages").write("Package: a\n")
+        status_file = tmpdir.join("status")
+        status_file.write("Package: a\n")
+        cfg = FakeConfig()
+
+        with mock.patch(
+            M_PATH + "DPKG_STATUS_FILE", status_file.strpath
+        ), mock.patch(M_PATH + "APT_LISTS_DIR", lists_dir.strpath):
+            fingerprint = get_security_status_fingerprint(cfg)
+            assert [
+                status_file.strpath,
+                os.stat(status_file.strpath).st_mtime_ns,
+                len("Package: a\n"),
+            ] in fingerprint
+            assert fingerprint == get_security_status_fingerprint(cfg)
+
+            lists_dir.join("security_Packages").write("Package: b\n")
+            assert fingerprint != get_security_status_fingerprint(cfg)
 
 
 @mock.patch(M_PATH + "livepatch.status")
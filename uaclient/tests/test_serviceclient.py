@@ -6,7 +6,7 @@ from urllib.parse import urlencode
 import mock
 import pytest
 
-from uaclient import exceptions
+from uaclient import connection_pool, exceptions
 from uaclient.serviceclient import UAServiceClient
 
 
@@ -91,9 +91,35 @@ class TestRequestUrl:
                 method=None,
                 timeout=30,
                 log_response_body=True,
+                urlopen=connection_pool.get_connection_pool().urlopen,
             )
         ] == m_readurl.call_args_list
 
+    @pytest.mark.parametrize(
+        "features,pooled",
+        (
+            ({}, True),
+            ({"http_connection_pool": True}, True),
+            ({"http_connection_pool": False}, False),
+            ({"http_connection_pool": "false"}, False),
+        ),
+    )
+    @mock.patch("uaclient.serviceclient.util.readurl")
+    def test_connection_pool_feature(
+        self, m_readurl, features, pooled, FakeConfig
+    ):
+        m_readurl.return_value = ({}, {})
+        cfg = FakeConfig()
+        cfg.cfg["contract_url"] = "http://example.com"
+        cfg.override_features(features)
+
+        OurServiceClient(cfg=cfg).request_url("/")
+
+        expected = None
+        if pooled:
+            expected = connection_pool.get_connection_pool().urlopen
+        assert expected == m_readurl.call_args[1]["urlopen"]
+
 
 URL_FAKES = {
     "http://a": [{"code": 200, "response": {"key": "val", "key2": "val2"}}],
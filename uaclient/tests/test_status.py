@@ -3,6 +3,7 @@ import datetime
 import os
 import stat
 import string
+import threading
 
 import mock
 import pytest
@@ -889,6 +890,167 @@ class TestStatus:
         assert before == status.status(cfg=cfg)
 
 
+@mock.patch("uaclient.util.we_are_currently_root", return_value=True)
+@mock.patch("uaclient.status.get_available_resources")
+@mock.patch("uaclient.status._attached_service_status")
+class TestStatusServicesCache:
+    def test_only_services_with_changed_inputs_are_recomputed(
+        self,
+        m_service_status,
+        m_get_available_resources,
+        _m_we_are_currently_root,
+        all_resources_available,
+        FakeConfig,
+    ):
+        m_get_available_resources.return_value = all_resources_available
+        m_service_status.side_effect = lambda ent, _: {"name": ent.name}
+        cfg = FakeConfig.for_attached_machine()
+        status_inputs = {
+            name: (lambda _cfg, name=name: [name])
+            for name in status.STATUS_INPUTS
+        }
+
+        with mock.patch.dict(status.STATUS_INPUTS, status_inputs):
+            first = status.status(cfg=cfg, show_all=True)
+            num_services = m_service_status.call_count
+            assert len(first["services"]) == num_services
+
+            assert first == status.status(cfg=cfg, show_all=True)
+            assert num_services == m_service_status.call_count
+
+            m_service_status.reset_mock()
+            status.STATUS_INPUTS["livepatch"] = lambda _cfg: ["applied"]
+            assert first == status.status(cfg=cfg, show_all=True)
+
+        recomputed = [
+            call[0][0].name for call in m_service_status.call_args_list
+        ]
+        assert "livepatch" in recomputed
+        # FIPS status includes whether livepatch blocks it
+        assert "fips" in recomputed
+        assert "esm-infra" not in recomputed
+
+    @mock.patch("uaclient.status.time.time")
+    @mock.patch(
+        "uaclient.status.system.get_paths_fingerprint", return_value=[]
+    )
+    def test_livepatch_status_is_recomputed_after_its_ttl(
+        self,
+        _m_paths_fingerprint,
+        m_time,
+        m_service_status,
+        m_get_available_resources,
+        _m_we_are_currently_root,
+        all_resources_available,
+        FakeConfig,
+    ):
+        m_get_available_resources.return_value = all_resources_available
+        m_service_status.side_effect = lambda ent, _: {"name": ent.name}
+        cfg = FakeConfig.for_attached_machine()
+        status_inputs = {
+            name: (lambda _cfg, name=name: [name])
+            for name in status.STATUS_INPUTS
+            if name != "livepatch"
+        }
+        m_time.return_value = 1200.0
+
+        with mock.patch.dict(status.STATUS_INPUTS, status_inputs):
+            status.status(cfg=cfg, show_all=True)
+            m_service_status.reset_mock()
+            m_time.return_value += status.LIVEPATCH_STATUS_TTL - 1
+            status.status(cfg=cfg, show_all=True)
+            assert 0 == m_service_status.call_count
+
+            m_time.return_value += 1
+            status.status(cfg=cfg, show_all=True)
+
+        recomputed = [
+            call[0][0].name for call in m_service_status.call_args_list
+        ]
+        assert "livepatch" in recomputed
+        assert "esm-infra" not in recomputed
+
+    def test_non_root_users_do_not_use_the_cache(
+        self,
+        m_service_status,
+        m_get_available_resources,
+        m_we_are_currently_root,
+        all_resources_available,
+        FakeConfig,
+    ):
+        m_get_available_resources.return_value = all_resources_available
+        m_service_status.side_effect = lambda ent, _: {"name": ent.name}
+        cfg = FakeConfig.for_attached_machine()
+
+        status.status(cfg=cfg)
+        num_services = m_service_status.call_count
+        m_we_are_currently_root.return_value = False
+        status.status(cfg=cfg)
+
+        assert 2 * num_services == m_service_status.call_count
+
+    def test_enable_invalidates_the_cache(
+        self,
+        m_service_status,
+        m_get_available_resources,
+        _m_we_are_currently_root,
+        all_resources_available,
+        FakeConfig,
+    ):
+        m_get_available_resources.return_value = all_resources_available
+        m_service_status.side_effect = lambda ent, _: {"name": ent.name}
+        cfg = FakeConfig.for_attached_machine()
+        status.status(cfg=cfg)
+        assert cfg.read_cache("status-services-cache")
+
+        entitlement = ConcreteTestEntitlement(cfg, enable=True)
+        with mock.patch.object(
+            entitlement, "can_enable", return_value=(True, None)
+        ):
+            assert (True, None) == entitlement.enable()
+
+        assert cfg.read_cache("status-services-cache") is None
+
+
+@mock.patch("uaclient.status._attached_service_status")
+class TestGetAttachedServicesStatus:
+    def test_statuses_are_evaluated_concurrently_in_order(
+        self, m_service_status, FakeConfig
+    ):
+        # Both statuses must be computed at the same time to get past the
+        # barrier
+        barrier = threading.Barrier(2, timeout=5)
+
+        def service_status(ent, _inapplicable_resources):
+            barrier.wait()
+            return {"name": ent.name, "thread": threading.get_ident()}
+
+        m_service_status.side_effect = service_status
+        ents = [mock.MagicMock(), mock.MagicMock()]
+        ents[0].name = "b-service"
+        ents[1].name = "a-service"
+
+        statuses = status._get_attached_services_status(FakeConfig(), ents, {})
+
+        assert ["b-service", "a-service"] == [s["name"] for s in statuses]
+        assert threading.get_ident() not in [s["thread"] for s in statuses]
+
+    def test_one_worker_evaluates_statuses_serially(
+        self, m_service_status, FakeConfig
+    ):
+        m_service_status.side_effect = lambda ent, _: {
+            "name": ent.name,
+            "thread": threading.get_ident(),
+        }
+        ents = [mock.MagicMock(), mock.MagicMock()]
+        cfg = FakeConfig()
+        cfg.override_features({"status_max_workers": 1})
+
+        statuses = status._get_attached_services_status(cfg, ents, {})
+
+        assert [threading.get_ident()] * 2 == [s["thread"] for s in statuses]
+
+
 ATTACHED_SERVICE_STATUS_PARAMETERS = [
     # ENTITLED => display the given user-facing status
     (ContractStatus.ENTITLED, UserFacingStatus.ACTIVE, False, "enabled"),
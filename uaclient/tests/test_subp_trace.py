@@ -0,0 +1,118 @@
+import json
+
+import mock
+import pytest
+
+from uaclient import subp_trace
+from uaclient.subp_trace import SubpTraceSummary
+
+
+def trace_record(cmd, duration, failed=False, retries=0, caller="uaclient.x"):
+    return {
+        "cmd": cmd,
+        "duration": duration,
+        "returncode": 1 if failed else 0,
+        "retries": retries,
+        "failed": failed,
+        "caller": caller,
+    }
+
+
+class TestGetTraceFile:
+    @pytest.mark.parametrize(
+        "value,expected",
+        (
+            (None, None),
+            (False, None),
+            ("off", None),
+            ("0", None),
+            (True, "DATA/private/subp-trace.jsonl"),
+            ("1", "DATA/private/subp-trace.jsonl"),
+            ("/tmp/trace.jsonl", "/tmp/trace.jsonl"),
+        ),
+    )
+    def test_get_trace_file(self, value, expected, FakeConfig):
+        cfg = FakeConfig()
+        if value is not None:
+            cfg.override_features({"subp_trace": value})
+        if expected:
+            expected = expected.replace("DATA", cfg.data_dir)
+
+        assert expected == subp_trace.get_trace_file(cfg)
+
+
+class TestRecord:
+    def test_noop_when_disabled(self, tmpdir):
+        with mock.patch.object(subp_trace, "trace_file", None):
+            subp_trace.record("ls", 0.5, 0, 0, False)
+        assert [] == tmpdir.listdir()
+
+    def test_appends_json_lines(self, tmpdir):
+        trace = tmpdir.join("trace.jsonl")
+        with mock.patch.object(subp_trace, "trace_file", trace.strpath):
+            subp_trace.record("ls", 0.5, 0, 0, False)
+            subp_trace.record("ls --bogus", 0.25, 2, 1, True)
+
+        records = list(subp_trace.load_records(trace.strpath))
+        assert ["ls", "ls --bogus"] == [entry["cmd"] for entry in records]
+        assert {
+            "cmd": "ls --bogus",
+            "duration": 0.25,
+            "returncode": 2,
+            "retries": 1,
+            "failed": True,
+            "caller": __name__,
+        }.items() <= records[1].items()
+
+    def test_ignores_unwritable_trace_file(self, tmpdir):
+        path = tmpdir.join("missing", "trace.jsonl").strpath
+        with mock.patch.object(subp_trace, "trace_file", path):
+            subp_trace.record("ls", 0.5, 0, 0, False)
+
+
+class TestSummarize:
+    def test_load_records_skips_partial_lines(self, tmpdir):
+        trace = tmpdir.join("trace.jsonl")
+        trace.write(json.dumps(trace_record("ls", 1)) + '\n{"cmd": "l')
+
+        assert [trace_record("ls", 1)] == list(
+            subp_trace.load_records(trace.strpath)
+        )
+
+    def test_aggregates_by_cumulative_time(self):
+        records = [
+            trace_record("apt-cache policy", 0.5, caller="uaclient.apt"),
+            trace_record("lscpu", 0.75, caller="uaclient.system"),
+            trace_record("apt-cache policy", 0.5, caller="uaclient.version"),
+            trace_record("apt-get update", 0.25, failed=True, retries=3),
+        ]
+
+        assert [
+            SubpTraceSummary(
+                cmd="apt-cache policy",
+                calls=2,
+                total=1.0,
+                max=0.5,
+                failures=0,
+                retries=0,
+                callers=["uaclient.apt", "uaclient.version"],
+            ),
+            SubpTraceSummary(
+                cmd="lscpu",
+                calls=1,
+                total=0.75,
+                max=0.75,
+                failures=0,
+                retries=0,
+                callers=["uaclient.system"],
+            ),
+            SubpTraceSummary(
+                cmd="apt-get update",
+                calls=1,
+                total=0.25,
+                max=0.25,
+                failures=1,
+                retries=3,
+                callers=["uaclient.x"],
+            ),
+        ] == subp_trace.summarize(records)
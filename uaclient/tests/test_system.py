@@ -1,3 +1,4 @@
+import json
 import logging
 import subprocess
 import uuid
@@ -327,8 +328,7 @@ class TestIsContainer:
             exceptions.ProcessExecutionError(
                 "Failed running command 'ischroot' [exit(1)]"
             ),
-            "",
-            "",
+            ("", ""),
         ]
         assert True is system.is_container()
         # Second call for lru_cache test
@@ -946,6 +946,55 @@ class TestWriteFile:
         assert [mock.call("test_tmpfile")] == m_unlink.call_args_list
 
 
+class TestWriteLines:
+    def test_writes_lines_with_mode(self, tmpdir):
+        path = tmpdir.join("dir", "file")
+
+        system.write_lines(path.strpath, iter(["a\n", "b\n"]), mode=0o600)
+
+        assert "a\nb\n" == path.read()
+        assert 0o600 == path.stat().mode & 0o777
+
+    def test_keeps_original_file_when_lines_fail(self, tmpdir):
+        path = tmpdir.join("file")
+        path.write("original")
+
+        def lines():
+            yield "partial\n"
+            raise UnicodeError("test")
+
+        with pytest.raises(UnicodeError):
+            system.write_lines(path.strpath, lines())
+
+        assert "original" == path.read()
+        assert ["file"] == [entry.basename for entry in tmpdir.listdir()]
+
+
+class TestGetPathsFingerprint:
+    def test_files_directories_and_missing_paths(self, tmpdir):
+        lists_dir = tmpdir.mkdir("lists")
+        lists_dir.mkdir("partial")
+        lists_dir.join("b_Packages").write("bb")
+        lists_dir.join("a_Packages").write("a")
+        status_file = tmpdir.join("status")
+        status_file.write("status")
+        missing = tmpdir.join("missing").strpath
+
+        fingerprint = system.get_paths_fingerprint(
+            [status_file.strpath, lists_dir.strpath, missing]
+        )
+
+        assert [
+            (status_file.strpath, 6),
+            (lists_dir.join("a_Packages").strpath, 1),
+            (lists_dir.join("b_Packages").strpath, 2),
+            (missing, None),
+        ] == [(path, size) for path, _mtime, size in fingerprint]
+        assert fingerprint == system.get_paths_fingerprint(
+            [status_file.strpath, lists_dir.strpath, missing]
+        )
+
+
 class TestSubp:
     def test_raise_error_on_timeout(self, _subp):
         """When cmd exceeds the timeout raises a TimeoutExpired error."""
@@ -1042,6 +1091,137 @@ class TestSubp:
             else:
                 assert log not in logs
 
+    @mock.patch("uaclient.util.time.sleep")
+    def test_trace_commands_when_enabled(self, _m_sleep, _subp, tmpdir):
+        trace = tmpdir.join("trace.jsonl")
+        with mock.patch("uaclient.system._subp", side_effect=_subp):
+            system.subp(["ls", tmpdir.strpath])
+            with mock.patch("uaclient.subp_trace.trace_file", trace.strpath):
+                system.subp(["ls", tmpdir.strpath])
+                with pytest.raises(exceptions.ProcessExecutionError):
+                    system.subp(["ls", "--bogus"], retry_sleeps=[1])
+
+        records = [json.loads(line) for line in trace.readlines()]
+        assert [
+            (["ls", tmpdir.strpath], 0, 0, False),
+            (["ls", "--bogus"], 2, 1, True),
+        ] == [
+            (
+                entry["cmd"].split(" "),
+                entry["returncode"],
+                entry["retries"],
+                entry["failed"],
+            )
+            for entry in records
+        ]
+        assert {__name__} == {entry["caller"] for entry in records}
+
+
+class TestProbe:
+    @mock.patch("uaclient.system.time")
+    @mock.patch("uaclient.system.subp", return_value=("amd64\n", ""))
+    def test_reuses_result_until_ttl_expires(self, m_subp, m_time):
+        m_time.time.side_effect = [100, 150, 250, 250]
+
+        assert ("amd64\n", "") == system.probe(["dpkg", "arch"], 100)
+        assert ("amd64\n", "") == system.probe(["dpkg", "arch"], 100)
+        assert 1 == m_subp.call_count
+        system.probe(["dpkg", "arch"], 100)
+        assert 2 == m_subp.call_count
+
+    @mock.patch("uaclient.system.subp")
+    def test_replays_failures_with_exit_code(self, m_subp):
+        m_subp.side_effect = exceptions.ProcessExecutionError(
+            cmd="ischroot", exit_code=1, stderr="not a chroot"
+        )
+
+        for _ in range(2):
+            with pytest.raises(exceptions.ProcessExecutionError) as excinfo:
+                system.probe(["ischroot"], 100)
+            assert 1 == excinfo.value.exit_code
+            assert "not a chroot" == excinfo.value.stderr
+        assert 1 == m_subp.call_count
+
+    @mock.patch("uaclient.system.time")
+    @mock.patch("uaclient.system.subp")
+    def test_reuses_failures_briefly(self, m_subp, m_time):
+        m_subp.side_effect = exceptions.ProcessExecutionError(
+            cmd="cloud-id", exit_code=1, stderr="cloud-init is running"
+        )
+        m_time.time.side_effect = [100, 150, 200, 200]
+
+        for _ in range(3):
+            with pytest.raises(exceptions.ProcessExecutionError):
+                system.probe(["cloud-id"], system.PROBE_TTL_BOOT)
+        assert 2 == m_subp.call_count
+
+    @mock.patch("uaclient.system.subp", return_value=("amd64\n", ""))
+    def test_keeps_results_per_root_directory(self, m_subp):
+        system.probe(["dpkg", "--print-architecture"], 100)
+        with mock.patch(
+            "uaclient.system._get_root_id", return_value="64769:1234"
+        ):
+            system.probe(["dpkg", "--print-architecture"], 100)
+            system.probe(["dpkg", "--print-architecture"], 100)
+        system.probe(["dpkg", "--print-architecture"], 100)
+
+        assert 2 == m_subp.call_count
+
+    @mock.patch("uaclient.system.subp")
+    def test_does_not_keep_invalid_commands(self, m_subp):
+        m_subp.side_effect = exceptions.ProcessExecutionError(cmd="cloud-id")
+
+        for _ in range(2):
+            with pytest.raises(exceptions.ProcessExecutionError):
+                system.probe(["cloud-id"], 100)
+        assert 2 == m_subp.call_count
+
+    @pytest.mark.parametrize("is_root", (True, False))
+    @mock.patch("uaclient.system.subp", return_value=("kvm\n", ""))
+    def test_shares_results_between_processes_as_root(self, m_subp, is_root):
+        with mock.patch(
+            "uaclient.util.we_are_currently_root", return_value=is_root
+        ):
+            system.probe(["systemd-detect-virt"], 100)
+        # A new process only has the persisted results
+        with mock.patch("uaclient.system._probe_results", None):
+            assert ("kvm\n", "") == system.probe(["systemd-detect-virt"], 100)
+        assert (1 if is_root else 2) == m_subp.call_count
+
+    @mock.patch("uaclient.util.we_are_currently_root", return_value=True)
+    @mock.patch("uaclient.system.subp", return_value=("", ""))
+    def test_keeps_results_stored_by_other_processes(self, m_subp, _m_root):
+        system.probe(["lscpu"], 100)
+        # Another process stores its own result meanwhile
+        other_results = system._read_probe_results()
+        other_key = "ischroot @{}".format(system._get_root_id())
+        other_results[other_key] = dict(*other_results.values())
+        system.write_file(
+            system.SYSTEM_PROBES_CACHE_FILE, json.dumps(other_results)
+        )
+
+        system.probe(["snap", "list"], 100)
+        system.probe(["ischroot"], 100)
+
+        assert 2 == m_subp.call_count
+        assert ["ischroot", "lscpu", "snap"] == sorted(
+            key.split(" ", 1)[0] for key in system._read_probe_results()
+        )
+
+    @mock.patch("uaclient.system.subp", return_value=("", ""))
+    def test_invalidate_probes(self, m_subp):
+        system.probe(["snap", "list"], 100)
+        system.probe(["lscpu"], 100)
+
+        system.invalidate_probes("snap")
+        system.probe(["snap", "list"], 100)
+        system.probe(["lscpu"], 100)
+        assert 3 == m_subp.call_count
+
+        system.invalidate_probes()
+        system.probe(["lscpu"], 100)
+        assert 4 == m_subp.call_count
+
 
 class TestGetSystemdJobState:
     @pytest.mark.parametrize(
@@ -1,9 +1,13 @@
 """Tests related to uaclient.util module."""
 import datetime
+import gzip
+import io
 import json
 import logging
+import re
 import socket
 import urllib
+import zlib
 
 import mock
 import pytest
@@ -185,6 +189,127 @@ class TestReadurl:
         req = m_urlopen.call_args[0][0]  # the first positional argument
         assert data == req.data
 
+    @pytest.mark.parametrize(
+        "headers,expected",
+        (
+            ({}, "gzip"),
+            ({"Accept-Encoding": "identity"}, "identity"),
+        ),
+    )
+    def test_requests_gzip_encoding(self, headers, expected):
+        with mock.patch("uaclient.util.request.urlopen") as m_urlopen:
+            util.readurl("http://some_url", headers=headers)
+
+        req = m_urlopen.call_args[0][0]
+        assert expected == req.get_header("Accept-encoding")
+
+    @pytest.mark.parametrize(
+        "content_encoding,compress",
+        (
+            ("gzip", gzip.compress),
+            ("x-gzip", gzip.compress),
+            ("deflate", zlib.compress),
+        ),
+    )
+    @mock.patch("uaclient.util.HTTP_READ_CHUNK_SIZE", 16)
+    def test_decompresses_json_responses(self, content_encoding, compress):
+        content = {"notices": [{"id": "USN-{}".format(i)} for i in range(50)]}
+        body = io.BytesIO(compress(json.dumps(content).encode("utf-8")))
+        body.headers = {
+            "Content-Encoding": content_encoding,
+            "Content-type": "application/json",
+        }
+
+        with mock.patch("uaclient.util.request.urlopen", return_value=body):
+            assert (content, body.headers) == util.readurl("http://some_url")
+
+    @mock.patch(
+        "uaclient.util._ResponseLogMessage.__str__", return_value="response"
+    )
+    def test_response_log_is_formatted_lazily(self, m_str):
+        root_level = logging.root.level
+        logging.root.setLevel(logging.INFO)
+        try:
+            with mock.patch("uaclient.util.request.urlopen"):
+                util.readurl("http://some_url")
+        finally:
+            logging.root.setLevel(root_level)
+
+        assert 0 == m_str.call_count
+
+    @pytest.mark.parametrize(
+        "content,expected",
+        (
+            ("short", "data: short"),
+            (
+                "x" * 100,
+                "data: {}... [truncated, 100 characters in total]".format(
+                    "x" * 40
+                ),
+            ),
+            (
+                {"machineToken": "SEKRET", "notices": [1, 2, 3, 4, 5]},
+                "data: {'machineToken': '<REDACTED>', 'notices'..."
+                " [truncated, 100 characters in total]",
+            ),
+            (
+                [{"token": "SEKRET", "tokenInfo": "SHOWME"}],
+                "data: [{'token': '<REDACTED>', 'tokenInfo': 'S..."
+                " [truncated, 100 characters in total]",
+            ),
+        ),
+    )
+    @mock.patch("uaclient.util.LOG_RESPONSE_DATA_MAX_LENGTH", 40)
+    def test_response_log_message_truncates_data(self, content, expected):
+        message = util._ResponseLogMessage(
+            "GET", "http://some_url", {}, content, 100, True
+        )
+
+        assert str(message).endswith(expected)
+
+    @mock.patch("uaclient.util.redact_sensitive_logs")
+    def test_response_log_message_redacts_structured_data(self, m_redact):
+        m_redact.side_effect = lambda log: log
+        content = {
+            "machineToken": "SEKRET",
+            "resourceTokens": [{"token": "SEKRET", "type": "esm-infra"}],
+            "expires": datetime.datetime(2040, 1, 1),
+        }
+        message = util._ResponseLogMessage(
+            "POST", "http://some_url", {"key": "value"}, content, 100, True
+        )
+
+        assert (
+            "URL [POST] response: http://some_url, headers: {'key': 'value'},"
+            " data: {'machineToken': '<REDACTED>', 'resourceTokens':"
+            " [{'token': '<REDACTED>', 'type': 'esm-infra'}], 'expires':"
+            " datetime.datetime(2040, 1, 1, 0, 0)}"
+        ) == str(message)
+        # Formatted once, however many handlers emit the record
+        assert str(message) == str(message)
+        assert 1 == m_redact.call_count
+
+    def test_decompresses_http_error_bodies(self):
+        body = b'{"message": "invalid token"}'
+        http_error = urllib.error.HTTPError(
+            "http://some_url",
+            401,
+            "Unauthorized",
+            {
+                "Content-Encoding": "gzip",
+                "Content-type": "application/json",
+            },
+            io.BytesIO(gzip.compress(body)),
+        )
+
+        with mock.patch(
+            "uaclient.util.request.urlopen", side_effect=http_error
+        ):
+            with pytest.raises(urllib.error.HTTPError) as excinfo:
+                util.readurl("http://some_url")
+
+        assert body.decode("utf-8") == excinfo.value.body
+
 
 @mock.patch("uaclient.util.we_are_currently_root", return_value=False)
 class TestDisableLogToConsole:
@@ -271,6 +396,16 @@ class TestDatetimeAwareJSONDecoder:
     def test_encode(self, input, out):
         assert out == json.loads(input, cls=util.DatetimeAwareJSONDecoder)
 
+    @mock.patch("uaclient.util.parse_rfc3339_date")
+    def test_only_parses_date_like_strings(self, m_parse):
+        m_parse.side_effect = ValueError
+
+        assert {"id": "USN-1", "date": "2022-05-01"} == json.loads(
+            '{"id": "USN-1", "date": "2022-05-01"}',
+            cls=util.DatetimeAwareJSONDecoder,
+        )
+        assert [mock.call("2022-05-01")] == m_parse.call_args_list
+
 
 @mock.patch("builtins.input")
 class TestPromptForConfirmation:
@@ -449,6 +584,54 @@ class TestRedactSensitiveLogs:
         """Redact all sensitive matches from log messages."""
         assert expected == util.redact_sensitive_logs(raw_log)
 
+    @pytest.mark.parametrize(
+        "pattern,expected",
+        (
+            (r"(Bearer )[^\']+", "Bearer "),
+            (r"(\'attach\', \')[^\']+", "'attach', '"),
+            (r"(.*\[PUT\] response.*api/token,.*data: ).*", "[PUT] response"),
+            (
+                r"(/snap/bin/canonical-livepatch\s+enable\s+)[^\s]+",
+                "/snap/bin/canonical-livepatch",
+            ),
+            (r"(https://contracts.canonical.com/v1)", "https://contracts"),
+            (r"([a-z]+=)\w+", ""),
+            (r"(colou?r: )\w+", "colo"),
+            (r"(token|key)=\w+", ""),
+        ),
+    )
+    def test_get_trigger_literal(self, pattern, expected):
+        assert expected == util._get_trigger_literal(pattern)
+
+    def test_skips_patterns_without_their_trigger(self):
+        redactor = util.LogRedactor([r"(Bearer )[^\']+", r"(data: ).*"])
+        regexes = [mock.MagicMock(), mock.MagicMock()]
+        redactor.patterns = [
+            (trigger, regex)
+            for (trigger, _), regex in zip(redactor.patterns, regexes)
+        ]
+
+        assert regexes[1].sub.return_value == redactor.redact("data: x")
+        assert 0 == regexes[0].sub.call_count
+        assert 1 == regexes[1].sub.call_count
+
+    def test_anchors_patterns_starting_with_any_text(self):
+        redactor = util.LogRedactor(
+            [r"(\'token\': \')[^\']+", r"(.*response.*data: ).*"]
+        )
+
+        assert (
+            "ok\nresponse: {'token': '<REDACTED>'}, data: <REDACTED>\nok"
+        ) == redactor.redact("ok\nresponse: {'token': 'SEKRET'}, data: x\nok")
+        assert re.MULTILINE & redactor.patterns[1][1].flags
+
+    def test_redact_sensitive_lines(self):
+        lines = ["'Bearer SEKRET'\n", "ok\n", "{'token': 'SEKRET'}\n"]
+
+        assert ["'Bearer <REDACTED>'\nok\n", "{'token': '<REDACTED>'}\n"] == (
+            list(util.redact_sensitive_lines(iter(lines), block_size=19))
+        )
+
 
 class TestParseRFC3339Date:
     @pytest.mark.parametrize(
@@ -561,10 +744,40 @@ class TestConfigureWebProxy:
         self, m_open, http_proxy, https_proxy, m_environ, expected_environ
     ):
         with mock.patch.dict(util.os.environ, m_environ, clear=True):
-            util.configure_web_proxy(
-                http_proxy=http_proxy, https_proxy=https_proxy
-            )
-            assert expected_environ == util.os.environ
+            with mock.patch("uaclient.util._web_proxies", None):
+                util.configure_web_proxy(
+                    http_proxy=http_proxy, https_proxy=https_proxy
+                )
+                assert expected_environ == util.os.environ
+
+    @pytest.mark.parametrize(
+        "http_proxy,https_proxy,expected_proxies",
+        (
+            (None, None, {"http": "http://env-proxy"}),
+            ("http://proxy", None, {"http": "http://proxy"}),
+            (
+                "http://proxy",
+                "https://proxy",
+                {"http": "http://proxy", "https": "https://proxy"},
+            ),
+        ),
+    )
+    @mock.patch("urllib.request.install_opener")
+    def test_get_web_proxies(
+        self, _m_install_opener, http_proxy, https_proxy, expected_proxies
+    ):
+        environ = {"http_proxy": "http://env-proxy"}
+        with mock.patch.dict(util.os.environ, environ, clear=True):
+            with mock.patch("uaclient.util._web_proxies", None):
+                util.configure_web_proxy(
+                    http_proxy=http_proxy, https_proxy=https_proxy
+                )
+                proxies = util.get_web_proxies()
+                assert expected_proxies == {
+                    scheme: proxies[scheme]
+                    for scheme in ("http", "https")
+                    if scheme in proxies
+                }
 
 
 class TestValidateProxy:
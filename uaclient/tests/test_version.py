@@ -89,15 +89,71 @@ class TestGetLastKnownCandidate:
         assert "1.2.3" == get_last_known_candidate()
 
 
+@mock.patch("uaclient.version.get_version", return_value="1.1.2")
 class TestCheckForNewVersion:
-    @pytest.mark.parametrize("compare_return", (True, False))
-    @mock.patch("uaclient.version.compare_versions")
+    @pytest.mark.parametrize(
+        "candidate,expected",
+        (("1.2.3", "1.2.3"), ("1.1.2", None), (None, None)),
+    )
     @mock.patch("uaclient.version.get_last_known_candidate")
     def test_check_for_new_version(
-        self, m_candidate, m_compare, compare_return
+        self, m_candidate, _m_version, candidate, expected
     ):
-        m_compare.return_value = compare_return
-        if compare_return:
-            assert m_candidate.return_value == check_for_new_version()
-        else:
-            assert None is check_for_new_version()
+        m_candidate.return_value = candidate
+        assert expected == check_for_new_version()
+
+    @mock.patch("uaclient.version.get_paths_fingerprint")
+    @mock.patch(
+        "uaclient.version.get_last_known_candidate", return_value="1.2.3"
+    )
+    def test_result_is_kept_until_apt_lists_change(
+        self, m_candidate, m_fingerprint, _m_version, version_check_file
+    ):
+        m_fingerprint.return_value = [["/var/lib/apt/lists/a", 1, 1]]
+
+        assert "1.2.3" == check_for_new_version()
+        assert "1.2.3" == check_for_new_version()
+        assert 1 == m_candidate.call_count
+        assert version_check_file.check()
+
+        m_candidate.return_value = "1.1.0"
+        m_fingerprint.return_value = [["/var/lib/apt/lists/a", 2, 1]]
+        assert None is check_for_new_version()
+        assert None is check_for_new_version()
+        assert 2 == m_candidate.call_count
+        assert [
+            mock.call(
+                [
+                    "/var/lib/apt/lists",
+                    "/var/lib/apt/periodic/update-success-stamp",
+                    "/run/ubuntu-advantage/candidate-version",
+                ]
+            )
+        ] == m_fingerprint.call_args_list[:1]
+
+    @mock.patch("uaclient.version.get_paths_fingerprint")
+    @mock.patch("uaclient.version.get_last_known_candidate")
+    def test_failed_candidate_lookups_are_not_kept(
+        self, m_candidate, m_fingerprint, _m_version, version_check_file
+    ):
+        m_fingerprint.return_value = [["/var/lib/apt/lists/a", 1, 1]]
+        m_candidate.return_value = None
+
+        assert None is check_for_new_version()
+        assert not version_check_file.check()
+
+        m_candidate.return_value = "1.2.3"
+        assert "1.2.3" == check_for_new_version()
+        assert "1.2.3" == check_for_new_version()
+        assert 2 == m_candidate.call_count
+
+    @mock.patch("uaclient.version.write_file", side_effect=PermissionError())
+    @mock.patch(
+        "uaclient.version.get_last_known_candidate", return_value="1.2.3"
+    )
+    def test_result_is_returned_when_it_cannot_be_stored(
+        self, m_candidate, _m_write_file, _m_version
+    ):
+        assert "1.2.3" == check_for_new_version()
+        assert "1.2.3" == check_for_new_version()
+        assert 2 == m_candidate.call_count
@@ -6,10 +6,22 @@ import re
 import socket
 import sys
 import time
+import zlib
 from contextlib import contextmanager
-from functools import wraps
+from functools import lru_cache, wraps
 from http.client import HTTPMessage
-from typing import Any, Dict, List, Mapping, Optional, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Union,
+)
 from urllib import error, request
 from urllib.parse import urlparse
 
@@ -25,6 +37,12 @@ PROXY_VALIDATION_APT_HTTPS_URL = "https://esm.ubuntu.com"
 PROXY_VALIDATION_SNAP_HTTP_URL = "http://api.snapcraft.io"
 PROXY_VALIDATION_SNAP_HTTPS_URL = "https://api.snapcraft.io"
 
+HTTP_READ_CHUNK_SIZE = 64 * 1024
+COMPRESSED_CONTENT_ENCODINGS = ("gzip", "x-gzip", "deflate")
+RFC3339_DATE_PREFIX = re.compile(r"\d{4}-")
+# Longest response data, in characters, readurl writes to the debug log
+LOG_RESPONSE_DATA_MAX_LENGTH = 8 * 1024
+
 
 event = event_logger.get_event_logger()
 
@@ -72,7 +90,9 @@ class DatetimeAwareJSONDecoder(json.JSONDecoder):
     @staticmethod
     def object_hook(o):
         for key, value in o.items():
-            if isinstance(value, str):
+            # Only strings starting like a date can parse, and strptime
+            # failing on every other string dominates large responses
+            if isinstance(value, str) and RFC3339_DATE_PREFIX.match(value):
                 try:
                     new_value = parse_rfc3339_date(
                         value
@@ -256,6 +276,20 @@ def prompt_for_confirmation(
     return False
 
 
+# The proxies set by configure_web_proxy, if any
+_web_proxies = None  # type: Optional[Dict[str, str]]
+
+
+def get_web_proxies() -> Dict[str, str]:
+    """Return the proxies urllib uses, per URL scheme.
+
+    Those set by configure_web_proxy replace the ones from the environment.
+    """
+    if _web_proxies is not None:
+        return _web_proxies
+    return request.getproxies()
+
+
 def configure_web_proxy(
     http_proxy: Optional[str], https_proxy: Optional[str]
 ) -> None:
@@ -290,11 +324,117 @@ def configure_web_proxy(
     os.environ["no_proxy"] = no_proxy
     os.environ["NO_PROXY"] = no_proxy
     if proxy_dict:
+        global _web_proxies
+        _web_proxies = proxy_dict
         proxy_handler = request.ProxyHandler(proxy_dict)
         opener = request.build_opener(proxy_handler)
         request.install_opener(opener)
 
 
+def _iter_redacted_repr(data: Any) -> Iterator[str]:
+    """Yield the repr of data piece by piece, redacting sensitive keys."""
+    if isinstance(data, dict):
+        yield "{"
+        for index, (key, value) in enumerate(data.items()):
+            yield "{}{!r}: ".format(", " if index else "", key)
+            if key in REDACT_SENSITIVE_KEYS:
+                yield "'<REDACTED>'"
+            else:
+                yield from _iter_redacted_repr(value)
+        yield "}"
+    elif isinstance(data, list):
+        yield "["
+        for index, value in enumerate(data):
+            if index:
+                yield ", "
+            yield from _iter_redacted_repr(value)
+        yield "]"
+    else:
+        yield repr(data)
+
+
+class _ResponseLogMessage:
+    """A readurl response log message, only formatted when it is emitted.
+
+    Data longer than LOG_RESPONSE_DATA_MAX_LENGTH is truncated. Structured
+    data is redacted by key while it is formatted, so that only the
+    truncated message goes through redact_sensitive_logs.
+    """
+
+    # Tells RedactionFilter not to format the message itself
+    redacts_itself = True
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        headers: Union[HTTPMessage, Mapping[str, str]],
+        content: Any,
+        size: int,
+        log_data: bool,
+    ) -> None:
+        self.method = method
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.size = size
+        self.log_data = log_data
+        self._message = None  # type: Optional[str]
+
+    def _format_data(self) -> str:
+        max_length = LOG_RESPONSE_DATA_MAX_LENGTH
+        if isinstance(self.content, str):
+            data = self.content
+        else:
+            pieces = []
+            length = 0
+            for piece in _iter_redacted_repr(self.content):
+                pieces.append(piece)
+                length += len(piece)
+                if length > max_length:
+                    break
+            data = "".join(pieces)
+        if len(data) <= max_length:
+            return data
+        return "{}... [truncated, {} characters in total]".format(
+            data[:max_length], self.size
+        )
+
+    def __str__(self) -> str:
+        # Each handler emitting the record formats it, so format it once
+        if self._message is None:
+            sorted_header_str = ", ".join(
+                [
+                    "'{}': '{}'".format(k, self.headers[k])
+                    for k in sorted(self.headers)
+                ]
+            )
+            message = "URL [{}] response: {}, headers: {{{}}}".format(
+                self.method, self.url, sorted_header_str
+            )
+            if self.log_data:
+                message += ", data: {}".format(self._format_data())
+            self._message = redact_sensitive_logs(message)
+        return self._message
+
+
+def _read_response_body(resp) -> str:
+    """Read and decode a response body, decompressing it as it arrives."""
+    content_encoding = str(resp.headers.get("Content-Encoding", ""))
+    if content_encoding.strip().lower() not in COMPRESSED_CONTENT_ENCODINGS:
+        return resp.read().decode("utf-8")
+    # 32 + MAX_WBITS accepts both gzip and zlib (HTTP deflate) headers
+    decompressor = zlib.decompressobj(32 + zlib.MAX_WBITS)
+    body = bytearray()
+    while not decompressor.eof:
+        chunk = resp.read(HTTP_READ_CHUNK_SIZE)
+        if not chunk:
+            break
+        body += decompressor.decompress(chunk)
+    body += decompressor.flush()
+    return body.decode("utf-8")
+
+
 def readurl(
     url: str,
     data: Optional[bytes] = None,
@@ -302,7 +442,18 @@ def readurl(
     method: Optional[str] = None,
     timeout: Optional[int] = None,
     log_response_body: bool = True,
+    urlopen: Optional[Callable[..., Any]] = None,
 ) -> Tuple[Any, Union[HTTPMessage, Mapping[str, str]]]:
+    """Send a request and return its decoded content and headers.
+
+    Responses are requested gzip-compressed, unless headers already set an
+    Accept-Encoding, and decompressed while they are read.
+
+    :param urlopen: Replacement for urllib.request.urlopen, such as
+        connection_pool.HTTPConnectionPool.urlopen.
+    """
+    if urlopen is None:
+        urlopen = request.urlopen
     if data and not method:
         method = "POST"
     req = request.Request(url, data=data, headers=headers, method=method)
@@ -317,28 +468,32 @@ def readurl(
             data.decode("utf-8") if data else None,
         )
     )
+    if not req.has_header("Accept-encoding"):
+        req.add_header("Accept-encoding", "gzip")
     http_error_found = False
     try:
-        resp = request.urlopen(req, timeout=timeout)
+        resp = urlopen(req, timeout=timeout)
         http_error_found = False
     except error.HTTPError as e:
         resp = e
         http_error_found = True
-    setattr(resp, "body", resp.read().decode("utf-8"))
+    setattr(resp, "body", _read_response_body(resp))
     content = resp.body
-    if "application/json" in str(resp.headers.get("Content-type", "")):
+    # Responses like 304 Not Modified carry no body to decode
+    if content and "application/json" in str(
+        resp.headers.get("Content-type", "")
+    ):
         content = json.loads(content, cls=DatetimeAwareJSONDecoder)
-    sorted_header_str = ", ".join(
-        ["'{}': '{}'".format(k, resp.headers[k]) for k in sorted(resp.headers)]
-    )
-    debug_msg = "URL [{}] response: {}, headers: {{{}}}".format(
-        method or "GET", url, sorted_header_str
+    logging.debug(
+        _ResponseLogMessage(
+            method or "GET",
+            url,
+            resp.headers,
+            content,
+            len(resp.body),
+            log_response_body,
+        )
     )
-    if log_response_body:
-        # Due to implicit logging redaction, large responses might take longer
-        debug_msg += ", data: {}".format(content)
-
-    logging.debug(debug_msg)
     if http_error_found:
         raise resp
     return content, resp.headers
@@ -406,15 +561,114 @@ REDACT_SENSITIVE_LOGS = [
     r"(\'magic_token=)[^\']+",
 ]
 
+# Keys of structured data whose values are always redacted
+REDACT_SENSITIVE_KEYS = frozenset(
+    (
+        "contractToken",
+        "identityToken",
+        "machineToken",
+        "resourceToken",
+        "token",
+        "userCode",
+        "X-aws-ec2-metadata-token",
+    )
+)
+
+
+# Characters of log content redact_sensitive_lines redacts at once
+REDACT_BLOCK_SIZE = 64 * 1024
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+
+def _get_trigger_literal(pattern: str) -> str:
+    """Return literal text any match of a redaction pattern contains.
+
+    This is the plain text the pattern starts with, after its opening group
+    and any leading ".*". An empty string means there is none.
+    """
+    if "|" in pattern:
+        # Alternatives may match without the text of the first one
+        return ""
+    pattern = pattern.lstrip("(")
+    if pattern.startswith(".*"):
+        pattern = pattern[2:]
+    literal = []  # type: List[str]
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == "\\":
+            if index + 1 == len(pattern) or pattern[index + 1].isalnum():
+                # Character classes like \s are not literals
+                break
+            char = pattern[index + 1]
+            index += 1
+        elif char in REGEX_METACHARACTERS:
+            if char in "?*{" and literal:
+                # The previous character is optional
+                literal.pop()
+            break
+        literal.append(char)
+        index += 1
+    return "".join(literal)
+
+
+class LogRedactor:
+    """Apply redaction patterns in order, skipping the ones that can't match.
+
+    Each pattern is compiled once and only applied when the text contains
+    its trigger literal. Patterns starting with ".*" can only match from the
+    start of a line, so they are anchored there rather than retried at every
+    position of the text.
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns = []  # type: List[Tuple[str, Any]]
+        for pattern in patterns:
+            trigger = _get_trigger_literal(pattern)
+            if pattern.lstrip("(").startswith(".*"):
+                pattern = "(?m)^" + pattern
+            self.patterns.append((trigger, re.compile(pattern)))
+
+    def redact(self, text: str) -> str:
+        for trigger, regex in self.patterns:
+            if trigger in text:
+                text = regex.sub(r"\g<1><REDACTED>", text)
+        return text
+
+
+@lru_cache(maxsize=None)
+def _get_log_redactor(patterns: Tuple[str, ...]) -> LogRedactor:
+    return LogRedactor(patterns)
+
 
 def redact_sensitive_logs(
     log, redact_regexs: List[str] = REDACT_SENSITIVE_LOGS
 ) -> str:
     """Redact known sensitive information from log content."""
-    redacted_log = log
-    for redact_regex in redact_regexs:
-        redacted_log = re.sub(redact_regex, r"\g<1><REDACTED>", redacted_log)
-    return redacted_log
+    return _get_log_redactor(tuple(redact_regexs)).redact(log)
+
+
+def redact_sensitive_lines(
+    lines: Iterable[str], block_size: int = REDACT_BLOCK_SIZE
+) -> Iterator[str]:
+    """Redact known sensitive information from log content.
+
+    Lines are redacted together, in blocks of about block_size characters,
+    so that memory stays bounded without paying the redaction overhead for
+    every line.
+    """
+    redactor = _get_log_redactor(tuple(REDACT_SENSITIVE_LOGS))
+    block = []  # type: List[str]
+    length = 0
+    for line in lines:
+        block.append(line)
+        length += len(line)
+        if length >= block_size:
+            yield redactor.redact("".join(block))
+            block = []
+            length = 0
+    if block:
+        yield redactor.redact("".join(block))
 
 
 def handle_message_operations(
@@ -1,24 +1,29 @@
 """
 Client version related functions
 """
+import json
+import logging
 import os.path
 import re
 from math import inf
-from typing import Optional
+from typing import Any, List, Optional
 
 from uaclient.apt import (
+    APT_LISTS_DIR,
+    APT_UPDATE_SUCCESS_STAMP_PATH,
     compare_versions,
     get_apt_cache_policy_for_package,
     get_apt_cache_time,
 )
 from uaclient.defaults import CANDIDATE_CACHE_PATH, UAC_RUN_PATH
 from uaclient.exceptions import ProcessExecutionError
-from uaclient.system import subp
+from uaclient.system import get_paths_fingerprint, load_file, subp, write_file
 
 __VERSION__ = "28.0"
 PACKAGED_VERSION = "@@PACKAGED_VERSION@@"
 
 CANDIDATE_REGEX = r"Candidate: (?P<candidate>.*?)\n"
+VERSION_CHECK_CACHE_FILE = os.path.join(UAC_RUN_PATH, "version-check.json")
 
 
 def get_version() -> str:
@@ -77,8 +82,46 @@ def get_last_known_candidate() -> Optional[str]:
     return None
 
 
+def _get_version_check_fingerprint() -> List[Any]:
+    return [get_version()] + get_paths_fingerprint(
+        [APT_LISTS_DIR, APT_UPDATE_SUCCESS_STAMP_PATH, CANDIDATE_CACHE_PATH]
+    )
+
+
 def check_for_new_version() -> Optional[str]:
+    """Return the candidate version of the client if newer than this one.
+
+    The result is kept in VERSION_CHECK_CACHE_FILE until the apt lists, the
+    candidate version cache or the installed version change, so that it is
+    computed at most once per apt update. Failures to find the candidate
+    version are not kept.
+    """
+    try:
+        cached = json.loads(load_file(VERSION_CHECK_CACHE_FILE))
+    except (OSError, ValueError):
+        cached = None
+    if (
+        isinstance(cached, dict)
+        and cached.get("fingerprint") == _get_version_check_fingerprint()
+    ):
+        return cached.get("new_version")
+
     candidate = get_last_known_candidate()
-    if candidate and compare_versions(candidate, get_version(), "gt"):
-        return candidate
-    return None
+    if candidate is None:
+        # apt-cache policy failed: don't keep that until the next apt update
+        return None
+    new_version = None
+    if compare_versions(candidate, get_version(), "gt"):
+        new_version = candidate
+    # Taken after get_last_known_candidate, which may update its cache
+    fingerprint = _get_version_check_fingerprint()
+    try:
+        write_file(
+            VERSION_CHECK_CACHE_FILE,
+            json.dumps(
+                {"fingerprint": fingerprint, "new_version": new_version}
+            ),
+        )
+    except OSError as e:
+        logging.debug("Unable to store the new version check: %s", str(e))
+    return new_version